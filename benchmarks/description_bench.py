@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+"""
+Compares the former description processing, concatenating the files
+and filtering the whole text on every access, against the line
+streaming pipeline, cold and cached, on multi megabyte inputs.
+
+    python benchmarks/description_bench.py --megabytes 4
+"""
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from godot_asset_library_client import description
+from godot_asset_library_client.description import (
+    build_description, remove_emojis, remove_md_image_lines,
+)
+
+def legacy_description(paths):
+    text = '\n'.join(Path(path).read_text() for path in paths)
+    return remove_emojis(remove_md_image_lines(text))
+
+def generate(megabytes, seed=1):
+    """Markdown with headings, images, some emoji and some non ascii text"""
+    rng = random.Random(seed)
+    lines = []
+    size = 0
+    while size < megabytes * 2**20:
+        kind = rng.random()
+        if kind < 0.05:
+            line = f"## Section {len(lines)}"
+        elif kind < 0.10:
+            line = f"![screenshot](images/shot{len(lines)}.png)"
+        elif kind < 0.15:
+            line = "Now with ✨ sparkles and 🚀 rockets"
+        elif kind < 0.20:
+            line = "Traducción al español, ñandú incluido"
+        else:
+            line = "Plain text describing the addon, " * rng.randint(1, 4)
+        lines.append(line)
+        size += len(line) + 1
+    return '\n'.join(lines) + '\n'
+
+def measure(name, function, runs):
+    times = []
+    for i in range(runs):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    print(f"{name:>16}: {min(times)*1000:9.2f} ms")
+    return result, min(times)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--megabytes', type=float, default=4,
+        help="size of each description file")
+    parser.add_argument('--files', type=int, default=2)
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(args.files):
+            path = Path(tmp)/f'file{i}.md'
+            path.write_text(generate(args.megabytes, seed=i))
+            paths.append(path)
+        print(f"{args.files} files of {args.megabytes} MB")
+
+        legacy, legacy_time = measure('legacy', lambda: legacy_description(paths), args.runs)
+
+        def cold():
+            description.cache.clear()
+            return build_description(paths)
+        streamed, cold_time = measure('pipeline cold', cold, args.runs)
+        cached, cached_time = measure('pipeline cached', lambda: build_description(paths), args.runs)
+
+        if not legacy == streamed == cached:
+            print("FAILED: outputs differ")
+            raise SystemExit(1)
+        print(f"{'speedup cold':>16}: {legacy_time/cold_time:9.1f}x")
+        print(f"{'speedup cached':>16}: {legacy_time/cached_time:9.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+"""
+End to end upload benchmark against the bundled fake library server,
+so it runs offline with a controlled latency.
+
+Measures single upload latency, batch throughput with upload_many
+for several worker counts, and the requests each upload does.
+Exits with error if an upload exceeds the request budget.
+
+    python benchmarks/e2e_bench.py --latency 0.05 --assets 16 --jobs 1 4 8
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from godot_asset_library_client import git_reader
+from godot_asset_library_client.api import Api, make_session
+from godot_asset_library_client.fakeserver import FakeLibraryServer
+from godot_asset_library_client.upload import Upload, upload_many, project_root
+
+def git(*args):
+    subprocess.check_call(['git',
+        '-c', 'user.name=Bench', '-c', 'user.email=bench@example.com',
+        *args])
+
+def make_monorepo(path, nassets):
+    """Repository with an addon project per asset, returns their metadata files"""
+    git('init', '-q', '-b', 'main', str(path))
+    os.chdir(path)
+    git('remote', 'add', 'origin', 'https://github.com/bench/mono.git')
+    Path('icon.svg').write_text('<svg xmlns="http://www.w3.org/2000/svg" width="128" height="128"/>')
+    metadata_files = []
+    for i in range(1, nassets+1):
+        root = Path('addons')/f'addon{i}'
+        root.mkdir(parents=True)
+        (root/'project.godot').write_text(
+            '[application]\n'
+            f'config/name="Addon {i}"\n'
+            'config/version="1.0.0"\n'
+            'config/features=PackedStringArray("4.3")\n'
+        )
+        (root/'asset-metadata.yaml').write_text(
+            f'asset_id: {i}\n'
+            'category: 1\n'
+            'project_license: MIT\n'
+        )
+        metadata_files.append(root/'asset-metadata.yaml')
+    git('add', '.')
+    git('commit', '-q', '-m', 'addons')
+    return metadata_files
+
+def measure_single(server, metadata_file, runs):
+    api = Api(server.base, session=make_session())
+    api.login('user', 'password')
+    latencies = []
+    requests = []
+    for run in range(runs):
+        server.reset_counts()
+        start = time.perf_counter()
+        upload = Upload(api, metadata_file, root=project_root(metadata_file))
+        upload.prepare()
+        upload.submit()
+        latencies.append(time.perf_counter() - start)
+        requests.append(sum(server.counts().values()))
+    counts = server.counts()
+    print(f"single upload: median {statistics.median(latencies)*1000:8.1f} ms  "
+        f"min {min(latencies)*1000:8.1f} ms  "
+        f"requests {max(requests)}")
+    for request, count in sorted(counts.items()):
+        print(f"    {count:3}  {request}")
+    return max(requests)
+
+def measure_batch(server, metadata_files, jobs):
+    api = Api(server.base, session=make_session(pool_maxsize=2*jobs))
+    api.login('user', 'password')
+    server.reset_counts()
+    start = time.perf_counter()
+    statuses = upload_many(api, metadata_files, jobs=jobs, do=True, force=True)
+    elapsed = time.perf_counter() - start
+    failed = [status for status in statuses if status['status'] != 'submitted']
+    print(f"batch jobs={jobs:<3}: {elapsed*1000:8.1f} ms  "
+        f"{len(metadata_files)/elapsed:6.1f} assets/s  "
+        f"requests {sum(server.counts().values())}"
+        + (f"  FAILED {len(failed)}" if failed else ""))
+    return not failed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--latency', type=float, default=0.02,
+        help="seconds the fake library delays each request")
+    parser.add_argument('--assets', type=int, default=8,
+        help="assets in the batch")
+    parser.add_argument('--jobs', type=int, nargs='+', default=[1, 4],
+        help="worker counts to measure the batch with")
+    parser.add_argument('--runs', type=int, default=5,
+        help="single upload repetitions")
+    parser.add_argument('--max-requests', type=int, default=6,
+        help="request budget for a single upload (fails if exceeded)")
+    args = parser.parse_args()
+
+    initial_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp, \
+            FakeLibraryServer(latency=args.latency) as server:
+        try:
+            git_reader.clear_cache()
+            metadata_files = make_monorepo(Path(tmp)/'mono', args.assets)
+            for i in range(1, args.assets+1):
+                server.library.add_asset(str(i))
+            print(f"latency {args.latency*1000:.0f} ms per request, {args.assets} assets")
+            requests = measure_single(server, metadata_files[0], args.runs)
+            ok = all([measure_batch(server, metadata_files, jobs) for jobs in args.jobs])
+        finally:
+            os.chdir(initial_dir)
+
+    failed = not ok
+    if requests > args.max_requests:
+        print(f"FAILED: single upload did {requests} requests, budget {args.max_requests}")
+        failed = True
+    if failed:
+        raise SystemExit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+"""
+Compares one-shot requests against the pooled session in Api
+using a local http stand-in that simulates handshake latency
+on every new connection.
+
+    python benchmarks/http_session_bench.py --requests 50 --handshake 0.02
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from godot_asset_library_client.api import Api
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1' # keep-alive
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        body = json.dumps(dict(previews=[])).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class HandshakeDelayServer(ThreadingHTTPServer):
+    """Sleeps on every accepted connection, like a TCP+TLS handshake would"""
+    daemon_threads = True
+    handshake = 0.
+
+    def get_request(self):
+        request = super().get_request()
+        self.connections += 1
+        time.sleep(self.handshake)
+        return request
+
+def serve(handshake):
+    server = HandshakeDelayServer(('127.0.0.1', 0), Handler)
+    server.handshake = handshake
+    server.connections = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def measure(name, server, nrequests, get):
+    server.connections = 0
+    start = time.perf_counter()
+    for i in range(nrequests):
+        get(f'asset/{i}')
+    elapsed = time.perf_counter() - start
+    print(f"{name:>10}: {elapsed*1000:8.1f} ms  "
+        f"{elapsed*1000/nrequests:6.2f} ms/request  "
+        f"{server.connections:4} connections")
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--handshake', type=float, default=0.02,
+        help="simulated seconds per new connection")
+    args = parser.parse_args()
+
+    server = serve(args.handshake)
+    base = f'http://127.0.0.1:{server.server_port}/'
+    oneshot = measure('one-shot', server, args.requests,
+        lambda url: requests.get(base+url).json())
+    with Api(base) as api:
+        pooled = measure('pooled', server, args.requests, api.get)
+    print(f"{'speedup':>10}: {oneshot/pooled:8.1f}x")
+    server.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+"""
+Compares the former response handling, printing the body and
+decoding it through requests, and the payload rendering as
+highlighted yaml, against decoding the raw bytes once
+(with orjson if installed, and with the standard json module)
+and rendering json, on a large asset listing.
+
+    python benchmarks/output_bench.py --assets 2000
+"""
+import argparse
+import contextlib
+import io
+import json
+import time
+from unittest import mock
+
+import requests
+
+from godot_asset_library_client import utils
+from godot_asset_library_client.api import Api
+from godot_asset_library_client.utils import pretty, json_dumps
+
+def listing(assets):
+    """Body of an asset listing page with the given number of assets"""
+    return json.dumps(dict(
+        result=[
+            dict(
+                asset_id=str(i),
+                title=f"Asset {i} with a longer title",
+                author='author',
+                category='2D Tools',
+                godot_version='4.3',
+                version_string='1.0.0',
+                description="Plain text describing the addon, ñandú incluido. " * 8,
+                previews=[dict(type='image', link=f'https://host/{i}/shot.png')] * 3,
+            )
+            for i in range(assets)
+        ],
+        page=0,
+        pages=1,
+        total_items=assets,
+    )).encode()
+
+def response(content):
+    response = requests.Response()
+    response.status_code = 200
+    response._content = content
+    response.url = 'https://library/api/asset'
+    return response
+
+def legacy(content):
+    r = response(content)
+    print(r.text)
+    data = r.json()
+    print(pretty(data, color=True))
+    return data
+
+def current(content):
+    data = Api()._process_response(response(content))
+    print(json_dumps(data))
+    return data
+
+def measure(name, function, runs):
+    times = []
+    for i in range(runs):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = function()
+        times.append(time.perf_counter() - start)
+    print(f"{name:>16}: {min(times)*1000:9.2f} ms")
+    return result, min(times)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--assets', type=int, default=2000)
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    content = listing(args.assets)
+    print(f"{args.assets} assets, {len(content)/2**20:.1f} MB")
+    old, legacy_time = measure('legacy', lambda: legacy(content), args.runs)
+    with mock.patch.object(utils, 'orjson', None):
+        new, json_time = measure('stdlib json', lambda: current(content), args.runs)
+    fast = new
+    if utils.orjson:
+        fast, orjson_time = measure('orjson', lambda: current(content), args.runs)
+
+    if not old == new == fast:
+        print("FAILED: outputs differ")
+        return 1
+    print(f"speedup: {legacy_time/json_time:.1f}x with json", end='')
+    if utils.orjson:
+        print(f", {legacy_time/orjson_time:.1f}x with orjson", end='')
+    print()
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
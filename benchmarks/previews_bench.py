@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+"""
+Compares the former quadratic previews matching against
+the indexed diff, with thousands of previews where
+most are unchanged and some links are written differently.
+
+    python benchmarks/previews_bench.py --previews 5000
+"""
+import argparse
+import time
+
+from godot_asset_library_client.previews import diff_previews
+
+def legacy_diff(previews, old_previews):
+    actions = []
+    for preview in previews:
+        for old in old_previews:
+            if old['link'] != preview['link']: continue
+            actions.append(dict(preview, edit_preview_id=old['preview_id'], operation='update', enabled=True))
+            break
+        else:
+            actions.append(dict(preview, operation='insert', enabled=True))
+    return actions + [
+        dict(edit_preview_id=old['preview_id'], operation='delete', enabled=True)
+        for old in old_previews
+        if all(old['link'] != preview['link'] for preview in actions)
+    ]
+
+def generate(n):
+    old_previews = []
+    previews = []
+    for i in range(n):
+        if i % 2:
+            old_link = f'https://youtu.be/video{i}'
+            new_link = f'https://www.youtube.com/watch?v=video{i}'
+            kind = 'video'
+        else:
+            old_link = f'https://raw.githubusercontent.com/user/repo/main/shots/{i}.png'
+            new_link = f'https://raw.githubusercontent.com/user/repo/refs/heads/main/shots/{i}.png'
+            kind = 'image'
+        old_previews.append(dict(preview_id=i, type=kind, link=old_link))
+        previews.append(dict(type=kind, link=new_link if i % 10 else old_link))
+    return previews, old_previews
+
+def measure(name, diff, previews, old_previews):
+    start = time.perf_counter()
+    actions = diff(previews, old_previews)
+    elapsed = time.perf_counter() - start
+    operations = {}
+    for action in actions:
+        operations[action['operation']] = operations.get(action['operation'], 0) + 1
+    print(f"{name:>8}: {elapsed*1000:9.1f} ms  {len(actions):6} actions {operations}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--previews', type=int, default=5000)
+    args = parser.parse_args()
+    previews, old_previews = generate(args.previews)
+    measure('legacy', legacy_diff, previews, old_previews)
+    measure('indexed', diff_previews, previews, old_previews)
+
+if __name__ == '__main__':
+    main()
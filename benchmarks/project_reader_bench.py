@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+"""
+Compares the former per-field regex scan of project.godot
+against the single pass cached parser, on a generated project file
+with large autoload and input map sections.
+
+    python benchmarks/project_reader_bench.py --actions 20000
+"""
+import argparse
+import re
+import time
+from pathlib import Path
+
+from godot_asset_library_client import godot_project_reader
+from godot_asset_library_client.testutils import sandbox_dir
+
+fields = ['project_name', 'project_version', 'description', 'godot_version', 'icon']
+
+legacy_patterns = dict(
+    project_name = r'config/name="([^"]+)"',
+    project_version = r'config/version="([^"]+)"',
+    description = r'config/description="([^"]+)"',
+    godot_version = r'config/features=PackedStringArray[(]"([^"]+)"',
+    icon = r'config/icon="res:/([^"]+)"',
+)
+
+def legacy_from_project(field):
+    match = re.search(legacy_patterns[field], Path('project.godot').read_text())
+    return match and match.group(1)
+
+def generate_project(actions):
+    lines = ['config_version=5', '', '[autoload]', '']
+    lines += [f'Singleton{i}="*res://autoload/singleton_{i}.gd"' for i in range(actions//10)]
+    lines += ['', '[input]', '']
+    for i in range(actions):
+        lines += [
+            f'action_{i}={{',
+            '"deadzone": 0.5,',
+            '"events": [Object(InputEventKey,"resource_local_to_scene":false,"resource_name":"",'
+            f'"device":-1,"window_id":0,"alt_pressed":false,"keycode":{i},"unicode":0,"echo":false,"script":null)',
+            ']',
+            '}',
+        ]
+    # Application section at the end, the worst case for the regex scan
+    lines += [
+        '', '[application]', '',
+        'config/name="Benchmark"',
+        'config/description="A big project"',
+        'config/version="1.0.0"',
+        'config/features=PackedStringArray("4.3", "Forward Plus")',
+        'config/icon="res://icon.svg"',
+    ]
+    Path('project.godot').write_text('\n'.join(lines) + '\n')
+
+def measure(name, configs, read):
+    start = time.perf_counter()
+    for i in range(configs):
+        values = [read(field) for field in fields]
+    elapsed = time.perf_counter() - start
+    print(f"{name:>14}: {elapsed*1000:8.1f} ms  {elapsed*1000/configs:7.2f} ms/config")
+    return values
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--actions', type=int, default=20000,
+        help="input map actions to generate")
+    parser.add_argument('--configs', type=int, default=10,
+        help="configs built, each one reading all the fields")
+    args = parser.parse_args()
+
+    with sandbox_dir():
+        generate_project(args.actions)
+        size = Path('project.godot').stat().st_size
+        print(f"project.godot: {size/1024/1024:.1f} MB")
+        legacy = measure('regex scans', args.configs, legacy_from_project)
+        start = time.perf_counter()
+        godot_project_reader.read_project()
+        print(f"{'first parse':>14}: {(time.perf_counter()-start)*1000:8.1f} ms")
+        parsed = measure('cached parser', args.configs, godot_project_reader.from_project)
+        assert parsed == ['Benchmark', '1.0.0', 'A big project', '4.3', '/icon.svg'], parsed
+        assert legacy == parsed, (legacy, parsed)
+
+if __name__ == '__main__':
+    main()
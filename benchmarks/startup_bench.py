@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+"""
+Measures the cold start of the command line entry point
+using `python -X importtime` and checks it against a budget.
+Exits with error if the budget is exceeded or if heavy modules
+are imported by commands that should not need them.
+
+    python benchmarks/startup_bench.py --runs 10 --budget-ms 80
+"""
+import argparse
+import subprocess
+import sys
+
+module = 'godot_asset_library_client.cli'
+
+# Modules that cheap commands like project-field must not load
+heavy_modules = [
+    'requests',
+    'urllib3',
+    'yaml',
+    'pygments',
+    'dotenv',
+]
+
+def import_times(module):
+    """
+    Returns the cumulative import time of module in microseconds,
+    and a dict with all the modules it imported and their cumulative times.
+    """
+    stderr = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        stderr=subprocess.PIPE, check=True,
+    ).stderr.decode()
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        indent = len(name) - len(name.lstrip())
+        entries.append((name.strip(), indent, int(cumulative)))
+    # Nested imports are listed before the importer, more indented
+    position, (_, indent, total) = next(
+        (i, entry) for i, entry in enumerate(entries) if entry[0] == module)
+    imported = {}
+    for name, child_indent, cumulative in reversed(entries[:position]):
+        if child_indent <= indent: break
+        imported[name] = cumulative
+    return total, imported
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--budget-ms', type=float, default=80.,
+        help="maximum import time of the cli module (best run)")
+    parser.add_argument('--top', type=int, default=8,
+        help="number of slowest imported modules to show")
+    args = parser.parse_args()
+
+    runs = [import_times(module) for i in range(args.runs)]
+    total, imported = min(runs, key=lambda run: run[0])
+    total /= 1000
+    print(f"{module}: {total:.1f} ms (best of {args.runs})")
+    for name, microseconds in sorted(imported.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {microseconds/1000:8.1f} ms  {name}")
+
+    failed = False
+    loaded = [name for name in heavy_modules if name in imported]
+    if loaded:
+        print(f"FAILED: heavy modules imported at startup: {', '.join(loaded)}")
+        failed = True
+    if total > args.budget_ms:
+        print(f"FAILED: startup over budget ({total:.1f} ms > {args.budget_ms} ms)")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
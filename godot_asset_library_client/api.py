@@ -1,67 +1,214 @@
+import logging
 import requests
+from requests.adapters import HTTPAdapter
+from . import tracing
+from .scheduler import Scheduler
+from .pager import Pager
+from .utils import json_loads
+
+default_base = "https://godotengine.org/asset-library/api/"
+
+log = logging.getLogger(__name__)
+
+def make_session(pool_connections=4, pool_maxsize=8, pool_block=False):
+    """
+    Creates a keep-alive http session that can be shared
+    by several Api instances, so that connections (and TLS handshakes)
+    are reused among them.
+
+    - pool_connections: number of hosts whose connection pool is kept
+    - pool_maxsize: connections kept alive for each host
+    - pool_block: if true, pool_maxsize becomes a hard per host limit,
+      and requests wait for a free connection instead of opening a new one.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        pool_block=pool_block,
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
 
 class Api:
-    """Access to the Godot Asset Library API"""
+    """
+    Access to the Godot Asset Library API
+
+    An optional httpcache.ResponseCache serves and revalidates GET requests.
+    An optional tokenstore.TokenStore reuses login tokens between runs.
+    A scheduler.Scheduler sets timeouts and retries transient failures.
+    A given session can be shared, closing the Api leaves it open.
+    """
+
+    login_url = '/login'
+    # Statuses for an authenticated request with an invalid token
+    rejected_token_statuses = 401, 403
+
+    def __init__(self, base=None, session=None, cache=None, token_store=None, scheduler=None):
+        self.base = base or default_base
+        self.session = session or make_session()
+        # Given sessions are closed by their owner
+        self._owns_session = session is None
+        self.scheduler = scheduler or Scheduler()
+        self.cache = cache
+        self.token_store = token_store
+        self._reused_token = False
 
-    def __init__(self, base=None):
-        self.base = base or f"https://godotengine.org/asset-library/api/"
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._owns_session:
+            self.session.close()
 
     def login(self, username, password):
-        r = self.post('/login', json=dict(
+        self._credentials = username, password
+        if self.token_store:
+            token = self.token_store.get(self.base, username)
+            if token:
+                self.token = token
+                self._reused_token = True
+                return
+        self._login()
+
+    def _login(self):
+        username, password = self._credentials
+        self.__dict__.pop('token', None)
+        self._reused_token = False
+        r = self.post(self.login_url, json=dict(
             username=username,
             password=password,
         ))
         self.token = r['token']
+        if self.token_store:
+            self.token_store.put(self.base, username, self.token)
 
     def _process_response(self, response):
-        print(response.text)
+        """
+        Decoded json body of the response, parsed once from the raw bytes.
+        Bodies are only logged at debug level.
+        """
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("%s %s: %s", response.status_code, response.url,
+                response.content.decode('utf8', errors='replace'))
         response.raise_for_status()
         try:
-            return response.json()
-        except:
-            print(response.text)
-            raise
+            return json_loads(response.content)
+        except ValueError as error:
+            raise ValueError(f"Unexpected non json response from {response.url}: "
+                f"{response.content[:200]!r}") from error
 
-    def post(self, url, json={}, *args, **kwds):
+    def _send(self, method, url, *args, **kwds):
+        """
+        Sends a request through the session and the scheduler,
+        tracing each attempt as an http span
+        """
+        name = f'{method} {tracing.url_template(url)}'
+        send = self.session.post if method == 'POST' else self.session.get
+
+        def attempt(timeout, number):
+            with tracing.span(name, 'http', method=method, url=url, attempt=number) as span:
+                response = send(self.base+url, *args, timeout=timeout, **kwds)
+                span.set(status=response.status_code, bytes=len(response.content))
+                return response
+
+        return self.scheduler.send(method, attempt)
+
+    def _post(self, url, json, *args, **kwds):
         if hasattr(self, 'token'):
             json = dict(json, token=self.token)
 
-        response = requests.post(
-            self.base+url,
+        return self._send('POST', url,
             json=json,
             headers = {'Content-Type': 'application/json; charset=utf-8'},
             *args, **kwds)
-        return self._process_response(response)
+
+    def post(self, url, json={}, *args, **kwds):
+        response = self._post(url, json, *args, **kwds)
+        if self._reused_token and response.status_code in self.rejected_token_statuses:
+            # The stored token expired server side, login again and retry once
+            self.token_store.forget(self.base, self._credentials[0])
+            self._login()
+            response = self._post(url, json, *args, **kwds)
+        elif self._reused_token and response.status_code < 400:
+            # The stored token is valid, later rejections are not about it
+            self._reused_token = False
+        result = self._process_response(response)
+        if self.cache is not None and url != self.login_url:
+            # Edits change assets and edit listings
+            self.cache.clear()
+        return result
 
     def get(self, url, *args, **kwds):
-        response = requests.get(
-            self.base+url,
-            *args, **kwds)
-        return self._process_response(response)
+        if self.cache is None or args:
+            response = self._send('GET', url, *args, **kwds)
+            return self._process_response(response)
+
+        params = kwds.get('params')
+        with tracing.span(f'GET {tracing.url_template(url)}', 'cache') as span:
+            entry = self.cache.lookup(url, params)
+            fresh = entry and self.cache.is_fresh(entry)
+            span.set(result='fresh' if fresh else 'stale' if entry else 'miss')
+        if fresh:
+            return entry['body']
+        headers = dict(kwds.pop('headers', None) or {}, **self.cache.validators(entry))
+        response = self._send('GET', url,
+            headers=headers,
+            **kwds)
+        if entry and response.status_code == 304:
+            self.cache.revalidated(url, params, entry)
+            return entry['body']
+        result = self._process_response(response)
+        self.cache.store(url, params, result, response.headers)
+        return result
+
+    def pager(self, url, prefetch=1, **params):
+        """Iterates the items of a paginated listing, see pager.Pager"""
+        return Pager(self, url, params, prefetch=prefetch)
 
     def pending_version_edit(self, asset_id, version_string):
         """
         Returns the last pending edit for the current version or None.
+        The listing order is not documented by the library,
+        so every page is scanned for the highest edit id.
         """
-        result = self.get('asset/edit', params=dict(
-            asset=asset_id,
-            status='new',
-            version_string=version_string,
-        ))
+        with tracing.span('pending_version_edit', 'api') as span:
+            with self.pager('asset/edit',
+                asset=asset_id,
+                status='new',
+                version_string=version_string,
+            ) as edits:
+                try:
+                    return max((
+                        edit['edit_id'] for edit in edits
+                        if edit['version_string'] == version_string
+                    ), key=int, default=None)
+                finally:
+                    span.set(
+                        pages_fetched=edits.pages_fetched,
+                        total_items=edits.total_items,
+                    )
+
+    def configure(self, type='any'):
+        """Categories of the library, for the type of asset: addon, project or any"""
+        return self.get('configure', params=dict(type=type))
 
-        edit_ids = [
-            p['edit_id']
-            for p in result.get('result')
-            if p['version_string'] == version_string
-        ]
-        if edit_ids:
-            return max(edit_ids)
+    def assets(self, **params):
+        """A page of the asset listing"""
+        return self.get('asset', params=params)
+
+    def asset(self, asset_id):
+        return self.get(f'asset/{asset_id}')
+
+    def asset_edit(self, edit_id):
+        return self.get(f'asset/edit/{edit_id}')
 
     def asset_previews(self, asset_id):
-        result = self.get(f'asset/{asset_id}')
-        return result.get('previews', [])
+        return self.asset(asset_id).get('previews', [])
 
     def asset_edit_previews(self, edit_id):
-        result = self.get(f'asset/edit/{edit_id}')
-        return result.get('previews', [])
-
+        return self.asset_edit(edit_id).get('previews', [])
@@ -0,0 +1,80 @@
+import contextlib
+import io
+import unittest
+from unittest import mock
+import requests
+from . import utils
+from .api import Api, make_session, default_base
+
+def response(content, status=200):
+    response = requests.Response()
+    response.status_code = status
+    response._content = content
+    response.url = default_base + 'asset/1'
+    return response
+
+class Api_Test(unittest.TestCase):
+
+    def test_default_base(self):
+        api = Api()
+        self.assertEqual(api.base, default_base)
+
+    def test_session__owned_by_default(self):
+        a = Api()
+        b = Api()
+        self.assertIsNot(a.session, b.session)
+
+    def test_session__shared(self):
+        session = make_session()
+        a = Api(session=session)
+        b = Api(base="http://localhost/api/", session=session)
+        self.assertIs(a.session, b.session)
+
+    def test_close__owned_session(self):
+        with Api() as api:
+            close = self.enterContext(mock.patch.object(api.session, 'close'))
+        close.assert_called_once_with()
+
+    def test_close__given_session_kept_open(self):
+        session = make_session()
+        close = self.enterContext(mock.patch.object(session, 'close'))
+        with Api(session=session):
+            pass
+        close.assert_not_called()
+
+    def test_make_session__pool_sizes(self):
+        session = make_session(pool_connections=2, pool_maxsize=5, pool_block=True)
+        adapter = session.get_adapter('https://godotengine.org/')
+        self.assertEqual(adapter._pool_connections, 2)
+        self.assertEqual(adapter._pool_maxsize, 5)
+        self.assertEqual(adapter._pool_block, True)
+        self.assertIs(session.get_adapter('http://localhost/'), adapter)
+
+    def test_process_response__decoded_silently(self):
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            result = Api()._process_response(response('{"title": "My \u00c0sset"}'.encode()))
+        self.assertEqual(result, dict(title='My Àsset'))
+        self.assertEqual(stdout.getvalue(), '')
+
+    def test_process_response__body_logged_at_debug(self):
+        with self.assertLogs('godot_asset_library_client.api', 'DEBUG') as logs:
+            Api()._process_response(response(b'{"id": "1"}'))
+        self.assertEqual(logs.output, [
+            'DEBUG:godot_asset_library_client.api:200 https://godotengine.org/asset-library/api/asset/1: {"id": "1"}'
+        ])
+
+    def test_process_response__not_json(self):
+        with self.assertRaises(ValueError) as context:
+            Api()._process_response(response(b'<html>Maintenance</html>'))
+        self.assertIn("Unexpected non json response from", str(context.exception))
+        self.assertIn("Maintenance", str(context.exception))
+
+    def test_process_response__error_status(self):
+        with self.assertRaises(requests.HTTPError):
+            Api()._process_response(response(b'{"error": "Not found"}', status=404))
+
+    def test_process_response__without_orjson(self):
+        with mock.patch.object(utils, 'orjson', None):
+            self.assertEqual(Api()._process_response(response(b'{"id": "1"}')), dict(id='1'))
+            self.assertEqual(utils.json_dumps(dict(id='1')), '{"id":"1"}')
@@ -0,0 +1,135 @@
+"""
+Size analysis of the archive users download for a commit,
+streamed from `git archive`, so `export-ignore` attributes apply,
+without writing it to disk.
+"""
+import subprocess
+import tarfile
+import zlib
+from collections import Counter
+from pathlib import PurePosixPath
+from . import git_reader
+from . import tracing
+from .utils import table, human_size
+
+class ArchiveError(Exception):
+    pass
+
+# Zip stores them deflated, but deflating them again hardly saves anything
+incompressible = {
+    '.png', '.jpg', '.jpeg', '.webp', '.gif',
+    '.ogg', '.mp3', '.ogv', '.webm', '.mp4',
+    '.zip', '.gz', '.xz', '.bz2', '.7z', '.pck',
+    '.ttf', '.otf', '.woff', '.woff2',
+}
+
+# Zip local and central directory headers for each entry, besides the name twice
+_zip_entry_overhead = 30 + 46
+_zip_end_overhead = 22
+_chunk = 2**16
+
+def compressed_size(stream):
+    """Bytes read from the binary stream and bytes once deflated as zip does"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+    size = compressed = 0
+    while chunk := stream.read(_chunk):
+        size += len(chunk)
+        compressed += len(compressor.compress(chunk))
+    compressed += len(compressor.flush())
+    return size, compressed
+
+def archive_files(root, revision):
+    """
+    Yields (path, size, estimated compressed size) of each file
+    in the archive for the revision of the repository at root.
+    """
+    root = git_reader.find_root(root) or root
+    process = subprocess.Popen(['git', 'archive', '--format=tar', revision],
+        cwd=root,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    try:
+        try:
+            with tarfile.open(fileobj=process.stdout, mode='r|') as tar:
+                for member in tar:
+                    if not member.isfile():
+                        continue
+                    if PurePosixPath(member.name).suffix.lower() in incompressible:
+                        size = compressed = member.size
+                    else:
+                        size, compressed = compressed_size(tar.extractfile(member))
+                    yield member.name, size, compressed + _zip_entry_overhead + 2 * len(member.name.encode())
+        finally:
+            process.stdout.close()
+            error = process.stderr.read().decode(errors='replace').strip()
+            process.wait()
+    except tarfile.ReadError:
+        if not process.returncode:
+            raise
+    if process.returncode:
+        raise ArchiveError(f"git archive {revision} failed: {error}")
+
+def directories(path):
+    """
+    >>> list(directories('addons/tool/demo/scene.tscn'))
+    ['addons', 'addons/tool', 'addons/tool/demo']
+    """
+    parts = PurePosixPath(path).parts[:-1]
+    for i in range(len(parts)):
+        yield '/'.join(parts[:i+1])
+
+def analyze(root, revision, top=10):
+    """
+    Sizes of the archive for the revision: files, size, compressed
+    (an estimate of the zip size), and the `top` largest
+    files and directories, as (path, compressed) by compressed size.
+    """
+    with tracing.span('archive', 'git', revision=revision) as span:
+        files = Counter()
+        dirs = Counter()
+        size = 0
+        for path, file_size, compressed in archive_files(root, revision):
+            files[path] = compressed
+            size += file_size
+            for directory in directories(path):
+                dirs[directory] += compressed
+        result = dict(
+            revision=revision,
+            files=len(files),
+            size=size,
+            compressed=sum(files.values()) + _zip_end_overhead + sum(
+                # zip entries for directories
+                _zip_entry_overhead + 2 * len(directory.encode()) + 2
+                for directory in dirs
+            ),
+            largest_files=files.most_common(top),
+            largest_dirs=dirs.most_common(top),
+        )
+        span.set(files=result['files'], compressed=result['compressed'])
+        return result
+
+def over_budget(analysis, budget):
+    """Problem description if the archive is larger than the budget in bytes, else None"""
+    if budget and analysis['compressed'] > budget:
+        return (f"archive at {analysis['revision'][:8]} is {human_size(analysis['compressed'])}, "
+            f"over the {human_size(budget)} budget")
+    return None
+
+def report(analysis):
+    total = analysis['compressed']
+    def rows(items):
+        return [
+            [human_size(compressed), f"{100 * compressed / total:.1f}%", path]
+            for path, compressed in items
+        ]
+    return '\n'.join([
+        f"{analysis['files']} files, {human_size(analysis['size'])}, "
+        f"about {human_size(total)} compressed",
+        "",
+        "Largest directories:",
+        table(rows(analysis['largest_dirs']), ['compressed', 'share', 'directory']),
+        "",
+        "Largest files:",
+        table(rows(analysis['largest_files']), ['compressed', 'share', 'file']),
+    ])
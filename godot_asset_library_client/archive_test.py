@@ -0,0 +1,101 @@
+import os
+import unittest
+import subprocess
+from typer.testing import CliRunner
+from .archive import analyze, archive_files, over_budget, ArchiveError
+from .cli import app
+from .testutils import sandbox_dir, GitRepository
+
+class Archive_Test(GitRepository, unittest.TestCase):
+
+    def setUp(self):
+        self.enterContext(sandbox_dir())
+        self.init_repo()
+
+    def test_archive_files__sizes(self):
+        self.commit({
+            'text.gd': b'extends Node\n' * 1000,
+            'random.bin': os.urandom(10000),
+        })
+        files = {path: (size, compressed) for path, size, compressed in archive_files('.', 'HEAD')}
+        self.assertEqual(sorted(files), ['random.bin', 'text.gd'])
+        self.assertEqual(files['text.gd'][0], 13000)
+        self.assertLess(files['text.gd'][1], 500)
+        self.assertEqual(files['random.bin'][0], 10000)
+        self.assertGreater(files['random.bin'][1], 10000)
+
+    def test_archive_files__export_ignore(self):
+        self.commit({
+            '.gitattributes': b'demo/ export-ignore\n',
+            'addons/tool/tool.gd': b'extends Node\n',
+            'demo/scene.tscn': b'[gd_scene]\n',
+        })
+        paths = [path for path, size, compressed in archive_files('.', 'HEAD')]
+        self.assertEqual(sorted(paths), ['.gitattributes', 'addons/tool/tool.gd'])
+
+    def test_archive_files__committed_revision(self):
+        self.commit({'a.gd': b'a'})
+        first = self.git('rev-parse', 'HEAD')
+        self.commit({'b.gd': b'b'})
+        self.assertEqual([path for path, *sizes in archive_files('.', first)], ['a.gd'])
+
+    def test_archive_files__from_subdirectory(self):
+        self.commit({'a.gd': b'a', 'addons/tool/b.gd': b'b'})
+        paths = [path for path, *sizes in archive_files('addons/tool', 'HEAD')]
+        self.assertEqual(sorted(paths), ['a.gd', 'addons/tool/b.gd'])
+
+    def test_archive_files__stopped_early(self):
+        self.commit({f'{i}.gd': b'x' for i in range(100)})
+        files = archive_files('.', 'HEAD')
+        next(files)
+        files.close()
+
+    def test_archive_files__bad_revision(self):
+        self.commit({'a.gd': b'a'})
+        with self.assertRaises(ArchiveError) as context:
+            list(archive_files('.', 'nonexistent'))
+        self.assertIn("git archive nonexistent failed", str(context.exception))
+
+    def test_analyze__largest(self):
+        self.commit({
+            'addons/tool/big.png': os.urandom(5000),
+            'addons/tool/small.gd': b'x',
+            'demo/shot.png': os.urandom(3000),
+        })
+        result = analyze('.', 'HEAD', top=2)
+        self.assertEqual(result['files'], 3)
+        self.assertEqual(result['size'], 8001)
+        self.assertEqual([path for path, compressed in result['largest_files']],
+            ['addons/tool/big.png', 'demo/shot.png'])
+        self.assertEqual([path for path, compressed in result['largest_dirs']],
+            ['addons', 'addons/tool'])
+        self.assertGreater(result['compressed'], 8000)
+
+    def test_analyze__close_to_git_zip(self):
+        self.commit({
+            'addons/tool/tool.gd': b'extends Node\nfunc _ready():\n\tpass\n' * 200,
+            'addons/tool/icon.png': os.urandom(4000),
+            'README.md': b'# Tool\n\nDoes things.\n' * 50,
+        })
+        estimate = analyze('.', 'HEAD')['compressed']
+        actual = len(subprocess.check_output(['git', 'archive', '--format=zip', 'HEAD']))
+        self.assertLess(abs(estimate - actual) / actual, 0.05)
+
+    def test_over_budget(self):
+        analysis = dict(revision='0123456789abcdef', compressed=3 * 2**20)
+        self.assertEqual(over_budget(analysis, 2 * 2**20),
+            "archive at 01234567 is 3.0 MB, over the 2.0 MB budget")
+        self.assertIsNone(over_budget(analysis, 4 * 2**20))
+        self.assertIsNone(over_budget(analysis, None))
+
+    def test_command__over_budget(self):
+        self.commit({'data.bin': os.urandom(4000)})
+        result = CliRunner().invoke(app, ['analyze-archive', '--budget', '2KB'])
+        self.assertEqual(result.exit_code, 1, result.output)
+        self.assertIn("data.bin", result.output)
+        self.assertIn("over the 2.0 KB budget", result.output)
+
+    def test_command__within_budget(self):
+        self.commit({'data.bin': os.urandom(4000)})
+        result = CliRunner().invoke(app, ['analyze-archive', 'main', '--budget', '1MB'])
+        self.assertEqual(result.exit_code, 0, result.output)
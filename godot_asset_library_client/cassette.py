@@ -0,0 +1,227 @@
+"""
+Record and replay of the http exchanges of an Api.
+
+A real run is recorded, through a requests transport adapter,
+into a cassette: a json lines file, one exchange per line.
+Replaying it answers the same requests from the file,
+without network, so runs against real library responses
+become deterministic and fast regression tests.
+
+Credentials are never written: `token` and `password` values
+are redacted in the recorded requests and responses,
+and they are ignored when matching requests.
+"""
+import json
+import threading
+from collections import defaultdict
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qsl
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+class CassetteError(Exception):
+    pass
+
+# Request parts a recorded exchange is matched on
+match_parts = 'method', 'host', 'path', 'params', 'body'
+default_match = 'method', 'path', 'params', 'body'
+
+redacted_keys = {'token', 'password'}
+redacted = '<redacted>'
+
+# Response headers kept, the ones the client looks at
+kept_headers = {
+    'content-type', 'etag', 'last-modified', 'cache-control',
+    'expires', 'age', 'retry-after', 'date',
+}
+
+def redact(body):
+    """
+    Body text with the credentials redacted, if it is a json object.
+
+    >>> redact('{"token": "secret", "title": "My Asset"}')
+    '{"token": "<redacted>", "title": "My Asset"}'
+    >>> redact('not json')
+    'not json'
+    """
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return body
+    if not isinstance(data, dict) or not redacted_keys & data.keys():
+        return body
+    return json.dumps({
+        key: redacted if key in redacted_keys else value
+        for key, value in data.items()
+    })
+
+def _text(body):
+    if body is None:
+        return ''
+    if isinstance(body, bytes):
+        return body.decode('utf8', errors='replace')
+    return body
+
+def _canonical_body(body):
+    """Json bodies compared regardless of key order and credentials"""
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return body
+    if isinstance(data, dict):
+        data = {key: value for key, value in data.items() if key not in redacted_keys}
+    return json.dumps(data, sort_keys=True)
+
+class Cassette:
+    """
+    Exchanges recorded into, or replayed from, a json lines file.
+
+    Replayed requests are matched on the `match` parts
+    (see match_parts). Exchanges matching the same request
+    are replayed in their recorded order, the last one repeating.
+    """
+
+    def __init__(self, path, match=default_match):
+        unknown = set(match) - set(match_parts)
+        if unknown:
+            raise CassetteError(f"Unknown match parts: {', '.join(sorted(unknown))}, "
+                f"available: {', '.join(match_parts)}")
+        self.path = Path(path)
+        self.match = tuple(match)
+        self._lock = threading.Lock()
+        self._recorded = None
+
+    def key(self, request):
+        """Part values a request is matched on, request being a dict as stored"""
+        return tuple(
+            _canonical_body(request['body']) if part == 'body' else
+            tuple(map(tuple, request['params'])) if part == 'params' else
+            request[part]
+            for part in self.match
+        )
+
+    @staticmethod
+    def request_data(request):
+        """Stored form of a requests.PreparedRequest"""
+        url = urlsplit(request.url)
+        return dict(
+            method=request.method,
+            host=url.netloc,
+            path=url.path,
+            params=sorted(
+                (name, redacted if name in redacted_keys else value)
+                for name, value in parse_qsl(url.query)
+            ),
+            body=redact(_text(request.body)),
+        )
+
+    def start_recording(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text('')
+
+    def record(self, request, response):
+        exchange = dict(
+            request=self.request_data(request),
+            response=dict(
+                status=response.status_code,
+                reason=response.reason,
+                headers={
+                    name: value for name, value in response.headers.items()
+                    if name.lower() in kept_headers
+                },
+                body=redact(response.text),
+            ),
+        )
+        line = json.dumps(exchange, separators=(',', ':')) + '\n'
+        with self._lock:
+            with self.path.open('a') as f:
+                f.write(line)
+
+    def load(self):
+        """Reads the recorded exchanges, raising CassetteError if unreadable"""
+        with self._lock:
+            self._recorded = self._load()
+
+    def _load(self):
+        recorded = defaultdict(list)
+        try:
+            lines = self.path.read_text().splitlines()
+        except OSError as e:
+            raise CassetteError(f"Unable to read cassette {self.path}: {e}")
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                exchange = json.loads(line)
+            except ValueError as e:
+                raise CassetteError(f"{self.path}:{number}: {e}")
+            recorded[self.key(exchange['request'])].append(exchange['response'])
+        return recorded
+
+    def play(self, request):
+        """Recorded response dict for a requests.PreparedRequest"""
+        data = self.request_data(request)
+        with self._lock:
+            if self._recorded is None:
+                self._recorded = self._load()
+            responses = self._recorded.get(self.key(data))
+            if not responses:
+                raise CassetteError(f"No recorded exchange for {data['method']} {request.url}"
+                    f" in {self.path}, matching on {', '.join(self.match)}")
+            return responses.pop(0) if len(responses) > 1 else responses[0]
+
+
+class RecordingAdapter(HTTPAdapter):
+    """Sends requests to the network, recording the exchanges in the cassette"""
+
+    def __init__(self, cassette, **kwds):
+        super().__init__(**kwds)
+        self.cassette = cassette
+
+    def send(self, request, **kwds):
+        response = super().send(request, **kwds)
+        self.cassette.record(request, response)
+        return response
+
+
+class ReplayAdapter(BaseAdapter):
+    """Answers requests with the responses recorded in the cassette"""
+
+    def __init__(self, cassette):
+        super().__init__()
+        self.cassette = cassette
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        recorded = self.cassette.play(request)
+        response = requests.Response()
+        response.status_code = recorded['status']
+        response.reason = recorded.get('reason')
+        response.headers = CaseInsensitiveDict(recorded['headers'])
+        response._content = recorded['body'].encode('utf8')
+        response.encoding = 'utf-8'
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def record(session, path, **adapter_args):
+    """Records the exchanges of the session into a new cassette at path"""
+    cassette = Cassette(path)
+    cassette.start_recording()
+    _mount(session, RecordingAdapter(cassette, **adapter_args))
+    return cassette
+
+def replay(session, path, match=default_match):
+    """Answers the requests of the session from the cassette at path"""
+    cassette = Cassette(path, match)
+    cassette.load()
+    _mount(session, ReplayAdapter(cassette))
+    return cassette
+
+def _mount(session, adapter):
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
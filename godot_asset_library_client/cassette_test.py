@@ -0,0 +1,162 @@
+import contextlib
+import io
+import json
+import unittest
+from pathlib import Path
+import requests
+from . import cassette
+from .api import Api, make_session
+from .cassette import Cassette, CassetteError
+from .fakeserver import FakeLibraryServer
+from .scheduler import Scheduler
+from .testutils import temp_path, LibraryProject
+
+class Cassette_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.enterContext(contextlib.redirect_stdout(io.StringIO()))
+        self.path = self.enterContext(temp_path())/'library.jsonl'
+        self.server = FakeLibraryServer()
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.server.library.add_asset('1', title='My Asset', version_string='1.0')
+
+    def api(self, base=None):
+        return self.enterContext(Api(base or self.server.base,
+            session=make_session(),
+            scheduler=Scheduler(retries=0),
+        ))
+
+    def recording(self):
+        api = self.api()
+        cassette.record(api.session, self.path)
+        return api
+
+    def replaying(self, match=cassette.default_match, base=None):
+        api = self.api(base)
+        cassette.replay(api.session, self.path, match)
+        return api
+
+    def exchanges(self):
+        return [json.loads(line) for line in self.path.read_text().splitlines()]
+
+    def test_replay__without_server(self):
+        api = self.recording()
+        api.login('user', 'password')
+        recorded = api.asset('1')
+        self.server.stop()
+        api = self.replaying()
+        api.login('user', 'password')
+        self.assertEqual(api.asset('1'), recorded)
+
+    def test_record__credentials_redacted(self):
+        api = self.recording()
+        api.login('user', 'password')
+        token = api.token
+        api.post('asset/1', dict(title='New'))
+        content = self.path.read_text()
+        self.assertNotIn('"password"', content.replace('"password":"<redacted>"', ''))
+        self.assertNotIn(token, content)
+        self.assertEqual(json.loads(self.exchanges()[0]['response']['body'])['token'], '<redacted>')
+
+    def test_replay__token_ignored(self):
+        api = self.recording()
+        api.login('user', 'password')
+        api.post('asset/1', dict(title='New'))
+        self.server.stop()
+        api = self.replaying()
+        api.token = 'other'
+        self.assertEqual(api.post('asset/1', dict(title='New')), dict(id='1', url='asset/edit/1'))
+
+    def test_replay__body_mismatch(self):
+        api = self.recording()
+        api.login('user', 'password')
+        api.post('asset/1', dict(title='New'))
+        api = self.replaying()
+        api.login('user', 'password')
+        with self.assertRaises(CassetteError) as context:
+            api.post('asset/1', dict(title='Other'))
+        self.assertIn("No recorded exchange for POST", str(context.exception))
+
+    def test_replay__matching_configurable(self):
+        api = self.recording()
+        api.login('user', 'password')
+        api.post('asset/1', dict(title='New'))
+        api = self.replaying(match=('method', 'path'))
+        api.login('user', 'other password')
+        self.assertEqual(api.post('asset/1', dict(title='Other')), dict(id='1', url='asset/edit/1'))
+
+    def test_replay__any_host(self):
+        api = self.recording()
+        api.asset('1')
+        api = self.replaying(base='http://elsewhere/api/')
+        self.assertEqual(api.asset('1')['title'], 'My Asset')
+
+    def test_replay__in_recorded_order_last_repeated(self):
+        api = self.recording()
+        api.asset('1')
+        self.server.library.assets['1']['title'] = 'Renamed'
+        api.asset('1')
+        api = self.replaying()
+        titles = [api.asset('1')['title'] for i in range(3)]
+        self.assertEqual(titles, ['My Asset', 'Renamed', 'Renamed'])
+
+    def test_replay__error_statuses(self):
+        api = self.recording()
+        with self.assertRaises(requests.HTTPError):
+            api.asset('missing')
+        api = self.replaying()
+        with self.assertRaises(requests.HTTPError) as context:
+            api.asset('missing')
+        self.assertEqual(context.exception.response.status_code, 404)
+
+    def test_replay__paginated_pending_edit(self):
+        for i in range(15):
+            self.server.library.add_edit('1', version_string=f'0.{i}')
+        self.server.library.add_edit('1', version_string='2.0')
+        api = self.recording()
+        recorded = api.pending_version_edit('1', '2.0')
+        api = self.replaying()
+        self.assertEqual(api.pending_version_edit('1', '2.0'), recorded)
+
+    def test_unknown_match_part(self):
+        with self.assertRaises(CassetteError) as context:
+            Cassette(self.path, match=('method', 'headers'))
+        self.assertIn("Unknown match parts: headers", str(context.exception))
+
+    def test_missing_cassette(self):
+        with self.assertRaises(CassetteError):
+            self.replaying()
+
+
+class UploadReplay_Test(LibraryProject, unittest.TestCase):
+    """A recorded upload replays without the library"""
+
+    category = '2D Tools'
+
+    def upload(self, *args, cache='cache'):
+        result = self.cli('upload', 'asset-metadata.yaml', '--do', *args, cache=cache)
+        self.assertEqual(result.exit_code, 0, result.output)
+        return result.output
+
+    def test_upload__replayed(self):
+        recorded = self.upload('--record', 'upload.jsonl', cache='recording')
+        self.server.stop()
+        replayed = self.upload('--replay', 'upload.jsonl', cache='replaying')
+        self.assertEqual(replayed, recorded)
+        self.assertIn("RESULT:", replayed)
+
+    def test_upload__remembered_login_not_stored(self):
+        recorded = self.upload('--record', 'upload.jsonl', '--remember-login')
+        self.server.stop()
+        replayed = self.upload('--replay', 'upload.jsonl', '--remember-login')
+        self.assertEqual(replayed, recorded)
+        self.assertFalse((self.sandbox/'cache'/'godot-asset-library-client'/'tokens.json').exists())
+
+    def test_upload__replayed_without_catalogue_copy(self):
+        self.upload(cache='recording') # keeps the catalogue on disk
+        recorded = self.upload('--record', 'upload.jsonl', cache='recording')
+        self.server.stop()
+        replayed = self.upload('--replay', 'upload.jsonl', cache='replaying')
+        self.assertEqual(replayed, recorded)
+        self.assertIn('"path":"/api/configure"', Path('upload.jsonl').read_text())
@@ -0,0 +1,168 @@
+"""
+Vocabulary of the library: categories, Godot versions and licenses,
+so metadata is checked, and category names resolved,
+locally before any request.
+
+Categories come from the `configure` endpoint, kept on disk for a ttl.
+The library does not publish the accepted Godot versions and licenses,
+so they are taken from the response if present, otherwise from the
+values the library currently accepts. Since those may be outdated,
+a value they reject is just a warning.
+"""
+import difflib
+import re
+import threading
+import time
+from pathlib import Path
+from . import tracing
+from .utils import cache_file, read_json, write_json_atomic
+
+class InvalidMetadata(Exception):
+    pass
+
+# Licenses accepted by the library
+licenses = [
+    'MIT', 'MPL-2.0', 'GPLv3', 'GPLv2', 'LGPLv3', 'LGPLv2.1', 'LGPLv2',
+    'AGPLv3', 'EUPL-1.2', 'Apache-2.0', 'CC0', 'CC-BY-4.0', 'CC-BY-3.0',
+    'CC-BY-SA-4.0', 'CC-BY-SA-3.0', 'BSD-2-Clause', 'BSD-3-Clause',
+    'BSL-1.0', 'ISC', 'Unlicense', 'Proprietary',
+]
+
+# Major versions the library has assets for
+godot_majors = ['2', '3', '4']
+
+_version_re = re.compile(r'^(\d+)\.(\d+)$')
+
+def _suggestion(value, choices):
+    close = difflib.get_close_matches(str(value), choices, n=1, cutoff=0.5)
+    return f" (did you mean '{close[0]}'?)" if close else ''
+
+class Catalogue:
+    """Checks metadata values against a `configure` response"""
+
+    def __init__(self, configure):
+        self.categories = {
+            str(category['id']): category['name']
+            for category in configure.get('categories', [])
+        }
+        self._category_ids = {
+            name.lower(): id for id, name in self.categories.items()
+        }
+        self.godot_versions = configure.get('godot_versions')
+        self.licenses = configure.get('licenses') or licenses
+        self._published_licenses = bool(configure.get('licenses'))
+
+    def category_id(self, category):
+        """
+        Library id for a category given by id or name (case insensitive).
+
+        >>> catalogue = Catalogue(dict(categories=[dict(id='1', name='2D Tools')]))
+        >>> catalogue.category_id('2d tools'), catalogue.category_id(1)
+        ('1', 1)
+        """
+        if str(category) in self.categories:
+            return category
+        id = self._category_ids.get(str(category).strip().lower())
+        if id is not None:
+            return id
+        names = list(self.categories.values())
+        raise InvalidMetadata(f"Unknown category '{category}'{_suggestion(category, names)}. "
+            f"Available: {', '.join(f'{name} ({id})' for id, name in self.categories.items())}")
+
+    def check_godot_version(self, version):
+        if self.godot_versions:
+            if version not in self.godot_versions:
+                raise InvalidMetadata(f"Unsupported Godot version '{version}'"
+                    f"{_suggestion(version, self.godot_versions)}. "
+                    f"Available: {', '.join(self.godot_versions)}")
+            return
+        found = _version_re.match(str(version))
+        if not found or found.group(1) not in godot_majors:
+            raise InvalidMetadata(f"Unsupported Godot version '{version}', "
+                f"expected major.minor, ie. 4.3")
+
+    def check_license(self, license):
+        if license not in self.licenses:
+            raise InvalidMetadata(f"Unknown license '{license}'"
+                f"{_suggestion(license, self.licenses)}. "
+                f"Available: {', '.join(self.licenses)}")
+
+    def check(self, config):
+        """
+        Raises InvalidMetadata for the first wrong value of the config.
+        Returns, as warnings, the values rejected just by the built-in
+        Godot versions and licenses, not published by the library.
+        """
+        warnings = []
+        with tracing.span('check', 'catalogue'):
+            self.category_id(config.category)
+            for check, value, published in [
+                (self.check_godot_version, config.godot_version, bool(self.godot_versions)),
+                (self.check_license, config.project_license, self._published_licenses),
+            ]:
+                try:
+                    check(value)
+                except InvalidMetadata as e:
+                    if published:
+                        raise
+                    warnings.append(f"{e} The library may accept it anyway.")
+        return warnings
+
+
+def checked_config(metadata, make_config, catalogue=None):
+    """
+    (config, warnings) for the metadata, built with make_config.
+    With a catalogue, the category is turned into its library id,
+    wrong values raise InvalidMetadata and doubtful ones are warnings.
+    Without it, the category must be given by id, since names cannot be resolved.
+    """
+    if not catalogue:
+        category = metadata.get('category')
+        if not str(category).strip().isdigit():
+            raise InvalidMetadata(f"Category '{category}' cannot be resolved "
+                "without the library categories, give its id instead")
+        return make_config(metadata), []
+    metadata['category'] = catalogue.category_id(metadata.get('category'))
+    config = make_config(metadata)
+    return config, catalogue.check(config)
+
+
+def default_path(base):
+    return cache_file('configure', base, '.json')
+
+_loaded = {}
+_lock = threading.Lock()
+
+def load(api, ttl=24*60*60, path=None, stored=True):
+    """
+    Catalogue for the library of the api.
+    It is fetched once for all the threads, and kept on disk for ttl seconds.
+    If the library cannot be reached, an outdated copy is used.
+    Unless stored, it is just fetched, ie. so recorded runs include the request.
+    """
+    if not stored:
+        with tracing.span('fetch', 'catalogue'):
+            return Catalogue(api.configure())
+    path = Path(path or default_path(api.base))
+    with _lock:
+        loaded = _loaded.get(path)
+        if loaded and time.time() - loaded[0] < ttl:
+            return loaded[1]
+        stored = read_json(path)
+        if not stored or time.time() - stored['fetched_at'] >= ttl:
+            try:
+                with tracing.span('fetch', 'catalogue'):
+                    stored = dict(configure=api.configure(), fetched_at=time.time())
+            except Exception:
+                if not stored:
+                    raise
+            else:
+                write_json_atomic(path, stored)
+        catalogue = Catalogue(stored['configure'])
+        _loaded[path] = stored['fetched_at'], catalogue
+        return catalogue
+
+def clear_cache():
+    """Forgets the catalogues loaded by the process"""
+    with _lock:
+        _loaded.clear()
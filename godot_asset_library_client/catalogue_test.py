@@ -0,0 +1,165 @@
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from . import catalogue
+from .catalogue import Catalogue, InvalidMetadata, checked_config, load
+from .testutils import temp_path
+
+configure = dict(categories=[
+    dict(id='1', name='2D Tools', type='0'),
+    dict(id='5', name='Tools', type='0'),
+    dict(id='8', name='Templates', type='1'),
+])
+
+class Config:
+    category = '2D Tools'
+    godot_version = '4.3'
+    project_license = 'MIT'
+
+class Catalogue_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.catalogue = Catalogue(configure)
+
+    def test_category_id__by_name(self):
+        self.assertEqual(self.catalogue.category_id('Tools'), '5')
+        self.assertEqual(self.catalogue.category_id(' templates '), '8')
+
+    def test_category_id__by_id(self):
+        self.assertEqual(self.catalogue.category_id(5), 5)
+        self.assertEqual(self.catalogue.category_id('8'), '8')
+
+    def test_category_id__unknown(self):
+        with self.assertRaises(InvalidMetadata) as context:
+            self.catalogue.category_id('2D Tool')
+        self.assertEqual(str(context.exception),
+            "Unknown category '2D Tool' (did you mean '2D Tools'?). "
+            "Available: 2D Tools (1), Tools (5), Templates (8)")
+
+    def test_category_id__unknown_id(self):
+        with self.assertRaises(InvalidMetadata):
+            self.catalogue.category_id(99)
+
+    def test_godot_version__major_minor(self):
+        for version in ['3.6', '4.3', '4.10']:
+            self.catalogue.check_godot_version(version)
+
+    def test_godot_version__wrong(self):
+        for version in ['4', '4.3.1', '5.0', 'four', None]:
+            with self.assertRaises(InvalidMetadata, msg=version):
+                self.catalogue.check_godot_version(version)
+
+    def test_godot_version__listed_by_the_library(self):
+        catalogue = Catalogue(dict(configure, godot_versions=['4.2', '4.3']))
+        catalogue.check_godot_version('4.3')
+        with self.assertRaises(InvalidMetadata) as context:
+            catalogue.check_godot_version('4.4')
+        self.assertIn("Available: 4.2, 4.3", str(context.exception))
+
+    def test_license(self):
+        self.catalogue.check_license('MIT')
+        with self.assertRaises(InvalidMetadata) as context:
+            self.catalogue.check_license('GPL-3')
+        self.assertIn("Unknown license 'GPL-3' (did you mean 'GPLv3'?)", str(context.exception))
+
+    def test_check(self):
+        self.assertEqual(self.catalogue.check(Config), [])
+        class wrong(Config):
+            category = 'Toolz'
+        with self.assertRaises(InvalidMetadata):
+            self.catalogue.check(wrong)
+
+    def test_check__builtin_values_just_warn(self):
+        class doubtful(Config):
+            godot_version = '4.3.1'
+            project_license = 'WTFPL'
+        warnings = self.catalogue.check(doubtful)
+        self.assertEqual(len(warnings), 2)
+        self.assertIn("Unsupported Godot version '4.3.1'", warnings[0])
+        self.assertIn("Unknown license 'WTFPL'", warnings[1])
+        self.assertTrue(warnings[1].endswith("The library may accept it anyway."))
+
+    def test_check__published_values_enforced(self):
+        class wrong(Config):
+            project_license = 'WTFPL'
+        with self.assertRaises(InvalidMetadata):
+            Catalogue(dict(configure, licenses=['MIT'])).check(wrong)
+        class wrong(Config):
+            godot_version = '4.4'
+        with self.assertRaises(InvalidMetadata):
+            Catalogue(dict(configure, godot_versions=['4.3'])).check(wrong)
+
+    def test_checked_config__category_name_resolved(self):
+        metadata = dict(category='Tools', godot_version='4.3', project_license='MIT')
+        config, warnings = checked_config(metadata, lambda metadata: SimpleNamespace(**metadata), self.catalogue)
+        self.assertEqual(config.category, '5')
+        self.assertEqual(warnings, [])
+
+    def test_checked_config__without_catalogue_id_accepted(self):
+        config, warnings = checked_config(dict(category=5), dict)
+        self.assertEqual(config, dict(category=5))
+
+    def test_checked_config__without_catalogue_name_rejected(self):
+        with self.assertRaises(InvalidMetadata) as context:
+            checked_config(dict(category='Tools'), dict)
+        self.assertIn("Category 'Tools' cannot be resolved", str(context.exception))
+
+
+class CountingApi:
+    base = 'https://library/api/'
+
+    def __init__(self, response=configure, delay=0):
+        self.response = response
+        self.delay = delay
+        self.calls = 0
+
+    def configure(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        if isinstance(self.response, Exception):
+            raise self.response
+        return self.response
+
+class Load_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.path = self.enterContext(temp_path())/'configure.json'
+        catalogue.clear_cache()
+        self.addCleanup(catalogue.clear_cache)
+
+    def test_fetched_once_by_concurrent_threads(self):
+        api = CountingApi(delay=0.05)
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(load(api, path=self.path)))
+            for i in range(4)
+        ]
+        for thread in threads: thread.start()
+        for thread in threads: thread.join()
+        self.assertEqual(api.calls, 1)
+        self.assertEqual(len(set(map(id, results))), 1)
+
+    def test_kept_on_disk(self):
+        load(CountingApi(), path=self.path)
+        catalogue.clear_cache()
+        api = CountingApi()
+        self.assertEqual(load(api, path=self.path).category_id('Tools'), '5')
+        self.assertEqual(api.calls, 0)
+
+    def test_expired__fetched_again(self):
+        load(CountingApi(), path=self.path)
+        catalogue.clear_cache()
+        api = CountingApi(dict(categories=[dict(id='3', name='Shaders')]))
+        self.assertEqual(load(api, ttl=0, path=self.path).category_id('Shaders'), '3')
+        self.assertEqual(api.calls, 1)
+
+    def test_unreachable__outdated_copy_used(self):
+        load(CountingApi(), path=self.path)
+        catalogue.clear_cache()
+        api = CountingApi(ConnectionError("down"))
+        self.assertEqual(load(api, ttl=0, path=self.path).category_id('Tools'), '5')
+
+    def test_unreachable__no_copy(self):
+        with self.assertRaises(ConnectionError):
+            load(CountingApi(ConnectionError("down")), path=self.path)
@@ -1,16 +1,30 @@
+import contextlib
 import os
+from enum import Enum
 from pathlib import Path
-from dotenv import load_dotenv
 import typer
 from typing import Annotated
-from .utils import pretty
-from .api import Api
-from .config import Config
-from .previews import previews_edit
 from .godot_project_reader import from_project, available_fields
+from . import tracing
+
+# Heavy modules (requests, yaml, pygments...) are imported
+# within the commands using them, so that fast commands
+# like project-field do not pay for them at startup.
 
 app = typer.Typer()
 
+@app.callback()
+def main(
+    debug: Annotated[bool, typer.Option(
+        help="Log library response bodies and other details to stderr",
+        envvar='GODOT_ASSET_LIB_DEBUG',
+    )] = False,
+):
+    """Godot Asset Library client"""
+    if debug:
+        import logging
+        logging.basicConfig(level=logging.DEBUG, format='%(levelname)s %(name)s: %(message)s')
+
 @app.command()
 def project_field(
     field: Annotated[str, typer.Argument()] = None,
@@ -32,84 +46,593 @@ def project_field(
         print_available_fields()
         return
 
-    print(from_project(field))
+    value = from_project(field)
+    if isinstance(value, list):
+        print('\n'.join(value))
+        return
+    print(value)
 
 
+# Options shared by the upload commands
+DoOption = Annotated[bool, typer.Option(
+    help="Do the actual upload",
+)]
+SendPreviewsOption = Annotated[bool, typer.Option(
+    help="Send previews (this will be disabled by default until it works)",
+)]
+CacheOption = Annotated[bool, typer.Option(
+    help="Cache library responses on disk",
+    envvar='GODOT_ASSET_LIB_CACHE',
+)]
+CacheTtlOption = Annotated[int, typer.Option(
+    help="Seconds cached responses are used without revalidation",
+)]
+ConfigCacheOption = Annotated[bool, typer.Option(
+    help="Reuse the metadata inferred from the project and git while they are unchanged",
+    envvar='GODOT_ASSET_LIB_CONFIG_CACHE',
+)]
+RefreshOption = Annotated[bool, typer.Option(
+    help="Revalidate or refetch all cached responses",
+)]
+RememberLoginOption = Annotated[bool, typer.Option(
+    help="Reuse the login token among runs, keeping it in a private file",
+    envvar='GODOT_ASSET_LIB_REMEMBER_LOGIN',
+)]
+ForceOption = Annotated[bool, typer.Option(
+    help="Upload even if the library already has the same content",
+)]
+PreflightOption = Annotated[bool, typer.Option(
+    '--preflight/--no-preflight',
+    help="Stop if the icon or repository previews are missing at the commit or too large, "
+        "or the archive is over archive_budget",
+)]
+TargetOption = Annotated[list[str], typer.Option(
+    help="Branch to publish, read from git without checking it out. "
+        "Repeat it for several; by default, the `targets` in the metadata",
+)]
+LibraryUrlOption = Annotated[str, typer.Option(
+    help="Asset Library api url, ie. a testing instance",
+    envvar='GODOT_ASSET_LIB_URL',
+)]
+TimeoutOption = Annotated[float, typer.Option(
+    help="Seconds to wait for a library response",
+)]
+DeadlineOption = Annotated[float, typer.Option(
+    help="Seconds after which no further library request is done",
+)]
+RetriesOption = Annotated[int, typer.Option(
+    min=0,
+    help="Further attempts for transient library failures",
+)]
+RateLimitOption = Annotated[float, typer.Option(
+    help="Maximum library requests per second (0, unlimited)",
+)]
+RecordOption = Annotated[Path, typer.Option(
+    help="Record the library exchanges into a cassette file, credentials redacted",
+)]
+ReplayOption = Annotated[Path, typer.Option(
+    help="Answer the library requests from a recorded cassette file, without network",
+)]
+ReplayMatchOption = Annotated[str, typer.Option(
+    help="Comma separated request parts a replayed request is matched on: "
+        "method, host, path, params, body (credentials ignored)",
+)]
+class Output(str, Enum):
+    text = 'text'
+    json = 'json'
+    jsonl = 'jsonl'
+
+OutputOption = Annotated[Output, typer.Option(
+    help="text for people, or for tools, json (an array with a record for each result) "
+        "or jsonl (a record per line), without highlighting",
+    envvar='GODOT_ASSET_LIB_OUTPUT',
+)]
+TimingsOption = Annotated[bool, typer.Option(
+    help="Report where the time went: stages, git, project, http...",
+)]
+TraceFileOption = Annotated[Path, typer.Option(
+    help="Write the timing spans as a Chrome trace, or as json lines if ending in .jsonl",
+)]
+
+@contextlib.contextmanager
+def _tracing(timings=False, trace_file=None, err=False):
+    """
+    Records timing spans within the block if requested, reporting them at the end,
+    on stderr if err, so they do not mix with a json output.
+    """
+    if not timings and not trace_file:
+        yield
+        return
+    tracing.enable()
+    try:
+        yield
+    finally:
+        tracing.disable()
+        if timings:
+            typer.echo(tracing.summary(), err=err)
+        if trace_file:
+            tracing.write_trace(trace_file)
+
+def _print_records(records, output):
+    """Records as a json array, or as json lines"""
+    from .utils import json_dumps
+    if output == Output.jsonl:
+        for record in records:
+            print(json_dumps(record))
+        return
+    print(json_dumps(records))
+
+def _report_statuses(statuses, do, output):
+    """Prints the upload statuses, exiting with an error if any failed"""
+    from .upload import summary_table
+    for status in statuses:
+        for warning in status.get('warnings', []):
+            typer.secho(f"WARNING: {status['metadata']}: {warning}",
+                fg=typer.colors.BRIGHT_YELLOW, err=True)
+    if output == Output.text:
+        print(summary_table(statuses))
+        if not do:
+            typer.secho("NOTHING DONE, DRY RUN", fg=typer.colors.BRIGHT_RED)
+    else:
+        _print_records(statuses, output)
+    if any(status['status'] in ('failed', 'skipped') for status in statuses):
+        raise typer.Exit(1)
+
+def _credentials():
+    """Loads secrets from environment or .env file"""
+    from dotenv import load_dotenv
+    load_dotenv('.env')
+    username = os.environ.get('GODOT_ASSET_LIB_USER')
+    password = os.environ.get('GODOT_ASSET_LIB_PASSWORD')
+    return username, password
+
+def _api(cache=False, cache_ttl=300, refresh=False, remember_login=False, pool_maxsize=8, library_url=None,
+        timeout=60, deadline=None, retries=4, rate_limit=0, record=None, replay=None, replay_match=None):
+    from .api import Api, make_session
+    from .httpcache import ResponseCache
+    from .tokenstore import TokenStore
+    from .scheduler import Scheduler, Deadline, TokenBucket
+    api = Api(library_url,
+        session=make_session(pool_maxsize=pool_maxsize),
+        scheduler=Scheduler(
+            timeout=(min(10, timeout), timeout),
+            retries=retries,
+            deadline=Deadline(deadline) if deadline else None,
+            bucket=TokenBucket(rate_limit, burst=max(1, rate_limit)) if rate_limit else None,
+        ),
+    )
+    # Recorded runs send every request, so replays find them all,
+    # and they log in, so no redacted token is stored
+    if cache and not (record or replay):
+        api.cache = ResponseCache(api.base, ttl=cache_ttl, refresh=refresh)
+    if remember_login and not (record or replay):
+        api.token_store = TokenStore()
+    if record and replay:
+        raise typer.BadParameter("--record and --replay are exclusive")
+    if record:
+        from . import cassette
+        cassette.record(api.session, record, pool_maxsize=pool_maxsize)
+    if replay:
+        from . import cassette
+        match = [part.strip() for part in replay_match.split(',')] if replay_match else cassette.default_match
+        try:
+            cassette.replay(api.session, replay, match)
+        except cassette.CassetteError as e:
+            raise typer.BadParameter(str(e))
+    return api
+
+def _catalogue(api, stored=True):
+    """Library catalogue to check the metadata, if available"""
+    from .catalogue import load
+    try:
+        return load(api, stored=stored)
+    except Exception as e:
+        typer.secho(f"WARNING: Metadata not checked, and categories only accepted by id, "
+            f"unable to get the library categories: {e}",
+            fg=typer.colors.BRIGHT_YELLOW, err=True)
+        return None
+
 @app.command()
 def upload(
     yaml_metadata: Annotated[Path, typer.Argument(
         exists=True,
         readable=True,
     )],
-    do: Annotated[bool, typer.Option(
-        help="Do the actual upload",
-    )] = False,
-    send_previews: Annotated[bool, typer.Option(
-        help="Send previews (this will be disabled by default until it works)",
+    do: DoOption = False,
+    send_previews: SendPreviewsOption = False,
+    timings: TimingsOption = False,
+    trace_file: TraceFileOption = None,
+    cache: CacheOption = False,
+    cache_ttl: CacheTtlOption = 300,
+    config_cache: ConfigCacheOption = False,
+    refresh: RefreshOption = False,
+    remember_login: RememberLoginOption = False,
+    force: ForceOption = False,
+    preflight_checks: PreflightOption = True,
+    target: TargetOption = None,
+    jobs: Annotated[int, typer.Option(
+        min=1,
+        help="Targets uploaded concurrently",
+    )] = 4,
+    output: OutputOption = Output.text,
+    library_url: LibraryUrlOption = None,
+    timeout: TimeoutOption = 60,
+    deadline: DeadlineOption = None,
+    retries: RetriesOption = 4,
+    rate_limit: RateLimitOption = 0,
+    record: RecordOption = None,
+    replay: ReplayOption = None,
+    replay_match: ReplayMatchOption = None,
+):
+    """
+    Uploads the project to Godot Asset Library.
+    With targets, each target branch is uploaded concurrently.
+    With a json output, the outcome of each upload is printed as a record.
+    """
+    with _tracing(timings, trace_file, err=output != Output.text):
+        from .utils import pretty
+        from .upload import Upload, expand_targets, upload_expanded
+        from .submissions import SubmissionLog
+        from .config import ConfigCache
+        from .catalogue import InvalidMetadata
+
+        username, password = _credentials()
+        api = _api(cache, cache_ttl, refresh, remember_login,
+            pool_maxsize=max(8, 2*jobs),
+            library_url=library_url,
+            timeout=timeout,
+            deadline=deadline,
+            retries=retries,
+            rate_limit=rate_limit,
+            record=record,
+            replay=replay,
+            replay_match=replay_match,
+        )
+
+        try:
+            uploads = expand_targets([yaml_metadata], target)
+        except InvalidMetadata as e:
+            typer.secho(f"INVALID METADATA: {e}", fg=typer.colors.BRIGHT_RED,
+                err=output != Output.text)
+            raise typer.Exit(1)
+
+        if output != Output.text or uploads != [(yaml_metadata, None)]:
+            api.login(username, password)
+            statuses = upload_expanded(api, uploads,
+                jobs=jobs,
+                do=do,
+                send_previews=send_previews,
+                submissions=SubmissionLog(),
+                force=force,
+                preflight_checks=preflight_checks,
+                config_cache=ConfigCache() if config_cache else None,
+                catalogue=_catalogue(api, stored=not (record or replay)),
+            )
+            _report_statuses(statuses, do, output)
+            return
+
+        upload = Upload(api, yaml_metadata,
+            send_previews=send_previews,
+            submissions=SubmissionLog(),
+            config_cache=ConfigCache() if config_cache else None,
+            catalogue=_catalogue(api, stored=not (record or replay)),
+        )
+        try:
+            upload.prepare(login=lambda: api.login(username, password))
+        except InvalidMetadata as e:
+            typer.secho(f"INVALID METADATA: {e}", fg=typer.colors.BRIGHT_RED)
+            raise typer.Exit(1)
+        finally:
+            if timings:
+                print(upload.stages.report())
+
+        for warning in upload.warnings:
+            typer.secho(f"WARNING: {warning}", fg=typer.colors.BRIGHT_YELLOW, err=True)
+
+        from .preflight import report
+        config = upload.config
+        print(f"LINKED MEDIA at {config.git_hash}:\n{report(upload.media)}")
+        if upload.archive:
+            from .utils import human_size
+            print(f"ARCHIVE: {upload.archive['files']} files, "
+                f"about {human_size(upload.archive['compressed'])} compressed")
+        problems = upload.problems()
+        if problems and preflight_checks:
+            typer.secho("PREFLIGHT FAILED:\n" + '\n'.join(problems), fg=typer.colors.BRIGHT_RED)
+            print("Fix them, or use --no-preflight to upload anyway")
+            raise typer.Exit(1)
+
+        unchanged = None if force else upload.unchanged()
+        if unchanged:
+            typer.secho(f"NOTHING TO UPLOAD: {unchanged}", fg=typer.colors.BRIGHT_GREEN)
+            print("Use --force to upload anyway")
+            return
+
+        if config.edit_id:
+            typer.secho(
+                f"Detected pending edit {config.edit_id} for version {config.project_version}.\n"
+                "Modifiying it instead of creating a new one.",
+                fg=typer.colors.BRIGHT_YELLOW,
+            )
+
+        print(f"POST DATA to {api.base}{upload.resource}:\n{pretty(upload.payload)}")
+
+        if not do:
+            typer.secho("NOTHING DONE, DRY RUN", fg=typer.colors.BRIGHT_RED)
+            print("Check the output and use --do option to actually upload")
+            return
+
+        result = upload.submit()
+        print("RESULT:",
+            pretty(result))
+        print(f"Check at {api.base}/{result['url']}")
+
+
+@app.command()
+def upload_many(
+    paths: Annotated[list[Path], typer.Argument(
+        exists=True,
+        help="Metadata files, or directories to search them in",
+    )],
+    pattern: Annotated[str, typer.Option(
+        help="Metadata file name to search in directories",
+    )] = 'asset-metadata.yaml',
+    jobs: Annotated[int, typer.Option(
+        min=1,
+        help="Assets uploaded concurrently",
+    )] = 4,
+    fail_fast: Annotated[bool, typer.Option(
+        '--fail-fast/--keep-going',
+        help="Whether to skip pending uploads after a failure",
     )] = False,
+    do: DoOption = False,
+    send_previews: SendPreviewsOption = False,
+    timings: TimingsOption = False,
+    trace_file: TraceFileOption = None,
+    cache: CacheOption = False,
+    cache_ttl: CacheTtlOption = 300,
+    config_cache: ConfigCacheOption = False,
+    refresh: RefreshOption = False,
+    remember_login: RememberLoginOption = False,
+    force: ForceOption = False,
+    preflight_checks: PreflightOption = True,
+    target: TargetOption = None,
+    output: OutputOption = Output.text,
+    library_url: LibraryUrlOption = None,
+    timeout: TimeoutOption = 60,
+    deadline: DeadlineOption = None,
+    retries: RetriesOption = 4,
+    rate_limit: RateLimitOption = 0,
+    record: RecordOption = None,
+    replay: ReplayOption = None,
+    replay_match: ReplayMatchOption = None,
 ):
-    """Uploads the project to Godot Asset Library"""
+    """
+    Uploads many projects to Godot Asset Library.
+    Each project root is the closest directory to its metadata file
+    containing a project.godot.
+    Metadata files with targets upload each target branch.
+    """
+    with _tracing(timings, trace_file, err=output != Output.text):
+        from .upload import discover, upload_many
+        from .submissions import SubmissionLog
+        from .config import ConfigCache
+        from .catalogue import InvalidMetadata
 
-    # Load secrets from environment or .env file
-    load_dotenv('.env')
-    username = os.environ.get('GODOT_ASSET_LIB_USER')
-    password = os.environ.get('GODOT_ASSET_LIB_PASSWORD')
+        metadata_files = discover(paths, pattern)
+        if not metadata_files:
+            typer.secho(f"No '{pattern}' found", fg=typer.colors.BRIGHT_RED,
+                err=output != Output.text)
+            raise typer.Exit(1)
 
-    config = Config.from_file(yaml_metadata)
+        username, password = _credentials()
+        api = _api(cache, cache_ttl, refresh, remember_login,
+            pool_maxsize=2*jobs,
+            library_url=library_url,
+            timeout=timeout,
+            deadline=deadline,
+            retries=retries,
+            rate_limit=rate_limit,
+            record=record,
+            replay=replay,
+            replay_match=replay_match,
+        )
+        api.login(username, password)
 
-    api = Api()
-    api.login(username, password)
+        try:
+            statuses = upload_many(api, metadata_files,
+                jobs=jobs,
+                fail_fast=fail_fast,
+                targets=target,
+                do=do,
+                send_previews=send_previews,
+                submissions=SubmissionLog(),
+                force=force,
+                preflight_checks=preflight_checks,
+                config_cache=ConfigCache() if config_cache else None,
+                catalogue=_catalogue(api, stored=not (record or replay)),
+            )
+        except InvalidMetadata as e:
+            typer.secho(f"INVALID METADATA: {e}", fg=typer.colors.BRIGHT_RED,
+                err=output != Output.text)
+            raise typer.Exit(1)
+        _report_statuses(statuses, do, output)
 
-    resource = f'asset/{config.asset_id}'
 
-    old_previews = api.asset_previews(config.asset_id)
-    previews = previews_edit(config.previews, old_previews, config)
+@app.command()
+def watch(
+    yaml_metadata: Annotated[Path, typer.Argument(
+        exists=True,
+        readable=True,
+    )],
+    send_previews: SendPreviewsOption = False,
+    refresh: Annotated[float, typer.Option(
+        help="Seconds the library state is reused before fetching it again",
+    )] = 60,
+    interval: Annotated[float, typer.Option(
+        help="Seconds between checks for changed files",
+    )] = 0.2,
+    library_url: LibraryUrlOption = None,
+    timeout: TimeoutOption = 60,
+    retries: RetriesOption = 4,
+):
+    """
+    Keeps the upload payload updated as the metadata, project,
+    description files or git HEAD change, showing what changed.
+    Nothing is uploaded.
+    """
+    from .utils import pretty
+    from .watch import Watcher
+    from .catalogue import InvalidMetadata
 
-    config.edit_id = api.pending_version_edit(
-        asset_id = config.asset_id,
-        version_string = config.project_version,
+    api = _api(library_url=library_url, timeout=timeout, retries=retries)
+    watcher = Watcher(api, yaml_metadata,
+        send_previews=send_previews,
+        refresh=refresh,
+        catalogue=_catalogue(api),
     )
+    try:
+        watcher.step()
+    except InvalidMetadata as e:
+        typer.secho(f"INVALID METADATA: {e}", fg=typer.colors.BRIGHT_RED)
+        raise typer.Exit(1)
+    for warning in watcher.warnings:
+        typer.secho(f"WARNING: {warning}", fg=typer.colors.BRIGHT_YELLOW, err=True)
+    print(f"PAYLOAD for {api.base}{watcher.resource}:\n{pretty(watcher.payload)}")
+    print("Watching for changes, Ctrl+C to stop")
+    try:
+        watcher.run(interval=interval)
+    except KeyboardInterrupt:
+        pass
+
 
-    if config.edit_id:
-        typer.secho(
-            f"Detected pending edit {config.edit_id} for version {config.project_version}.\n"
-            "Modifiying it instead of creating a new one.",
-            fg=typer.colors.BRIGHT_YELLOW,
+@app.command()
+def analyze_archive(
+    revision: Annotated[str, typer.Argument(
+        help="Commit, branch or tag whose archive is analyzed",
+    )] = 'HEAD',
+    root: Annotated[Path, typer.Option(
+        help="Directory within the repository",
+    )] = Path('.'),
+    top: Annotated[int, typer.Option(
+        min=1,
+        help="Largest files and directories shown",
+    )] = 10,
+    budget: Annotated[str, typer.Option(
+        help="Fail if the compressed archive is larger, ie. 5MB",
+    )] = None,
+    timings: TimingsOption = False,
+    trace_file: TraceFileOption = None,
+):
+    """
+    Reports the size of the archive users download for a commit,
+    honouring export-ignore attributes, and its largest files and directories.
+    """
+    from .archive import analyze, report, over_budget, ArchiveError
+    from .utils import parse_size
+    with _tracing(timings, trace_file):
+        try:
+            analysis = analyze(root, revision, top=top)
+        except ArchiveError as e:
+            typer.secho(str(e), fg=typer.colors.BRIGHT_RED)
+            raise typer.Exit(1)
+        print(report(analysis))
+        problem = over_budget(analysis, parse_size(budget)) if budget else None
+        if problem:
+            typer.secho(problem, fg=typer.colors.BRIGHT_RED)
+            raise typer.Exit(1)
+
+
+MirrorOption = Annotated[Path, typer.Option(
+    help="Mirror database file, by default one for each library url in the user cache",
+    envvar='GODOT_ASSET_LIB_MIRROR',
+)]
+
+def _mirror(mirror, library_url):
+    from .api import default_base
+    from .mirror import Mirror, default_path
+    return Mirror(mirror or default_path(library_url or default_base))
+
+@app.command()
+def sync(
+    jobs: Annotated[int, typer.Option(
+        min=1,
+        help="Pages and assets fetched concurrently",
+    )] = 4,
+    full: Annotated[bool, typer.Option(
+        help="Fetch every asset again, not just the ones modified since the last sync",
+    )] = False,
+    details: Annotated[bool, typer.Option(
+        help="Fetch the full asset data, not just the listing fields",
+    )] = True,
+    mirror: MirrorOption = None,
+    library_url: LibraryUrlOption = None,
+    timeout: TimeoutOption = 60,
+    retries: RetriesOption = 4,
+    rate_limit: RateLimitOption = 0,
+    timings: TimingsOption = False,
+    trace_file: TraceFileOption = None,
+):
+    """Updates the local mirror of the library catalogue"""
+    with _tracing(timings, trace_file):
+        api = _api(
+            pool_maxsize=2*jobs,
+            library_url=library_url,
+            timeout=timeout,
+            retries=retries,
+            rate_limit=rate_limit,
+        )
+        with _mirror(mirror, library_url) as db:
+            result = db.sync(api, jobs=jobs, full=full, details=details)
+        print(f"Fetched {result['pages']} pages, "
+            f"updated {result['updated']} assets, "
+            f"{result['total']} mirrored")
+
+@app.command()
+def search(
+    text: Annotated[str, typer.Argument(help="Text in the title")] = None,
+    category: Annotated[int, typer.Option(help="Category id")] = None,
+    godot_version: Annotated[str, typer.Option(help="Godot version prefix, ie. 4 or 4.3")] = None,
+    author: Annotated[str, typer.Option()] = None,
+    limit: Annotated[int, typer.Option()] = 20,
+    mirror: MirrorOption = None,
+    library_url: LibraryUrlOption = None,
+    output: OutputOption = Output.text,
+):
+    """Searches assets in the local mirror (see sync)"""
+    from .utils import table
+    with _mirror(mirror, library_url) as db:
+        assets = db.search(text,
+            category=category,
+            godot_version=godot_version,
+            author=author,
+            limit=limit,
         )
-        resource = f'asset/edit/{config.edit_id}'
-        edited_previews = api.asset_edit_previews(config.edit_id)
-
-    json = {
-        "title": config.project_name,
-        "description": config.description,
-        "category_id": config.category,
-        "godot_version": config.godot_version,
-        "version_string": config.project_version,
-        "cost": config.project_license,
-        "download_provider": config.repo_hosting,
-        "download_commit": config.git_hash,
-        "download_hash": "", # deprecated
-        "browse_url": config.repo_url,
-        "issues_url": config.issues_url,
-        "icon_url": f"{config.repo_raw}/icon.svg",
-        "previews": previews,
-    }
-
-    # TODO: previews not working yet
-    if not send_previews:
-        json['previews'] = []
-
-    print(f"POST DATA to {api.base}{resource}:\n{pretty(json)}")
-
-    if not do:
-        typer.secho("NOTHING DONE, DRY RUN", fg=typer.colors.BRIGHT_RED)
-        print("Check the output and use --do option to actually upload")
+    if output != Output.text:
+        _print_records(assets, output)
         return
+    columns = ['asset_id', 'title', 'author', 'version_string', 'godot_version', 'modify_date']
+    print(table([[asset[column] for column in columns] for asset in assets],
+        ['asset', 'title', 'author', 'version', 'godot', 'modified']))
 
-    result = api.post(resource, json=json)
-    print("RESULT:",
-        pretty(result))
-    print(f"Check at {api.base}/{result['url']}")
+@app.command()
+def show(
+    asset_id: Annotated[str, typer.Argument()],
+    mirror: MirrorOption = None,
+    library_url: LibraryUrlOption = None,
+    output: OutputOption = Output.text,
+):
+    """Shows an asset from the local mirror (see sync)"""
+    from .utils import pretty
+    with _mirror(mirror, library_url) as db:
+        asset = db.show(asset_id)
+    if asset is None:
+        typer.secho(f"Asset {asset_id} not in the mirror, try to sync it", fg=typer.colors.BRIGHT_RED)
+        raise typer.Exit(1)
+    if output != Output.text:
+        _print_records([asset], output)
+        return
+    print(pretty(asset))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,16 @@
+import unittest
+import subprocess
+import sys
+
+class Cli_Test(unittest.TestCase):
+
+    def imported_modules(self, code):
+        output = subprocess.check_output([sys.executable, '-c',
+            f"import sys; {code}; print(' '.join(sys.modules))"
+        ]).decode()
+        return output.split()
+
+    def test_startup__no_heavy_imports(self):
+        modules = self.imported_modules('import godot_asset_library_client.cli')
+        for heavy in ['requests', 'yaml', 'pygments', 'dotenv']:
+            self.assertNotIn(heavy, modules)
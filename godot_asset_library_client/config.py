@@ -1,46 +1,64 @@
+import hashlib
+import json
+import threading
+import time
 from pathlib import Path
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
+from functools import cached_property
 from .godot_project_reader import project_field
 from . import git
+from . import git_reader
+from . import tracing
+from .catalogue import InvalidMetadata
+from .utils import cache_dir, file_signature, read_json, write_json_atomic
 import yaml
-import re
-
-emoji_pattern = re.compile(
-    "["
-    "\U0001F600-\U0001F64F"
-    "\U0001F300-\U0001F5FF"
-    "\U0001F680-\U0001F6FF"
-    "\U0001F700-\U0001F77F"
-    "\U0001F780-\U0001F7FF"
-    "\U0001F800-\U0001F8FF"
-    "\U0001F900-\U0001F9FF"
-    "\U0001FA00-\U0001FA6F"
-    "\U0001FA70-\U0001FAFF"
-    "\u2600-\u26FF"
-    "\u2700-\u27BF"
-    "]+", flags=re.UNICODE)
-
-def remove_emojis(text):
-    return emoji_pattern.sub(r'', text)
-
-def remove_md_image_lines(description: str) -> str:
-    return '\n'.join((
-        line for line in description.splitlines()
-        if not line.startswith("![")
-    ))
+# Kept importable from here
+from .description import emoji_pattern, remove_emojis, remove_md_image_lines
+from .description import build_description, process_file, process_content
+
+def git_field(fact, at_revision=None, *args, **kwds):
+    """
+    A field that will be obtained from the git repository
+    at the project root if not provided in config.
+    For configs with a revision, at_revision(root, revision)
+    obtains it instead, if given.
+    """
+    def resolve(root='.', revision=None):
+        if revision and at_revision:
+            return at_revision(root, revision)
+        return fact(root)
+    return field(*args, default=None, metadata=dict(resolve=resolve, source='git'), **kwds)
 
 @dataclass
 class Config:
     asset_id: str
-    category: int # = "1" # 2D Tools
+    category: int | str # id or name, ie. 1 or "2D Tools", see catalogue
     project_license: str
     previews: list[dict] = field(default_factory=list)
     description_files: list[str] = field(default_factory=list)
+    # Markdown sections of the description files to keep, all if empty
+    description_sections: list[str] = field(default_factory=list)
+    # Truncates longer descriptions
+    description_max_length: int = None
+    # Repository directory to generate missing preview thumbnails into
+    thumbnails_dir: str = None
+    # Maximum width and height of generated thumbnails
+    thumbnail_size: int = 480
+    # Maximum size of the downloaded archive, ie. 5MB, checked before uploading
+    archive_budget: str = None
+    # Directory with project.godot. Inferred fields and files are relative to it.
+    root: str = '.'
+    # Branch whose commit the project and description files are read from,
+    # without checking it out, instead of the working tree
+    revision: str = None
+    # Branches to publish, each a dict with its branch and the keys it overrides,
+    # see upload.expand_targets
+    targets: list[dict] = field(default_factory=list)
 
-    repo: str = field(default_factory=git.repo_name)
-    branch: str = field(default_factory=git.current_branch)
-    git_hash: str = field(default_factory=git.revision_hash)
-    repo_hosting: str = field(default_factory=git.repo_host)
+    repo: str = git_field(git.repo_name)
+    branch: str = git_field(git.current_branch, lambda root, revision: revision)
+    git_hash: str = git_field(git.revision_hash, git.commit_hash)
+    repo_hosting: str = git_field(git.repo_host)
 
     project_name: str = project_field('project_name')
     project_version: str = project_field('project_version')
@@ -48,33 +66,160 @@ class Config:
     godot_version: str = project_field('godot_version')
     icon: str = project_field('icon')
 
-    @property
+    def __post_init__(self):
+        # Inferred fields not given are resolved on first access, see __getattr__
+        for name in _resolvers:
+            if self.__dict__.get(name) is None:
+                del self.__dict__[name]
+
+    def __getattr__(self, name):
+        # Only called for attributes not found, ie. inferred fields not resolved yet
+        resolve = _resolvers.get(name)
+        if resolve is None:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        with tracing.span(name, 'config'):
+            if self.revision is None:
+                value = resolve(self.root)
+            elif _sources[name] == 'git':
+                value = resolve(self.root, self.revision)
+            else:
+                # Read at the commit, unlike the branch, immutable
+                value = resolve(self.root, self.git_hash)
+        self.__dict__[name] = value
+        return value
+
+    def resolved(self):
+        """Inferred field values resolved so far"""
+        return {name: self.__dict__[name] for name in _resolvers if name in self.__dict__}
+
+    @cached_property
+    def provider(self):
+        return git.provider(self)
+
+    @cached_property
     def repo_url(self):
-        return git.browse_url_base(self)
+        return self.provider.browse_url
 
-    @property
+    @cached_property
     def repo_raw(self):
-        return git.raw_url_base(self)
+        return self.provider.raw_url
 
-    @property
+    @cached_property
     def issues_url(self):
-        return git.issues_url(self)
+        return self.provider.issues_url
 
     @property
     def description(self):
-        # TODO: Put some order here
-        description = '\n'.join((
-            Path(f).read_text() for f in self.description_files
-        ))
-        description = remove_md_image_lines(description) # markdown is not redered and they look awful
-        description = remove_emojis(description)
+        if self.revision is None:
+            files = [Path(self.root)/f for f in self.description_files]
+            process = process_file
+        else:
+            files = self._committed_files(self.description_files)
+            process = process_content
+        description = build_description(files,
+            sections=self.description_sections,
+            max_length=self.description_max_length,
+            process=process,
+        )
         if not description:
             description = self.config_description
         return description
 
+    def _committed_files(self, paths):
+        """Contents of the files, relative to the root, at the commit"""
+        blobs = git.read_blobs(self.root, self.git_hash, [f'./{path}' for path in paths])
+        contents = []
+        for path in paths:
+            content = blobs[f'./{path}']
+            if content is None:
+                raise FileNotFoundError(f"{path} not found at {self.git_hash[:8]}")
+            contents.append(content)
+        return contents
+
+    @staticmethod
+    def load_yaml(filename):
+        """Metadata in the file, raising InvalidMetadata if it is not valid yaml"""
+        with tracing.span('load', 'config', file=str(filename)):
+            try:
+                return yaml.safe_load(Path(filename).read_text())
+            except yaml.YAMLError as e:
+                raise InvalidMetadata(f"{filename}: {e}")
+
     @classmethod
-    def from_file(cls, filename):
-        config_yaml = yaml.safe_load(Path(filename).read_text())
+    def from_file(cls, filename, root=None):
+        config_yaml = cls.load_yaml(filename)
+        if root is not None:
+            config_yaml.setdefault('root', str(root))
         return cls(**config_yaml)
 
+# Resolvers of the inferred fields
+_resolvers = {
+    f.name: f.metadata['resolve']
+    for f in fields(Config)
+    if f.metadata.get('resolve')
+}
+
+_sources = {
+    f.name: f.metadata['source']
+    for f in fields(Config)
+    if f.metadata.get('resolve')
+}
+
+# Without class level defaults, unresolved fields reach __getattr__
+for _name in _resolvers:
+    delattr(Config, _name)
+
+
+class ConfigCache:
+    """
+    On disk cache of the inferred config values, keyed by their sources:
+    the metadata content, and the modification of project.godot
+    and of the git HEAD, refs and config files.
+    While those are unchanged, configs are built without reading
+    the project nor the repository.
+    """
+
+    max_entries = 256
+
+    def __init__(self, path=None):
+        self.path = Path(path or cache_dir()/'configs.json')
+        self._lock = threading.Lock() # concurrent uploads store too
+
+    def key(self, metadata):
+        root = Path(metadata.get('root', '.')).absolute()
+        files = [root/'project.godot'] + git_reader.metadata_files(root, metadata.get('revision'))
+        sources = dict(
+            metadata=metadata,
+            root=str(root),
+            files=[[str(path), file_signature(path)] for path in files],
+        )
+        return hashlib.sha256(json.dumps(sources, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _load(self):
+        return read_json(self.path, {})
+
+    def _save(self, entries):
+        write_json_atomic(self.path, entries)
+
+    def _store(self, key, values):
+        with self._lock:
+            entries = self._load()
+            entries[key] = dict(values=values, stored_at=time.time())
+            if len(entries) > self.max_entries:
+                oldest = sorted(entries, key=lambda k: entries[k]['stored_at'])
+                for expired in oldest[:len(entries) - self.max_entries]:
+                    del entries[expired]
+            self._save(entries)
+
+    def config(self, metadata):
+        """Config for the metadata, fully resolved, from the cache if possible"""
+        with tracing.span('cache', 'config') as span:
+            key = self.key(metadata)
+            entry = self._load().get(key)
+            span.set(hit=entry is not None)
+        if entry is not None:
+            return Config(**dict(entry['values'], **metadata))
+        config = Config(**metadata)
+        self._store(key, {name: getattr(config, name) for name in _resolvers})
+        return config
 
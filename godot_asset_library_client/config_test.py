@@ -0,0 +1,167 @@
+import json
+import unittest
+from pathlib import Path
+from . import git_reader
+from . import tracing
+from .config import Config, ConfigCache
+from .testutils import sandbox_dir, GitRepository
+
+project_godot = """\
+[application]
+
+config/name="My Asset"
+config/version="{version}"
+config/features=PackedStringArray("4.3")
+"""
+
+metadata = dict(
+    asset_id='1',
+    category=1,
+    project_license='MIT',
+)
+
+class Config_Test(GitRepository, unittest.TestCase):
+
+    def setUp(self):
+        git_reader.clear_cache()
+        self.addCleanup(git_reader.clear_cache)
+        self.sandbox = self.enterContext(sandbox_dir())
+        Path('project.godot').write_text(project_godot.format(version='1.0'))
+        self.init_repo(origin='https://github.com/me/asset.git')
+        self.commit(message='init')
+        tracing.enable()
+        self.addCleanup(tracing.disable)
+
+    def resolved_fields(self):
+        """Names of the fields resolved since the last call"""
+        names = [
+            event['name'] for event in tracing.events()
+            if event['category'] == 'config' and event['name'] != 'cache'
+        ]
+        tracing.enable()
+        return names
+
+    def test_lazy__nothing_resolved_on_creation(self):
+        Config(**metadata)
+        self.assertEqual(self.resolved_fields(), [])
+
+    def test_lazy__resolved_on_first_access(self):
+        config = Config(**metadata)
+        self.assertEqual(config.project_version, '1.0')
+        self.assertEqual(config.project_version, '1.0')
+        self.assertEqual(self.resolved_fields(), ['project_version'])
+        self.assertEqual(config.resolved(), dict(project_version='1.0'))
+
+    def test_lazy__given_values_not_resolved(self):
+        config = Config(**metadata, project_version='2.0', branch='release')
+        self.assertEqual((config.project_version, config.branch), ('2.0', 'release'))
+        self.assertEqual(self.resolved_fields(), [])
+
+    def test_lazy__unknown_attribute(self):
+        with self.assertRaises(AttributeError):
+            Config(**metadata).unknown
+
+    def test_urls__provider_built_once(self):
+        config = Config(**metadata)
+        self.assertEqual(config.repo_url, 'https://github.com/me/asset')
+        self.assertEqual(config.repo_raw, 'https://raw.githubusercontent.com/me/asset/refs/heads/main')
+        self.assertEqual(config.issues_url, 'https://github.com/me/asset/issues')
+        self.assertIs(config.provider, config.provider)
+
+    def branch(self, name, version, readme):
+        """Commits a branch with its own project version and readme, back to main"""
+        self.git('add', 'project.godot')
+        self.git('commit', '-q', '--allow-empty', '-m', 'main')
+        self.git('checkout', '-q', '-B', name)
+        Path('project.godot').write_text(project_godot.format(version=version))
+        Path('README.md').write_text(readme)
+        self.git('add', 'project.godot', 'README.md')
+        self.git('commit', '-q', '-m', name)
+        self.git('checkout', '-q', 'main')
+        git_reader.clear_cache() # memoised within the process
+        return self.git('rev-parse', name)
+
+    def test_revision__read_from_branch_without_checkout(self):
+        commit = self.branch('godot3', '0.9', '# Old\n')
+        config = Config(**metadata, revision='godot3', description_files=['README.md'])
+        self.assertEqual(config.git_hash, commit)
+        self.assertEqual(config.branch, 'godot3')
+        self.assertEqual(config.project_version, '0.9')
+        self.assertEqual(config.description, '# Old')
+        self.assertEqual(self.git('branch', '--show-current'), 'main')
+        self.assertEqual(Config(**metadata).project_version, '1.0')
+
+    def test_revision__missing_description_file(self):
+        self.branch('godot3', '0.9', '# Old\n')
+        config = Config(**metadata, revision='godot3', description_files=['CHANGES.md'])
+        with self.assertRaises(FileNotFoundError):
+            config.description
+
+    def test_cache__revision_branch_moved_misses(self):
+        cache = ConfigCache(self.sandbox/'configs.json')
+        self.branch('godot3', '0.9', '')
+        self.cached(cache, revision='godot3')
+        self.branch('godot3', '0.9.1', '')
+        config, hit = self.cached(cache, revision='godot3')
+        self.assertFalse(hit)
+        self.assertEqual(config.project_version, '0.9.1')
+
+    def cached(self, cache, **extra):
+        config = cache.config(dict(metadata, root=str(self.sandbox), **extra))
+        hits = [
+            event['args']['hit'] for event in tracing.events()
+            if event['name'] == 'cache'
+        ]
+        return config, hits[-1]
+
+    def test_cache__hit_resolves_nothing(self):
+        cache = ConfigCache(self.sandbox/'configs.json')
+        first, hit = self.cached(cache)
+        self.assertFalse(hit)
+        self.assertEqual(sorted(self.resolved_fields()), sorted(first.resolved()))
+        second, hit = self.cached(cache)
+        self.assertTrue(hit)
+        self.assertEqual(self.resolved_fields(), [])
+        self.assertEqual(second, first)
+
+    def test_cache__project_change_misses(self):
+        cache = ConfigCache(self.sandbox/'configs.json')
+        self.cached(cache)
+        Path('project.godot').write_text(project_godot.format(version='1.1.0'))
+        config, hit = self.cached(cache)
+        self.assertFalse(hit)
+        self.assertEqual(config.project_version, '1.1.0')
+
+    def test_cache__new_commit_misses(self):
+        cache = ConfigCache(self.sandbox/'configs.json')
+        self.cached(cache)
+        self.git('commit', '-q', '--allow-empty', '-m', 'second')
+        git_reader.clear_cache() # memoised within the process
+        config, hit = self.cached(cache)
+        self.assertFalse(hit)
+        self.assertEqual(config.git_hash, self.git('rev-parse', 'HEAD'))
+
+    def test_cache__branch_change_misses(self):
+        cache = ConfigCache(self.sandbox/'configs.json')
+        self.cached(cache)
+        self.git('checkout', '-q', '-b', 'master')
+        git_reader.clear_cache() # memoised within the process
+        config, hit = self.cached(cache)
+        self.assertFalse(hit)
+        self.assertEqual(config.branch, 'master')
+
+    def test_cache__metadata_change_misses(self):
+        cache = ConfigCache(self.sandbox/'configs.json')
+        self.cached(cache)
+        config, hit = self.cached(cache, project_version='3.0')
+        self.assertFalse(hit)
+        self.assertEqual(config.project_version, '3.0')
+
+    def test_cache__bounded(self):
+        cache = ConfigCache(self.sandbox/'configs.json')
+        cache.max_entries = 2
+        for version in '123':
+            self.cached(cache, project_version=version)
+        self.assertEqual(len(json.loads((self.sandbox/'configs.json').read_text())), 2)
+        config, hit = self.cached(cache, project_version='1')
+        self.assertFalse(hit)
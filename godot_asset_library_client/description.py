@@ -0,0 +1,186 @@
+"""
+Asset description from the description files,
+processed line by line in a single pass,
+and cached by file content.
+"""
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from . import tracing
+
+emoji_pattern = re.compile(
+    "["
+    "\U0001F600-\U0001F64F"
+    "\U0001F300-\U0001F5FF"
+    "\U0001F680-\U0001F6FF"
+    "\U0001F700-\U0001F77F"
+    "\U0001F780-\U0001F7FF"
+    "\U0001F800-\U0001F8FF"
+    "\U0001F900-\U0001F9FF"
+    "\U0001FA00-\U0001FA6F"
+    "\U0001FA70-\U0001FAFF"
+    "\u2600-\u26FF"
+    "\u2700-\u27BF"
+    "]+", flags=re.UNICODE)
+
+def remove_emojis(text):
+    return emoji_pattern.sub(r'', text)
+
+def remove_md_image_lines(description: str) -> str:
+    return '\n'.join((
+        line for line in description.splitlines()
+        if not line.startswith("![")
+    ))
+
+# Line steps: generators taking and yielding lines
+
+def drop_image_lines(lines):
+    """Markdown is not rendered and image lines look awful"""
+    for line in lines:
+        if not line.startswith("!["):
+            yield line
+
+def strip_emojis(lines):
+    for line in lines:
+        # Most lines are ascii, saving the regex
+        yield line if line.isascii() else emoji_pattern.sub('', line)
+
+_heading_re = re.compile(r'^(#{1,6})\s+(.*?)\s*#*\s*$')
+
+def select_sections(lines, sections):
+    """
+    Keeps just the markdown sections whose title is in sections
+    (case insensitive), including their subsections.
+
+    >>> list(select_sections(['# A', 'a', '## B', 'b', '# C', 'c'], ['b']))
+    ['## B', 'b']
+    >>> list(select_sections(['# A', 'a', '## B', 'b', '# C', 'c'], ['A']))
+    ['# A', 'a', '## B', 'b']
+    """
+    wanted = {section.lower() for section in sections}
+    level = None # of the selected section being kept
+    for line in lines:
+        heading = _heading_re.match(line)
+        if heading:
+            depth = len(heading.group(1))
+            if level is not None and depth <= level:
+                level = None
+            if level is None and heading.group(2).lower() in wanted:
+                level = depth
+        if level is not None:
+            yield line
+
+def truncate(lines, max_length):
+    """
+    Stops at the last whole line fitting in max_length characters,
+    counting the line breaks.
+
+    >>> list(truncate(['12', '45', '78'], 6))
+    ['12', '45']
+    >>> list(truncate(['123456'], 4))
+    ['1234']
+    """
+    length = 0
+    for line in lines:
+        needed = len(line) + (1 if length else 0)
+        if length + needed > max_length:
+            if not length:
+                yield line[:max_length]
+            return
+        length += needed
+        yield line
+
+def file_steps(sections=None):
+    """Steps applied to each file"""
+    steps = [drop_image_lines, strip_emojis]
+    if sections:
+        sections = tuple(sections)
+        steps.append(lambda lines: select_sections(lines, sections))
+    return steps
+
+def run(lines, steps):
+    for step in steps:
+        lines = step(lines)
+    return lines
+
+class ProcessedCache:
+    """
+    Processed lines, keyed by the file content digest and the options,
+    and by the file path and stat signature, as a shortcut.
+    """
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            return self._entries.get(key)
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+cache = ProcessedCache()
+
+def process_file(path, sections=None):
+    """
+    Processed lines of the file, and whether it ends in a line break.
+    Files with the same content are processed once,
+    and unmodified files (same modification time and size) are not even read.
+    """
+    sections = tuple(sections or ())
+    stat = os.stat(path)
+    signature = str(path), stat.st_mtime_ns, stat.st_size, sections
+    cached = cache.get(signature)
+    if cached:
+        return cached
+    cached = process_content(Path(path).read_bytes(), sections, name=str(path))
+    cache.put(signature, cached)
+    return cached
+
+def process_content(content, sections=None, name='content'):
+    """Processed lines of a file content, and whether it ends in a line break"""
+    sections = tuple(sections or ())
+    key = hashlib.sha256(content).hexdigest(), sections
+    cached = cache.get(key)
+    if not cached:
+        with tracing.span(name, 'description', bytes=len(content)):
+            text = content.decode('utf8')
+            lines = tuple(run(text.splitlines(), file_steps(sections)))
+        cached = lines, text.endswith(('\n', '\r'))
+        cache.put(key, cached)
+    return cached
+
+def description_lines(paths, sections=None, process=process_file):
+    """
+    Lines of the processed files, in order.
+    As when files were concatenated with a line break,
+    a file ending with a line break leaves an empty line before the next.
+    Files are paths, or contents if process is process_content.
+    """
+    for i, path in enumerate(paths):
+        lines, ends_with_break = process(path, sections)
+        yield from lines
+        if ends_with_break and i < len(paths) - 1:
+            yield ''
+
+def build_description(paths, sections=None, max_length=None, process=process_file):
+    """Description text from the description files"""
+    lines = description_lines(list(paths), sections, process)
+    if max_length:
+        lines = truncate(lines, max_length)
+    return '\n'.join(lines)
@@ -0,0 +1,83 @@
+import os
+import unittest
+from pathlib import Path
+from . import tracing
+from . import description
+from .description import build_description, remove_emojis, remove_md_image_lines
+from .testutils import sandbox_dir
+
+def legacy_description(paths):
+    """Former implementation: concatenate, then filter the whole text"""
+    text = '\n'.join(Path(path).read_text() for path in paths)
+    return remove_emojis(remove_md_image_lines(text))
+
+class Description_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.enterContext(sandbox_dir())
+        description.cache.clear()
+        self.addCleanup(description.cache.clear)
+
+    def write(self, filename, content):
+        Path(filename).write_text(content)
+        return filename
+
+    def test_drops_image_lines_and_emojis(self):
+        self.write('README.md', 'Title 🚀\n![screenshot](a.png)\nText ✨ here\n')
+        self.assertEqual(build_description(['README.md']), 'Title \nText  here')
+
+    def test_same_as_concatenating(self):
+        files = [
+            self.write('a.md', 'A1\nA2\n'),
+            self.write('b.md', 'B1\n![img](b.png)'),
+            self.write('c.md', 'C1 🎮\r\nC2\n\n'),
+        ]
+        self.assertEqual(build_description(files), legacy_description(files))
+
+    def test_no_files(self):
+        self.assertEqual(build_description([]), '')
+
+    def test_sections(self):
+        self.write('README.md',
+            '# Tool\n'
+            'Intro\n'
+            '## Features\n'
+            'Many\n'
+            '### Detail\n'
+            'More\n'
+            '## Install\n'
+            'Steps\n'
+        )
+        self.assertEqual(build_description(['README.md'], sections=['features']),
+            '## Features\nMany\n### Detail\nMore')
+
+    def test_max_length(self):
+        self.write('README.md', 'Line one\nLine two\nLine three\n')
+        self.assertEqual(build_description(['README.md'], max_length=17), 'Line one\nLine two')
+
+    def test_cached_by_content(self):
+        self.write('a.md', 'Same content\n')
+        self.write('b.md', 'Same content\n')
+        tracing.enable()
+        self.addCleanup(tracing.disable)
+        build_description(['a.md'])
+        build_description(['b.md'])
+        build_description(['a.md'])
+        self.assertEqual(len(tracing.events()), 1)
+
+    def test_cache__content_change_reprocessed(self):
+        self.write('a.md', 'Old\n')
+        self.assertEqual(build_description(['a.md']), 'Old')
+        self.write('a.md', 'New\n')
+        self.assertEqual(build_description(['a.md']), 'New')
+
+    def test_unmodified_file_not_read(self):
+        self.write('README.md', 'First\n')
+        build_description(['README.md'])
+        stat = os.stat('README.md')
+        self.write('README.md', 'Other\n')
+        os.utime('README.md', ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        # Same size and modification time, taken as unmodified
+        self.assertEqual(build_description(['README.md']), 'First')
+        os.utime('README.md', ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+        self.assertEqual(build_description(['README.md']), 'Other')
@@ -0,0 +1,325 @@
+"""
+In-process stand-in for the Godot Asset Library API,
+to exercise the client, and measure it, without the real library.
+
+    with FakeLibraryServer(latency=0.01) as server:
+        server.library.add_asset(asset_id='1', title='My Asset')
+        api = Api(server.base)
+        api.login('user', 'password')
+        api.asset('1')
+
+Faults can be injected: latency on every request,
+failures for the requests matching a pattern,
+and a rate limit answering 429 with Retry-After.
+"""
+import json
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl
+from .tracing import url_template
+
+class FakeLibrary:
+    """State of the stand-in library: users, tokens, assets and edits"""
+
+    page_length = 10
+
+    # id, name, type (0 addons, 1 projects) as in the library
+    categories = [
+        ('1', '2D Tools', '0'),
+        ('2', '3D Tools', '0'),
+        ('3', 'Shaders', '0'),
+        ('4', 'Materials', '0'),
+        ('5', 'Tools', '0'),
+        ('6', 'Scripts', '0'),
+        ('7', 'Misc', '0'),
+        ('8', 'Templates', '1'),
+        ('9', 'Projects', '1'),
+        ('10', 'Demos', '1'),
+    ]
+
+    def __init__(self, users=None):
+        self.users = users or dict(user='password')
+        self.tokens = {}
+        self.assets = {}
+        self.edits = {}
+        self._last_edit_id = 0
+        self._lock = threading.Lock()
+
+    def add_asset(self, asset_id, **fields):
+        asset = dict(
+            asset_id=str(asset_id),
+            title=f'Asset {asset_id}',
+            author='user',
+            description='',
+            category_id='1',
+            godot_version='4.3',
+            version_string='1.0.0',
+            cost='MIT',
+            download_provider='GitHub',
+            download_commit='',
+            browse_url='',
+            issues_url='',
+            icon_url='',
+            modify_date=time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime()),
+            previews=[],
+        )
+        asset.update(fields)
+        self.assets[str(asset_id)] = asset
+        return asset
+
+    def add_edit(self, asset_id, status='new', **fields):
+        with self._lock:
+            self._last_edit_id += 1
+            edit_id = str(self._last_edit_id)
+        edit = dict(
+            edit_id=edit_id,
+            asset_id=str(asset_id),
+            status=status,
+            version_string=None,
+            previews=[],
+        )
+        edit.update(fields)
+        self.edits[edit_id] = edit
+        return edit
+
+    def page(self, items, params):
+        """Paginated listing like the library ones"""
+        page = int(params.get('page', 0))
+        page_length = int(params.get('max_results', self.page_length))
+        pages = max(1, -(-len(items) // page_length))
+        return dict(
+            result=items[page*page_length:(page+1)*page_length],
+            page=page,
+            pages=pages,
+            page_length=page_length,
+            total_items=len(items),
+        )
+
+    # Request handlers: (status, body)
+
+    def login(self, params, body):
+        username = body.get('username')
+        if username not in self.users or self.users[username] != body.get('password'):
+            return 403, dict(error="Invalid credentials")
+        token = f'token-{username}-{len(self.tokens)}'
+        self.tokens[token] = username
+        return 200, dict(authenticated=True, username=username, token=token)
+
+    def configure(self, params, body):
+        kind = dict(addon='0', project='1').get(params.get('type'))
+        return 200, dict(categories=[
+            dict(id=id, name=name, type=type)
+            for id, name, type in self.categories
+            if kind is None or type == kind
+        ])
+
+    listed_fields = [
+        'asset_id', 'title', 'author', 'category_id', 'godot_version',
+        'version_string', 'cost', 'icon_url', 'modify_date',
+    ]
+
+    def list_assets(self, params, body):
+        text = params.get('filter', '').lower()
+        assets = [
+            {key: asset[key] for key in self.listed_fields}
+            for asset in self.assets.values()
+            if text in asset['title'].lower()
+        ]
+        if params.get('sort') == 'updated':
+            assets.sort(key=lambda asset: asset['modify_date'], reverse=True)
+        return 200, self.page(assets, params)
+
+    def get_asset(self, params, body, asset_id):
+        if asset_id not in self.assets:
+            return 404, dict(error="Couldn't find asset")
+        return 200, self.assets[asset_id]
+
+    def list_edits(self, params, body):
+        # Like the library, version_string is not a filter
+        edits = [
+            edit for edit in self.edits.values()
+            if ('asset' not in params or edit['asset_id'] == params['asset'])
+            and ('status' not in params or edit['status'] in params['status'].split())
+        ]
+        edits.sort(key=lambda edit: -int(edit['edit_id']))
+        return 200, self.page(edits, params)
+
+    def get_edit(self, params, body, edit_id):
+        if edit_id not in self.edits:
+            return 404, dict(error="Couldn't find edit")
+        return 200, self.edits[edit_id]
+
+    def _edit_fields(self, body):
+        return {key: value for key, value in body.items() if key != 'token'}
+
+    def post_asset(self, params, body, asset_id):
+        if asset_id not in self.assets:
+            return 404, dict(error="Couldn't find asset")
+        edit = self.add_edit(asset_id, **self._edit_fields(body))
+        return 200, dict(id=edit['edit_id'], url=f"asset/edit/{edit['edit_id']}")
+
+    def post_edit(self, params, body, edit_id):
+        edit = self.edits.get(edit_id)
+        if not edit:
+            return 404, dict(error="Couldn't find edit")
+        if edit['status'] != 'new':
+            return 403, dict(error="Edit is not pending")
+        edit.update(self._edit_fields(body))
+        return 200, dict(id=edit_id, url=f"asset/edit/{edit_id}")
+
+    routes = [
+        # method, path, handler, requires token
+        ('POST', r'login', 'login', False),
+        ('GET', r'configure', 'configure', False),
+        ('GET', r'asset', 'list_assets', False),
+        ('GET', r'asset/edit', 'list_edits', False),
+        ('GET', r'asset/edit/(\d+)', 'get_edit', False),
+        ('POST', r'asset/edit/(\d+)', 'post_edit', True),
+        ('GET', r'asset/([^/]+)', 'get_asset', False),
+        ('POST', r'asset/([^/]+)', 'post_asset', True),
+    ]
+
+    def handle(self, method, path, params, body):
+        for route_method, pattern, handler, authenticated in self.routes:
+            if route_method != method: continue
+            match = re.fullmatch(pattern, path)
+            if not match: continue
+            if authenticated and body.get('token') not in self.tokens:
+                return 403, dict(error="Invalid token")
+            return getattr(self, handler)(params, body, *match.groups())
+        return 404, dict(error=f"No such endpoint {method} {path}")
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1' # keep-alive
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.server.dispatch(self, 'GET')
+
+    def do_POST(self):
+        self.server.dispatch(self, 'POST')
+
+    def respond(self, status, body, headers={}):
+        content = json.dumps(body).encode('utf8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        for header, value in headers.items():
+            self.send_header(header, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeLibraryServer(ThreadingHTTPServer):
+    """
+    Serves a FakeLibrary on a local port, in a background thread.
+
+    - latency: seconds each request is delayed
+    - rate_limit: (requests, seconds) allowed, beyond that 429 is answered
+    """
+    daemon_threads = True
+
+    def __init__(self, library=None, latency=0., rate_limit=None, port=0):
+        super().__init__(('127.0.0.1', port), Handler)
+        self.library = library or FakeLibrary()
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.requests = []
+        self._failures = []
+        self._recent = []
+        self._lock = threading.Lock()
+
+    @property
+    def base(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}/api/'
+
+    def start(self):
+        # Short poll interval, so stopping it does not take half a second
+        self._thread = threading.Thread(target=self.serve_forever, args=(0.01,), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def fail(self, pattern='.*', status=500, times=1, method=None, headers={}):
+        """The next `times` requests whose path matches the pattern fail with status"""
+        self._failures.append(dict(
+            pattern=pattern,
+            status=status,
+            times=times,
+            method=method,
+            headers=headers,
+        ))
+
+    def counts(self):
+        """Requests received, grouped as 'METHOD url template'"""
+        return Counter(f'{method} {url_template(path)}' for method, path in self.requests)
+
+    def reset_counts(self):
+        self.requests.clear()
+
+    def _injected_failure(self, method, path):
+        with self._lock:
+            for failure in self._failures:
+                if failure['method'] not in (None, method): continue
+                if not re.fullmatch(failure['pattern'], path): continue
+                failure['times'] -= 1
+                if not failure['times']:
+                    self._failures.remove(failure)
+                return failure
+
+    def _rate_limited(self):
+        """Seconds to wait if the request exceeds the rate limit, else None"""
+        if not self.rate_limit:
+            return None
+        limit, period = self.rate_limit
+        now = time.monotonic()
+        with self._lock:
+            self._recent = [t for t in self._recent if now - t < period]
+            if len(self._recent) >= limit:
+                return period - (now - self._recent[0])
+            self._recent.append(now)
+
+    def dispatch(self, handler, method):
+        url = urlsplit(handler.path)
+        path = re.sub('/+', '/', url.path).removeprefix('/api/').strip('/')
+        params = dict(parse_qsl(url.query))
+        length = int(handler.headers.get('Content-Length') or 0)
+        content = handler.rfile.read(length) if length else b''
+        body = json.loads(content) if content else {}
+        self.requests.append((method, path))
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        retry_after = self._rate_limited()
+        if retry_after is not None:
+            return handler.respond(429, dict(error="Too many requests"),
+                {'Retry-After': str(max(1, round(retry_after)))})
+
+        failure = self._injected_failure(method, path)
+        if failure:
+            return handler.respond(failure['status'], dict(error="Injected failure"),
+                failure['headers'])
+
+        try:
+            status, result = self.library.handle(method, path, params, body)
+        except Exception as e:
+            status, result = 500, dict(error=f"{type(e).__name__}: {e}")
+        handler.respond(status, result)
@@ -0,0 +1,246 @@
+import unittest
+import contextlib
+import io
+import json
+import time
+from pathlib import Path
+import requests
+from . import git_reader
+from .api import Api
+from .fakeserver import FakeLibraryServer
+from .scheduler import Scheduler
+from .testutils import LibraryProject
+
+class FakeLibraryServer_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.enterContext(contextlib.redirect_stdout(io.StringIO()))
+        self.server = self.enterContext(FakeLibraryServer())
+        self.library = self.server.library
+        self.library.add_asset('1', title='My Asset', version_string='1.0')
+        # No retries, to see the server answers
+        self.api = self.enterContext(Api(self.server.base, scheduler=Scheduler(retries=0)))
+
+    def test_login(self):
+        self.api.login('user', 'password')
+        self.assertIn(self.api.token, self.library.tokens)
+
+    def test_login__bad_password(self):
+        with self.assertRaises(requests.HTTPError) as ctx:
+            self.api.login('user', 'bad')
+        self.assertEqual(ctx.exception.response.status_code, 403)
+
+    def test_asset(self):
+        self.assertEqual(self.api.asset('1')['title'], 'My Asset')
+
+    def test_asset__missing(self):
+        with self.assertRaises(requests.HTTPError) as ctx:
+            self.api.asset('2')
+        self.assertEqual(ctx.exception.response.status_code, 404)
+
+    def test_pending_version_edit(self):
+        self.library.add_edit('1', version_string='1.1')
+        edit = self.library.add_edit('1', version_string='1.2')
+        self.library.add_edit('1', version_string='1.2', status='rejected')
+        self.assertEqual(self.api.pending_version_edit('1', '1.2'), edit['edit_id'])
+        self.assertEqual(self.api.pending_version_edit('1', '1.3'), None)
+
+    def test_post__creates_edit(self):
+        self.api.login('user', 'password')
+        result = self.api.post('asset/1', json=dict(title='New title', version_string='1.1'))
+        edit = self.api.asset_edit(result['id'])
+        self.assertEqual(result['url'], f"asset/edit/{result['id']}")
+        self.assertEqual(edit['title'], 'New title')
+        self.assertEqual(edit['status'], 'new')
+        self.assertNotIn('token', edit)
+
+    def test_post__modifies_edit(self):
+        self.api.login('user', 'password')
+        edit = self.library.add_edit('1', version_string='1.1', title='Old')
+        self.api.post(f"asset/edit/{edit['edit_id']}", json=dict(title='New'))
+        self.assertEqual(self.library.edits[edit['edit_id']]['title'], 'New')
+
+    def test_post__without_token(self):
+        with self.assertRaises(requests.HTTPError) as ctx:
+            self.api.post('asset/1', json=dict(title='New title'))
+        self.assertEqual(ctx.exception.response.status_code, 403)
+
+    def test_edit_listing__paginated(self):
+        for i in range(12):
+            self.library.add_edit('1', version_string=f'1.{i}')
+        first = self.api.get('asset/edit', params=dict(asset='1'))
+        second = self.api.get('asset/edit', params=dict(asset='1', page=1))
+        self.assertEqual((first['pages'], first['total_items']), (2, 12))
+        self.assertEqual(len(first['result']) + len(second['result']), 12)
+
+    def test_fail(self):
+        self.server.fail('asset/1', status=503)
+        with self.assertRaises(requests.HTTPError) as ctx:
+            self.api.asset('1')
+        self.assertEqual(ctx.exception.response.status_code, 503)
+        self.assertEqual(self.api.asset('1')['title'], 'My Asset')
+
+    def test_rate_limit(self):
+        self.server.rate_limit = 2, 60
+        self.api.asset('1')
+        self.api.asset('1')
+        with self.assertRaises(requests.HTTPError) as ctx:
+            self.api.asset('1')
+        self.assertEqual(ctx.exception.response.status_code, 429)
+        self.assertEqual(ctx.exception.response.headers['Retry-After'], '60')
+
+    def test_latency(self):
+        self.server.latency = 0.05
+        start = time.perf_counter()
+        self.api.asset('1')
+        self.assertGreaterEqual(time.perf_counter() - start, 0.05)
+
+    def test_counts(self):
+        self.api.asset('1')
+        self.api.asset('1')
+        self.api.pending_version_edit('1', '1.0')
+        self.assertEqual(dict(self.server.counts()), {
+            'GET asset/{id}': 2,
+            'GET asset/edit': 1,
+        })
+
+
+class UploadCommand_Test(LibraryProject, unittest.TestCase):
+    """End to end upload against the fake library"""
+
+    def upload(self, *args, exit_code=0):
+        result = self.cli('upload', 'asset-metadata.yaml', *args)
+        self.assertEqual(result.exit_code, exit_code, result.output)
+        self.stderr = result.stderr
+        return result.stdout
+
+    def test_dry_run(self):
+        output = self.upload()
+        self.assertIn("NOTHING DONE, DRY RUN", output)
+        self.assertEqual(self.server.library.edits, {})
+
+    def test_license_unknown_to_the_client__warned(self):
+        Path('asset-metadata.yaml').write_text(
+            Path('asset-metadata.yaml').read_text().replace('MIT', 'WTFPL'))
+        self.upload('--do')
+        self.assertIn("WARNING: Unknown license 'WTFPL'", self.stderr)
+        [edit] = self.server.library.edits.values()
+        self.assertEqual(edit['cost'], 'WTFPL')
+
+    def test_categories_unavailable__name_rejected(self):
+        self.server.fail('configure', status=404, times=10)
+        Path('asset-metadata.yaml').write_text(
+            Path('asset-metadata.yaml').read_text().replace('category: 1', 'category: 2D Tools'))
+        output = self.upload('--do', exit_code=1)
+        self.assertIn("INVALID METADATA: Category '2D Tools' cannot be resolved", output)
+        self.assertEqual(self.server.library.edits, {})
+
+    def test_categories_unavailable__id_accepted(self):
+        self.server.fail('configure', status=404, times=10)
+        self.upload('--do')
+        self.assertIn("WARNING: Metadata not checked", self.stderr)
+        [edit] = self.server.library.edits.values()
+        self.assertEqual(edit['category_id'], 1)
+
+    def test_do(self):
+        self.upload('--do')
+        [edit] = self.server.library.edits.values()
+        self.assertEqual(edit['title'], 'My Asset')
+        self.assertEqual(edit['version_string'], '1.1')
+        self.assertEqual(edit['browse_url'], 'https://github.com/me/asset')
+
+    def test_do__pending_edit_modified(self):
+        self.upload('--do')
+        Path('asset-metadata.yaml').write_text(
+            'asset_id: 1\n'
+            'category: 2\n'
+            'project_license: MIT\n'
+        )
+        self.upload('--do')
+        [edit] = self.server.library.edits.values()
+        self.assertEqual(edit['category_id'], 2)
+
+    def test_do__unchanged_not_submitted(self):
+        self.upload('--do')
+        self.server.reset_counts()
+        output = self.upload('--do')
+        self.assertIn("NOTHING TO UPLOAD", output)
+        self.assertEqual(len(self.server.library.edits), 1)
+        self.assertNotIn('POST asset/edit/{id}', self.server.counts())
+
+    def test_do__broken_media_not_submitted(self):
+        with Path('asset-metadata.yaml').open('a') as f:
+            f.write('previews:\n- repoimage: screenshot.png\n')
+        output = self.upload('--do', exit_code=1)
+        self.assertIn("image screenshot.png: missing at", output)
+        self.assertEqual(self.server.library.edits, {})
+
+    def test_do__target_branches(self):
+        self.server.library.add_asset('2', title='My Asset for Godot 3')
+        with Path('asset-metadata.yaml').open('a') as f:
+            f.write('targets:\n- main\n- branch: godot3\n  asset_id: 2\n')
+        self.git('add', '.')
+        self.commit(message='project')
+        self.git('checkout', '-q', '-b', 'godot3')
+        self.commit({
+            'project.godot': Path('project.godot').read_text().replace('1.1', '0.9.1').replace('4.3', '3.6'),
+        }, message='godot 3')
+        self.git('checkout', '-q', 'main')
+        git_reader.clear_cache()
+        output = self.upload('--do', '--target', 'main', '--target', 'godot3')
+        self.assertIn("asset-metadata.yaml@godot3", output)
+        edits = sorted(
+            (edit['asset_id'], edit['version_string'], edit['godot_version'])
+            for edit in self.server.library.edits.values()
+        )
+        self.assertEqual(edits, [('1', '1.1', '4.3'), ('2', '0.9.1', '3.6')])
+
+    def test_target_branches__same_asset(self):
+        output = self.upload('--target', 'main', '--target', 'godot3', exit_code=1)
+        self.assertIn("INVALID METADATA: asset-metadata.yaml@main and asset-metadata.yaml@godot3"
+            " both upload asset 1", output)
+        self.assertEqual(self.server.library.edits, {})
+
+    def test_output_json(self):
+        output = self.upload('--do', '--output', 'json')
+        [record] = json.loads(output)
+        self.assertEqual(record['status'], 'submitted')
+        self.assertEqual(record['payload']['title'], 'My Asset')
+        self.assertEqual(record['result']['url'], 'asset/edit/1')
+        self.assertEqual(record['problems'], [])
+
+    def test_output_json__diagnostics_on_stderr(self):
+        self.git('remote', 'add', 'fork', 'https://github.com/other/asset.git')
+        output = self.upload('--do', '--output', 'json', '--timings')
+        [record] = json.loads(output)
+        self.assertEqual(record['status'], 'submitted')
+
+    def test_broken_yaml(self):
+        Path('asset-metadata.yaml').write_text('asset_id: [\n')
+        output = self.upload(exit_code=1)
+        self.assertIn("INVALID METADATA: asset-metadata.yaml:", output)
+
+    def test_output_json__invalid_category(self):
+        Path('asset-metadata.yaml').write_text(
+            Path('asset-metadata.yaml').read_text().replace('category: 1', 'category: Toolz'))
+        output = self.upload('--do', '--output', 'json', exit_code=1)
+        [record] = json.loads(output)
+        self.assertEqual(record['status'], 'failed')
+        self.assertIn("InvalidMetadata: Unknown category 'Toolz'", record['detail'])
+
+    def test_output_json__invalid_targets_on_stderr(self):
+        output = self.upload('--output', 'json', '--target', 'main', '--target', 'godot3', exit_code=1)
+        self.assertEqual(output, '')
+        self.assertIn("INVALID METADATA:", self.stderr)
+
+    def test_output_jsonl__targets(self):
+        self.server.library.add_asset('2')
+        with Path('asset-metadata.yaml').open('a') as f:
+            f.write('targets:\n- main\n- branch: stable\n  asset_id: 2\n')
+        self.git('add', '.')
+        self.commit(message='project')
+        self.git('branch', 'stable')
+        output = self.upload('--output', 'jsonl')
+        records = [json.loads(line) for line in output.splitlines()]
+        self.assertEqual([(record['asset_id'], record['status']) for record in records],
+            [(1, 'dry-run'), (2, 'dry-run')])
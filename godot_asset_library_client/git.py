@@ -1,5 +1,8 @@
 import subprocess
 import re
+import sys
+from . import git_reader
+from . import tracing
 
 class StandardGitHost:
 	"""
@@ -72,11 +75,33 @@ def browse_url_base(config):
 def issues_url(config):
 	return provider(config).issues_url
 
-def revision_hash() -> str:
-    return subprocess.check_output(['git', 'rev-parse', 'HEAD']).decode().strip()
+def _git(path, *args) -> str:
+	return subprocess.check_output(['git', *args], cwd=path).decode().strip()
 
-def current_branch() -> str:
-	branch = subprocess.check_output(['git', 'branch', '--show-current']).decode().strip()
+def _read(path, fact, *command) -> str:
+	"""
+	Obtains fact from a memoised reader of the git files,
+	falling back to run the git command when they cannot be read.
+	"""
+	with tracing.span(' '.join(command), 'git') as span:
+		try:
+			result = fact(git_reader.for_path(path))
+			span.set(source='files')
+			return result
+		except git_reader.Unsupported:
+			span.set(source='subprocess')
+			return _git(path, *command)
+
+def revision_hash(path='.') -> str:
+	return _read(path, lambda reader: reader.revision_hash, 'rev-parse', 'HEAD')
+
+def commit_hash(path, branch) -> str:
+	"""Commit a branch points to, without checking it out. Tags of the same name are ignored."""
+	return _read(path, lambda reader: reader.resolve(f'refs/heads/{branch}'),
+		'rev-parse', '--verify', '--end-of-options', f'refs/heads/{branch}^{{commit}}')
+
+def current_branch(path='.') -> str:
+	branch = _read(path, lambda reader: reader.current_branch, 'branch', '--show-current')
 	if branch not in ['master', 'main']:
 		raise Exception(
 			f"Current detected branch '{branch}' is neither 'master' nor 'main'. "
@@ -86,11 +111,15 @@ def current_branch() -> str:
 		)
 	return branch
 
-def remote_name() -> str:
-	remotes = subprocess.check_output(['git', 'remote']).decode().strip().split()
+def remote_names(path='.') -> list[str]:
+	return _read(path, lambda reader: ' '.join(reader.remotes), 'remote').split()
+
+def remote_name(path='.') -> str:
+	remotes = remote_names(path)
 	if len(remotes) > 1:
 		if 'origin' in remotes:
-			print(f"More than one remote found, using 'origin'. Others were: {', '.join(remotes)}")
+			print(f"More than one remote found, using 'origin'. Others were: {', '.join(remotes)}",
+				file=sys.stderr)
 			return 'origin'
 		raise Exception(
 			f"More than one remote found ({', '.join(remotes)}) "
@@ -107,12 +136,12 @@ def remote_name() -> str:
 		)
 	return remotes[0]
 
-def repo_remote_url() -> str:
-	name = remote_name()
-	return subprocess.check_output(['git', 'remote', 'get-url', name]).decode().strip()
+def repo_remote_url(path='.') -> str:
+	name = remote_name(path)
+	return _read(path, lambda reader: reader.remote_url(name), 'remote', 'get-url', name)
 
-def _match_remote_hosting():
-	remote_url = repo_remote_url()
+def _match_remote_hosting(path='.'):
+	remote_url = repo_remote_url(path)
 	for provider_name, provider in providers.items():
 		for pattern in provider.remote_patterns:
 			found = re.match(pattern, remote_url)
@@ -125,11 +154,40 @@ def _match_remote_hosting():
 		f"Please add the keys `repo` and `repo_hosting` to the yaml config to make them explicit."
 	)
 
-def repo_name() -> str:
-	hosting, repo = _match_remote_hosting()
+def repo_name(path='.') -> str:
+	hosting, repo = _match_remote_hosting(path)
 	return repo
 
-def repo_host() -> str:
-	hosting, repo = _match_remote_hosting()
+def repo_host(path='.') -> str:
+	hosting, repo = _match_remote_hosting(path)
 	return hosting
 
+def read_blobs(root, revision, paths):
+	"""
+	Contents of the files at the revision of the repository at root,
+	None for missing ones.
+	Paths are relative to the repository root, or to root if starting with './'.
+	All of them are read by a single `git cat-file --batch` process.
+	"""
+	paths = list(dict.fromkeys(paths))
+	request = ''.join(f'{revision}:{path}\n' for path in paths).encode('utf8')
+	output = subprocess.run(['git', 'cat-file', '--batch'],
+		cwd=root,
+		input=request,
+		stdout=subprocess.PIPE,
+		check=True,
+	).stdout
+	blobs = {}
+	position = 0
+	for path in paths:
+		end = output.index(b'\n', position)
+		header = output[position:end]
+		position = end + 1
+		if header.endswith((b' missing', b' ambiguous')):
+			blobs[path] = None
+			continue
+		sha, kind, size = header.split()
+		size = int(size)
+		blobs[path] = output[position:position+size] if kind == b'blob' else None
+		position += size + 1
+	return blobs
@@ -0,0 +1,241 @@
+"""
+Reads git metadata (HEAD, refs, remotes) directly from the repository files,
+avoiding spawning a git process for each fact.
+
+Setups that cannot be read reliably this way raise Unsupported,
+so that callers fall back to the git command.
+"""
+import os
+import re
+import threading
+from functools import cached_property
+from pathlib import Path
+
+class Unsupported(Exception):
+    """The repository metadata cannot be read without the git command"""
+
+def find_root(path='.'):
+    """Returns the working tree root containing path, or None"""
+    path = Path(path).resolve()
+    for candidate in (path, *path.parents):
+        if (candidate/'.git').exists():
+            return candidate
+    return None
+
+def _unquote(value):
+    r"""
+    Strips comments and quotes from a git config value.
+
+    >>> _unquote('https://host/repo.git ; comment')
+    'https://host/repo.git'
+    >>> _unquote('"quoted ; value" # comment')
+    'quoted ; value'
+    >>> _unquote(r'"escaped \" quote"')
+    'escaped " quote'
+    """
+    result = []
+    in_quotes = False
+    escaped = False
+    for c in value.strip():
+        if escaped:
+            result.append(dict(n='\n', t='\t', b='\b').get(c, c))
+            escaped = False
+        elif c == '\\':
+            escaped = True
+        elif c == '"':
+            in_quotes = not in_quotes
+        elif c in ';#' and not in_quotes:
+            break
+        else:
+            result.append(c)
+    return ''.join(result).strip()
+
+_section_re = re.compile(r'^\s*\[\s*([^\s\]"]+)(?:\s+"((?:[^"\\]|\\.)*)")?\s*\]\s*(.*)$')
+
+def parse_config(text):
+    """
+    Parses a git config file into a list of (section, subsection, key, value)
+    Section and key names are lowercased, subsections keep their case.
+
+    >>> parse_config('''[core]
+    ...     bare = false
+    ... [remote "Origin"]
+    ...     URL = git@github.com:user/repo.git
+    ... ''')
+    [('core', None, 'bare', 'false'), ('remote', 'Origin', 'url', 'git@github.com:user/repo.git')]
+    """
+    entries = []
+    section = subsection = None
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped or stripped[0] in ';#':
+            continue
+        match = _section_re.match(stripped)
+        if match:
+            section, subsection, line = match.groups()
+            section = section.lower()
+            if '.' in section: # deprecated [section.subsection] syntax
+                section, subsection = section.split('.', 1)
+            if not line.strip():
+                continue
+        key, sep, value = line.partition('=')
+        key = key.strip().lower()
+        if not key or key[0] in ';#':
+            continue
+        if value.rstrip().endswith('\\'):
+            raise Unsupported("Multiline git config values")
+        entries.append((section, subsection, key, _unquote(value) if sep else 'true'))
+    return entries
+
+def _user_config_files():
+    home = Path.home()
+    xdg = os.environ.get('XDG_CONFIG_HOME') or home/'.config'
+    return [
+        Path('/etc/gitconfig'),
+        Path(xdg)/'git'/'config',
+        home/'.gitconfig',
+    ]
+
+class GitReader:
+    """Metadata of the git repository whose working tree is at root"""
+
+    def __init__(self, root):
+        self.root = Path(root)
+        dotgit = self.root/'.git'
+        if dotgit.is_file():
+            # Linked worktree or submodule: '.git' file points to the actual dir
+            content = dotgit.read_text().strip()
+            if not content.startswith('gitdir:'):
+                raise Unsupported(f"Unrecognized .git file in {root}")
+            self.git_dir = (self.root/content[len('gitdir:'):].strip()).resolve()
+        else:
+            self.git_dir = dotgit
+        commondir = self.git_dir/'commondir'
+        self.common_dir = (
+            (self.git_dir/commondir.read_text().strip()).resolve()
+            if commondir.exists() else self.git_dir
+        )
+
+    @cached_property
+    def config(self):
+        files = [self.common_dir/'config', self.git_dir/'config.worktree']
+        entries = []
+        for path in files:
+            if path.exists():
+                entries += parse_config(path.read_text())
+        for section, subsection, key, value in entries:
+            if section in ('include', 'includeif'):
+                raise Unsupported("Git config includes")
+            if section == 'extensions' and key == 'refstorage' and value != 'files':
+                raise Unsupported(f"Git ref storage '{value}'")
+            if section == 'url':
+                raise Unsupported("Git url rewriting")
+        return entries
+
+    @cached_property
+    def head(self):
+        """Raw content of HEAD: a 'ref: refs/...' or a commit hash"""
+        return (self.git_dir/'HEAD').read_text().strip()
+
+    @cached_property
+    def current_branch(self):
+        """Current branch name or '' if the HEAD is detached"""
+        if not self.head.startswith('ref:'):
+            return ''
+        return self.head[len('ref:'):].strip().removeprefix('refs/heads/')
+
+    @cached_property
+    def revision_hash(self):
+        return self.resolve('HEAD')
+
+    @cached_property
+    def packed_refs(self):
+        packed = self.common_dir/'packed-refs'
+        if not packed.exists():
+            return {}
+        refs = {}
+        for line in packed.read_text().splitlines():
+            if not line or line[0] in '#^':
+                continue
+            sha, _, ref = line.partition(' ')
+            refs[ref.strip()] = sha
+        return refs
+
+    def resolve(self, ref, depth=0):
+        """Commit hash for a full ref name, following symbolic refs"""
+        if depth > 5:
+            raise Unsupported(f"Too deep symbolic ref {ref}")
+        for directory in (self.git_dir, self.common_dir):
+            path = directory/ref
+            if path.is_file():
+                content = path.read_text().strip()
+                if content.startswith('ref:'):
+                    return self.resolve(content[len('ref:'):].strip(), depth+1)
+                return content
+        if ref in self.packed_refs:
+            return self.packed_refs[ref]
+        raise Unsupported(f"Unable to resolve {ref}")
+
+    @cached_property
+    def remotes(self):
+        """Remote names in config order"""
+        names = []
+        for section, subsection, key, value in self.config:
+            if section == 'remote' and subsection and subsection not in names:
+                names.append(subsection)
+        return names
+
+    def remote_url(self, name):
+        urls = [
+            value
+            for section, subsection, key, value in self.config
+            if (section, subsection, key) == ('remote', name, 'url')
+        ]
+        if not urls:
+            raise Unsupported(f"No url for remote '{name}'")
+        for path in _user_config_files():
+            if path.exists() and 'insteadof' in path.read_text(errors='replace').lower():
+                raise Unsupported("Git url rewriting")
+        return urls[0]
+
+def metadata_files(path='.', branch=None):
+    """
+    Repository files whose change affects the metadata read from it,
+    at the given branch if not the current one.
+    """
+    try:
+        reader = GitReader(find_root(path) or path)
+        files = [
+            reader.git_dir/'HEAD',
+            reader.common_dir/'config',
+            reader.common_dir/'packed-refs',
+        ]
+        branch = branch or reader.current_branch
+        if branch:
+            files.append(reader.common_dir/'refs'/'heads'/branch)
+        return files
+    except (Unsupported, OSError):
+        return []
+
+_readers = {}
+_readers_lock = threading.Lock()
+
+def for_path(path='.'):
+    """
+    Memoised reader for the repository containing path.
+    Raises Unsupported if the git command should be used instead.
+    """
+    if os.environ.get('GIT_DIR') or os.environ.get('GIT_CONFIG_COUNT'):
+        raise Unsupported("Git environment overrides")
+    root = find_root(path)
+    if root is None:
+        raise Unsupported(f"No git repository found at {path}")
+    with _readers_lock:
+        if root not in _readers:
+            _readers[root] = GitReader(root)
+        return _readers[root]
+
+def clear_cache():
+    """Forgets memoised metadata, for example after HEAD changes"""
+    with _readers_lock:
+        _readers.clear()
@@ -0,0 +1,110 @@
+import unittest
+import subprocess
+from pathlib import Path
+from yamlns.testutils import ns
+from . import git
+from . import git_reader
+from .git_reader import GitReader, Unsupported
+from .testutils import sandbox_dir, working_dir, GitRepository
+
+class GitReader_Test(GitRepository, unittest.TestCase):
+    from yamlns.testutils import assertNsEqual
+
+    def setUp(self):
+        git_reader.clear_cache()
+        self.addCleanup(git_reader.clear_cache)
+        self.sandbox = self.enterContext(sandbox_dir())
+        self.init_repo('repo', branch='master', origin='https://github.com/user/repo.git')
+        self.repo = self.enterContext(working_dir('repo'))
+        self.commit(message='first')
+
+    def facts(self, path='.'):
+        reader = GitReader(git_reader.find_root(path))
+        return ns(
+            hash = reader.revision_hash,
+            branch = reader.current_branch,
+            remotes = reader.remotes,
+            url = reader.remote_url('origin'),
+        )
+
+    def command_facts(self, path='.'):
+        run = lambda *args: subprocess.check_output(['git', *args], cwd=path).decode().strip()
+        return ns(
+            hash = run('rev-parse', 'HEAD'),
+            branch = run('branch', '--show-current'),
+            remotes = run('remote').split(),
+            url = run('remote', 'get-url', 'origin'),
+        )
+
+    def assertSameAsCommand(self, path='.'):
+        self.assertNsEqual(self.facts(path), self.command_facts(path))
+
+    def test_loose_refs(self):
+        self.assertSameAsCommand()
+
+    def test_packed_refs(self):
+        self.commit(message='second')
+        self.git('pack-refs', '--all')
+        self.assertFalse(Path('.git/refs/heads/master').exists())
+        self.assertSameAsCommand()
+
+    def test_detached_head(self):
+        first = self.git('rev-parse', 'HEAD')
+        self.commit(message='second')
+        self.git('checkout', '-q', first)
+        self.assertSameAsCommand()
+        self.assertEqual(self.facts().branch, '')
+
+    def test_branch_with_slashes(self):
+        self.git('checkout', '-q', '-b', 'release/1.x')
+        self.commit(message='second')
+        self.assertSameAsCommand()
+        self.assertEqual(self.facts().branch, 'release/1.x')
+
+    def test_worktree(self):
+        self.git('worktree', 'add', '-q', '-b', 'other', '../worktree')
+        with working_dir('../worktree'):
+            self.commit(message='in worktree')
+            self.assertSameAsCommand()
+            self.assertEqual(self.facts().branch, 'other')
+        # Main tree not affected
+        self.assertSameAsCommand()
+
+    def test_subdirectory(self):
+        Path('sub/dir').mkdir(parents=True)
+        self.assertSameAsCommand('sub/dir')
+
+    def test_several_remotes__config_order(self):
+        self.git('remote', 'add', 'zzz', 'git@gitea.com:user/repo.git')
+        self.git('remote', 'add', 'aaa', 'git@bitbucket.org:user/repo.git')
+        self.assertEqual(self.facts().remotes, ['origin', 'zzz', 'aaa'])
+
+    def test_url_rewriting__unsupported(self):
+        self.git('config', 'url.git@github.com:.insteadOf', 'https://github.com/')
+        with self.assertRaises(Unsupported):
+            self.facts()
+
+    def test_not_a_repo__unsupported(self):
+        with working_dir(self.sandbox):
+            with self.assertRaises(Unsupported):
+                git_reader.for_path('.')
+
+    def test_for_path__memoised_by_root(self):
+        Path('sub').mkdir()
+        self.assertIs(git_reader.for_path('.'), git_reader.for_path('sub'))
+
+    def test_git_module__uses_reader(self):
+        self.assertEqual(git.repo_name(), 'user/repo')
+        self.assertEqual(git.repo_host(), 'GitHub')
+        self.assertEqual(git.current_branch(), 'master')
+        self.assertEqual(git.revision_hash(), self.git('rev-parse', 'HEAD'))
+
+    def test_git_module__fallback_to_command(self):
+        self.git('config', 'url.https://github.com/other/.insteadOf', 'https://github.com/user/')
+        self.assertEqual(git.repo_name(), 'other/repo')
+        self.assertEqual(git.revision_hash(), self.git('rev-parse', 'HEAD'))
+
+    def test_git_module__explicit_path(self):
+        with working_dir(self.sandbox):
+            self.assertEqual(git.repo_name('repo'), 'user/repo')
+            self.assertEqual(git.current_branch('repo'), 'master')
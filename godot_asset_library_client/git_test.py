@@ -1,9 +1,11 @@
 import unittest
 import subprocess
 from pathlib import Path
+from unittest import mock
 from yamlns.testutils import ns
 from . import git
-from .testutils import sandbox_dir, working_dir
+from . import git_reader
+from .testutils import sandbox_dir, working_dir, GitRepository
 
 class GitProviders_Test(unittest.TestCase):
 	maxDiff = None
@@ -135,3 +137,30 @@ class GitProviders_Test(unittest.TestCase):
 
 
 
+
+
+class CommitHash_Test(GitRepository, unittest.TestCase):
+
+	def setUp(self):
+		git_reader.clear_cache()
+		self.addCleanup(git_reader.clear_cache)
+		self.enterContext(sandbox_dir())
+		self.init_repo()
+		self.commit(message='first')
+		self.git('tag', 'release')
+		self.git('tag', 'v1.0')
+		self.git('branch', 'release')
+		self.git('checkout', '-q', 'release')
+		self.branch_hash = self.commit(message='second')
+
+	def test_branch(self):
+		self.assertEqual(git.commit_hash('.', 'release'), self.branch_hash)
+
+	def test_branch__without_git_files(self):
+		with mock.patch.object(git_reader, 'for_path', side_effect=git_reader.Unsupported("test")):
+			self.assertEqual(git.commit_hash('.', 'release'), self.branch_hash)
+
+	def test_tag__not_a_branch(self):
+		with mock.patch.object(git_reader, 'for_path', side_effect=git_reader.Unsupported("test")):
+			with self.assertRaises(subprocess.CalledProcessError):
+				git.commit_hash('.', 'v1.0')
@@ -1,34 +1,243 @@
 from dataclasses import field
+import os
 import re
+import threading
 from pathlib import Path
+from . import tracing
 
-_patterns = dict(
-    project_name = r'config/name="([^"]+)"',
-    project_version = r'config/version="([^"]+)"',
-    description = r'config/description="([^"]+)"',
-    godot_version = r'config/features=PackedStringArray[(]"([^"]+)"',
-    icon = r'config/icon="res:/([^"]+)"',
+# Shortcuts for commonly used settings: (setting key, value adapter)
+_aliases = dict(
+    project_name = ('application/config/name', None),
+    project_version = ('application/config/version', None),
+    description = ('application/config/description', None),
+    godot_version = ('application/config/features', lambda features: features[0]),
+    icon = ('application/config/icon', lambda icon: icon.removeprefix('res:/')),
 )
 
-def available_fields():
-    return _patterns.keys()
+_string_escapes = {
+    'n': '\n', 't': '\t', 'r': '\r', '"': '"', '\\': '\\',
+}
 
-def from_project(field):
-    # TODO: This is somewhat fragile
-    pattern = _patterns[field]
-    project_content = Path('project.godot').read_text()
-    match =  re.search(pattern, project_content)
-    if not match:
+def _unescape(text):
+    r"""
+    >>> _unescape(r'a \"quoted\" \\ line\nbreak')
+    'a "quoted" \\ line\nbreak'
+    """
+    return re.sub(r'\\(.)', lambda m: _string_escapes.get(m.group(1), m.group(1)), text)
+
+_string_re = re.compile(r'"((?:[^"\\]|\\.)*)"', re.DOTALL)
+_number_re = re.compile(r'^-?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?$')
+
+def parse_value(raw):
+    """
+    Turns the text of a setting value into a Python value
+    when it has a simple equivalent, else returns the text as is.
+
+    >>> parse_value('"My \\\\"Game\\\\""')
+    'My "Game"'
+    >>> parse_value('PackedStringArray("4.3", "Forward Plus")')
+    ['4.3', 'Forward Plus']
+    >>> parse_value('5'), parse_value('-1.5'), parse_value('true'), parse_value('null')
+    (5, -1.5, True, None)
+    >>> parse_value('Vector2(1, 2)')
+    'Vector2(1, 2)'
+    """
+    if raw.startswith('"') and raw.endswith('"') and len(raw) > 1:
+        return _unescape(raw[1:-1])
+    if raw.startswith('PackedStringArray(') and raw.endswith(')'):
+        return [_unescape(s) for s in _string_re.findall(raw)]
+    if raw in ('true', 'false'):
+        return raw == 'true'
+    if raw == 'null':
         return None
-    return match.group(1)
+    if _number_re.match(raw):
+        return int(raw) if raw.lstrip('-').isdigit() else float(raw)
+    return raw
 
-def project_field(attribute, *args, **kwds):
+_string_end_re = re.compile(r'(?:[^"\\]|\\.)*"')
+_strings_re = re.compile(r'"(?:[^"\\]|\\.)*"')
+
+def _scan(line, depth, in_string):
     """
-    A field that will be read from godot project file
-    if not provided in config.
+    Updates the bracket depth and whether a string is left open
+    after the line, ignoring brackets inside strings.
+
+    >>> _scan('{"a": [1, "]"', 0, False)
+    (2, False)
+    >>> _scan('"multi', 0, False)
+    (0, True)
+    >>> _scan('line string" }', 1, True)
+    (0, False)
+    >>> _scan('{"escaped \\\\" ]", "multi', 0, False)
+    (1, True)
+    """
+    if '\\' not in line:
+        # Fast path: without escapes, quotes alternate code and strings
+        parts = line.split('"')
+        code = ''.join(parts[1::2] if in_string else parts[::2])
+        in_string ^= len(parts) % 2 == 0
+    else:
+        if in_string:
+            closing = _string_end_re.match(line)
+            if not closing:
+                return depth, True
+            line = line[closing.end():]
+        code, quote, _ = _strings_re.sub('', line).partition('"')
+        in_string = bool(quote)
+    for c in '[{(':
+        depth += code.count(c)
+    for c in ']})':
+        depth -= code.count(c)
+    return depth, in_string
+
+# Anchored on a literal newline, which is much faster than ^ with re.M
+_statement_re = re.compile(r'\n[ \t]*(?:'
+    r'([;#])|' # comment
+    r'\[(.*)\][ \t]*(?=\n)|' # section
+    r'("(?:[^"\\\n]|\\.)*"|[^\s"=;#\[\]{}(),:]+)[ \t]*=' # key
+r')')
+
+def parse_project(text):
+    """
+    Tokenizes the content of a project.godot file in a single pass.
+    Returns a dict mapping full setting keys ('section/key')
+    to the raw text of their values.
+    Multiline values (strings, arrays, dictionaries...) are supported.
+
+    >>> parse_project('''; comment
+    ... config_version=5
+    ... [application]
+    ... config/name="Game"
+    ... [input]
+    ... jump={
+    ... "deadzone": 0.5,
+    ... "events": []
+    ... }
+    ... ''')
+    {'config_version': '5', 'application/config/name': '"Game"', 'input/jump': '{\\n"deadzone": 0.5,\\n"events": []\\n}'}
+    """
+    text = '\n' + text + '\n'
+    settings = {}
+    prefix = ''
+    pending = None
+    # Candidate statement starts. Those falling inside a multiline value
+    # are discarded since the value text before them is unbalanced.
+    for match in _statement_re.finditer(text):
+        if pending:
+            key, start = pending
+            value = text[start:match.start()]
+            depth, in_string = _scan(value, 0, False)
+            if depth > 0 or in_string:
+                continue
+            settings[prefix + key] = value.strip()
+            pending = None
+        comment, section, key = match.groups()
+        if section is not None:
+            prefix = section + '/'
+        elif key is not None:
+            pending = key.strip('"'), match.end()
+    if pending:
+        key, start = pending
+        settings[prefix + key] = text[start:].strip()
+    return settings
+
+class ProjectFile:
+    """Index of the settings in a project.godot file"""
+
+    def __init__(self, text):
+        self._raw = parse_project(text)
+        self._values = {}
+
+    def keys(self):
+        return self._raw.keys()
+
+    def __contains__(self, key):
+        return key in self._raw
+
+    def raw(self, key):
+        return self._raw[key]
+
+    def __getitem__(self, key):
+        if key not in self._values:
+            self._values[key] = parse_value(self._raw[key])
+        return self._values[key]
+
+    def get(self, key, default=None):
+        if key not in self._raw:
+            return default
+        return self[key]
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+def read_project(project_file='project.godot'):
+    """
+    Returns the parsed ProjectFile.
+    Parsing is cached until the file modification time or size changes.
     """
-    def factory():
-        return from_project(attribute)
-    return field(*args, default_factory=factory, **kwds)
+    path = os.path.abspath(project_file)
+    stat = os.stat(path)
+    signature = stat.st_mtime_ns, stat.st_size
+    with _cache_lock:
+        cached = _cache.get(path)
+    if cached and cached[0] == signature:
+        return cached[1]
+    with tracing.span('parse', 'project', path=path, bytes=stat.st_size):
+        project = ProjectFile(Path(path).read_text())
+    with _cache_lock:
+        _cache[path] = signature, project
+    return project
+
+_revisions = {}
 
+def read_project_at(root, commit):
+    """
+    Returns the ProjectFile of the project at root as committed,
+    read from the git objects without checking the commit out.
+    Memoised, as a commit is immutable.
+    """
+    from .git import read_blobs
+    key = os.path.abspath(root), commit
+    with _cache_lock:
+        cached = _revisions.get(key)
+    if cached:
+        return cached
+    content = read_blobs(root, commit, ['./project.godot'])['./project.godot']
+    if content is None:
+        raise FileNotFoundError(f"No project.godot in {root} at {commit}")
+    with tracing.span('parse', 'project', path=f'{commit}:project.godot', bytes=len(content)):
+        project = ProjectFile(content.decode('utf8'))
+    with _cache_lock:
+        _revisions[key] = project
+    return project
 
+def available_fields(project_file='project.godot'):
+    """
+    Field shortcuts plus every setting in the project file, if it exists.
+    """
+    fields = list(_aliases)
+    if os.path.exists(project_file):
+        fields += read_project(project_file).keys()
+    return fields
+
+def from_project(field, project_file='project.godot', project=None):
+    """Value of the field in the project file, or in the given ProjectFile"""
+    with tracing.span(field, 'project'):
+        project = project or read_project(project_file)
+    key, adapter = _aliases.get(field, (field, None))
+    value = project.get(key)
+    if value is None or value == '' or value == []:
+        return None
+    return adapter(value) if adapter else value
+
+def project_field(attribute, *args, **kwds):
+    """
+    A field that will be read from godot project file
+    at the project root if not provided in config.
+    Given a commit, the file is read as committed.
+    """
+    def resolve(root='.', commit=None):
+        if commit:
+            return from_project(attribute, project=read_project_at(root, commit))
+        return from_project(attribute, Path(root)/'project.godot')
+    return field(*args, default=None, metadata=dict(resolve=resolve, source='project'), **kwds)
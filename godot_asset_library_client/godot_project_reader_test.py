@@ -0,0 +1,119 @@
+import unittest
+import os
+from pathlib import Path
+from . import godot_project_reader
+from .godot_project_reader import (
+    available_fields,
+    from_project,
+    parse_project,
+    read_project,
+)
+from .testutils import sandbox_dir
+
+project_content = """\
+; Engine configuration file.
+; It's best edited using the editor UI and not directly,
+
+config_version=5
+
+[application]
+
+config/name="My \\"Addon\\""
+config/description="Multiline
+description"
+config/version="1.2.3"
+run/main_scene="res://main.tscn"
+config/features=PackedStringArray("4.3", "Forward Plus")
+config/icon="res://icon.svg"
+
+[autoload]
+
+Dice="*res://addons/dice/dice.gd"
+
+[input]
+
+roll={
+"deadzone": 0.5,
+"events": [Object(InputEventKey,"resource_local_to_scene":false,"keycode":0,"unicode":32,"echo":false,"script":null)
+]
+}
+"""
+
+class GodotProjectReader_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.sandbox = self.enterContext(sandbox_dir())
+        Path('project.godot').write_text(project_content)
+
+    def test_aliases(self):
+        self.assertEqual(from_project('project_name'), 'My "Addon"')
+        self.assertEqual(from_project('project_version'), '1.2.3')
+        self.assertEqual(from_project('description'), 'Multiline\ndescription')
+        self.assertEqual(from_project('godot_version'), '4.3')
+        self.assertEqual(from_project('icon'), '/icon.svg')
+
+    def test_any_key(self):
+        self.assertEqual(from_project('config_version'), 5)
+        self.assertEqual(from_project('autoload/Dice'), '*res://addons/dice/dice.gd')
+        self.assertEqual(from_project('application/config/features'), ['4.3', 'Forward Plus'])
+
+    def test_multiline_value_kept_raw(self):
+        self.assertEqual(from_project('input/roll'), '{\n'
+            '"deadzone": 0.5,\n'
+            '"events": [Object(InputEventKey,"resource_local_to_scene":false,"keycode":0,"unicode":32,"echo":false,"script":null)\n'
+            ']\n'
+            '}'
+        )
+
+    def test_missing_key(self):
+        self.assertEqual(from_project('application/config/missing'), None)
+
+    def test_missing_alias(self):
+        Path('project.godot').write_text('[application]\n')
+        self.assertEqual(from_project('project_version'), None)
+
+    def test_brackets_inside_strings(self):
+        settings = parse_project('a="[{(\\""\nb=2\n')
+        self.assertEqual(settings, {'a': '"[{(\\""', 'b': '2'})
+
+    def test_available_fields(self):
+        self.assertEqual(list(available_fields()), [
+            'project_name',
+            'project_version',
+            'description',
+            'godot_version',
+            'icon',
+            'config_version',
+            'application/config/name',
+            'application/config/description',
+            'application/config/version',
+            'application/run/main_scene',
+            'application/config/features',
+            'application/config/icon',
+            'autoload/Dice',
+            'input/roll',
+        ])
+
+    def test_available_fields__without_project(self):
+        os.unlink('project.godot')
+        self.assertEqual(list(available_fields()), [
+            'project_name',
+            'project_version',
+            'description',
+            'godot_version',
+            'icon',
+        ])
+
+    def test_read_project__cached(self):
+        self.assertIs(read_project(), read_project())
+
+    def test_read_project__reparsed_when_modified(self):
+        first = read_project()
+        Path('project.godot').write_text('[application]\nconfig/version="2.0"\n')
+        self.assertIsNot(read_project(), first)
+        self.assertEqual(from_project('project_version'), '2.0')
+
+    def test_read_project__explicit_path(self):
+        Path('sub').mkdir()
+        Path('sub/project.godot').write_text('[application]\nconfig/version="3.0"\n')
+        self.assertEqual(from_project('project_version', 'sub/project.godot'), '3.0')
@@ -0,0 +1,101 @@
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from .utils import cache_dir, read_json, write_json_atomic
+
+def _digest(text, length=16):
+    return hashlib.sha256(text.encode()).hexdigest()[:length]
+
+class ResponseCache:
+    """
+    On disk cache for the json responses of GET requests.
+
+    Entries are fresh for ttl seconds. Stale entries with an ETag
+    or Last-Modified are revalidated with a conditional request.
+    When the cache grows over max_bytes, the least recently used
+    entries are evicted.
+    Each api base url gets its own directory so that different
+    libraries (ie. staging and production) never mix.
+    With refresh, entries are never considered fresh.
+    """
+
+    def __init__(self, base, directory=None, ttl=300, max_bytes=16*1024*1024, refresh=False):
+        self.directory = Path(directory or cache_dir()/'http') / _digest(base)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.refresh = refresh
+
+    def _path(self, url, params=None):
+        query = json.dumps(params or {}, sort_keys=True)
+        return self.directory / f'{_digest(url)}-{_digest(query)}.json'
+
+    def lookup(self, url, params=None):
+        """Returns the cached entry or None"""
+        path = self._path(url, params)
+        entry = read_json(path)
+        if entry is None:
+            return None
+        os.utime(path) # mtime tracks usage for LRU eviction
+        return entry
+
+    def is_fresh(self, entry):
+        if self.refresh:
+            return False
+        return time.time() - entry['stored_at'] < self.ttl
+
+    def validators(self, entry):
+        """Conditional request headers to revalidate the entry"""
+        headers = {}
+        if entry and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def store(self, url, params, body, headers={}):
+        if 'no-store' in headers.get('Cache-Control', ''):
+            return
+        entry = dict(
+            url=url,
+            params=params,
+            stored_at=time.time(),
+            etag=headers.get('ETag'),
+            last_modified=headers.get('Last-Modified'),
+            body=body,
+        )
+        self._write(self._path(url, params), entry)
+        self._evict()
+
+    def revalidated(self, url, params, entry):
+        """Restarts the ttl of an entry the server confirmed unchanged"""
+        self._write(self._path(url, params), dict(entry, stored_at=time.time()))
+
+    def _write(self, path, entry):
+        # Atomic replace, concurrent requests may write the same entry
+        write_json_atomic(path, entry)
+
+    def invalidate(self, url):
+        """Removes the entries of url, whatever their params"""
+        for path in self.directory.glob(f'{_digest(url)}-*.json'):
+            path.unlink(missing_ok=True)
+
+    def clear(self):
+        for path in self.directory.glob('*.json'):
+            path.unlink(missing_ok=True)
+
+    def _evict(self):
+        entries = []
+        for path in self.directory.glob('*.json'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
@@ -0,0 +1,128 @@
+import unittest
+import contextlib
+import io
+import os
+import time
+from .api import Api
+from .httpcache import ResponseCache
+from .testutils import temp_path, FakeResponse, FakeSession
+
+class ResponseCache_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = self.enterContext(temp_path())
+
+    def cache(self, base='https://library/api/', **kwds):
+        return ResponseCache(base, directory=self.directory, **kwds)
+
+    def test_lookup__missing(self):
+        self.assertEqual(self.cache().lookup('asset/1'), None)
+
+    def test_store_and_lookup(self):
+        cache = self.cache()
+        cache.store('asset/1', None, dict(title='A'), {'ETag': '"v1"'})
+        entry = cache.lookup('asset/1')
+        self.assertEqual(entry['body'], dict(title='A'))
+        self.assertEqual(entry['etag'], '"v1"')
+        self.assertTrue(cache.is_fresh(entry))
+
+    def test_params_are_part_of_the_key(self):
+        cache = self.cache()
+        cache.store('asset/edit', dict(asset=1, status='new'), 'one')
+        self.assertEqual(cache.lookup('asset/edit', dict(status='new', asset=1))['body'], 'one')
+        self.assertEqual(cache.lookup('asset/edit', dict(asset=2, status='new')), None)
+
+    def test_bases_do_not_mix(self):
+        self.cache('https://staging/api/').store('asset/1', None, 'staging')
+        self.assertEqual(self.cache('https://production/api/').lookup('asset/1'), None)
+
+    def test_is_fresh__expired(self):
+        cache = self.cache(ttl=10)
+        entry = dict(stored_at=time.time() - 11)
+        self.assertFalse(cache.is_fresh(entry))
+
+    def test_is_fresh__refresh(self):
+        cache = self.cache(refresh=True)
+        self.assertFalse(cache.is_fresh(dict(stored_at=time.time())))
+
+    def test_validators(self):
+        cache = self.cache()
+        self.assertEqual(cache.validators(dict(etag='"v1"', last_modified='Mon')), {
+            'If-None-Match': '"v1"',
+            'If-Modified-Since': 'Mon',
+        })
+        self.assertEqual(cache.validators(None), {})
+
+    def test_store__no_store(self):
+        cache = self.cache()
+        cache.store('asset/1', None, 'body', {'Cache-Control': 'no-store'})
+        self.assertEqual(cache.lookup('asset/1'), None)
+
+    def test_invalidate(self):
+        cache = self.cache()
+        cache.store('asset/1', dict(a=1), 'a')
+        cache.store('asset/1', dict(a=2), 'b')
+        cache.store('asset/2', None, 'c')
+        cache.invalidate('asset/1')
+        self.assertEqual(cache.lookup('asset/1', dict(a=1)), None)
+        self.assertEqual(cache.lookup('asset/1', dict(a=2)), None)
+        self.assertEqual(cache.lookup('asset/2')['body'], 'c')
+
+    def test_evicts_least_recently_used(self):
+        cache = self.cache(max_bytes=600)
+        cache.store('asset/1', None, 'x'*100)
+        cache.store('asset/2', None, 'x'*100)
+        past = time.time() - 100
+        for path in cache.directory.glob('*.json'):
+            os.utime(path, (past, past))
+        cache.lookup('asset/1') # recently used
+        cache.store('asset/3', None, 'x'*100)
+        self.assertNotEqual(cache.lookup('asset/1'), None)
+        self.assertEqual(cache.lookup('asset/2'), None)
+        self.assertNotEqual(cache.lookup('asset/3'), None)
+
+
+class ApiCache_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = self.enterContext(temp_path())
+        self.enterContext(contextlib.redirect_stdout(io.StringIO()))
+
+    def api(self, *responses, **kwds):
+        self.session = FakeSession(*responses)
+        base = 'https://library/api/'
+        return Api(base, session=self.session,
+            cache=ResponseCache(base, directory=self.directory, **kwds))
+
+    def test_fresh__no_request(self):
+        api = self.api(FakeResponse(dict(title='A')))
+        api.get('asset/1')
+        self.assertEqual(api.get('asset/1'), dict(title='A'))
+        self.assertEqual(len(self.session.requests), 1)
+
+    def test_stale__revalidated(self):
+        api = self.api(
+            FakeResponse(dict(title='A'), headers={'ETag': '"v1"'}),
+            FakeResponse(None, status_code=304),
+            ttl=0,
+        )
+        api.get('asset/1')
+        self.assertEqual(api.get('asset/1'), dict(title='A'))
+        method, url, kwds = self.session.requests[1]
+        self.assertEqual(kwds['headers'], {'If-None-Match': '"v1"'})
+
+    def test_stale__modified(self):
+        api = self.api(
+            FakeResponse(dict(title='A'), headers={'ETag': '"v1"'}),
+            FakeResponse(dict(title='B'), headers={'ETag': '"v2"'}),
+            ttl=0,
+        )
+        api.get('asset/1')
+        self.assertEqual(api.get('asset/1'), dict(title='B'))
+        self.assertEqual(api.cache.lookup('asset/1')['etag'], '"v2"')
+
+    def test_without_cache(self):
+        self.session = FakeSession(FakeResponse('A'), FakeResponse('B'))
+        api = Api('https://library/api/', session=self.session)
+        api.get('asset/1')
+        self.assertEqual(api.get('asset/1'), 'B')
@@ -0,0 +1,168 @@
+"""
+Local SQLite mirror of the library catalogue,
+so questions about assets are answered offline.
+"""
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from . import tracing
+from .utils import cache_file, json_loads, json_dumps
+
+_schema = """
+CREATE TABLE IF NOT EXISTS assets (
+    asset_id TEXT PRIMARY KEY,
+    title TEXT,
+    author TEXT,
+    category_id TEXT,
+    godot_version TEXT,
+    version_string TEXT,
+    cost TEXT,
+    modify_date TEXT,
+    data TEXT NOT NULL,
+    synced_at REAL
+);
+CREATE INDEX IF NOT EXISTS assets_modify_date ON assets (modify_date);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_columns = [
+    'asset_id',
+    'title',
+    'author',
+    'category_id',
+    'godot_version',
+    'version_string',
+    'cost',
+    'modify_date',
+]
+
+def default_path(base):
+    """A mirror file for each library url"""
+    return cache_file('mirror', base, '.sqlite')
+
+class Mirror:
+    """
+    Assets of the library kept in a SQLite database.
+
+    Sync is incremental: listings are sorted by modification date,
+    so only the pages down to the last synced date are fetched,
+    and only the assets modified since then get their details fetched.
+    """
+
+    listing_params = dict(sort='updated', type='any', godot_version='any')
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(self.path)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(_schema)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _meta(self, key):
+        row = self.db.execute('SELECT value FROM meta WHERE key=?', (key,)).fetchone()
+        return row['value'] if row else None
+
+    @property
+    def watermark(self):
+        """Modification date of the newest synced asset"""
+        return self._meta('watermark')
+
+    def _changed_listings(self, api, jobs, watermark):
+        """
+        Listed assets modified since the watermark, newest first,
+        and the number of pages fetched.
+        Pages are prefetched `jobs` at a time until reaching older assets.
+        """
+        with api.pager('asset', prefetch=jobs, **self.listing_params) as assets:
+            listed = []
+            for item in assets:
+                if watermark and item['modify_date'] < watermark:
+                    break
+                listed.append(item)
+            return listed, assets.pages_fetched
+
+    def sync(self, api, jobs=4, full=False, details=True):
+        """
+        Updates the mirror from the library through the api.
+        With full, every asset is fetched again.
+        Without details, only listing fields are kept.
+        Returns counts of the work done.
+        """
+        watermark = None if full else self.watermark
+        with tracing.span('listings', 'mirror', full=watermark is None):
+            listed, pages = self._changed_listings(api, jobs, watermark)
+
+        # Listings may repeat an asset whose page moved during the sync
+        listed = list({item['asset_id']: item for item in reversed(listed)}.values())
+
+        def detailed(item):
+            if not details:
+                return item
+            return dict(item, **api.asset(item['asset_id']))
+
+        with tracing.span('details', 'mirror', assets=len(listed)):
+            with ThreadPoolExecutor(max_workers=jobs) as executor:
+                assets = list(executor.map(detailed, listed))
+
+        now = time.time()
+        with self.db:
+            self.db.executemany(
+                f"INSERT OR REPLACE INTO assets ({', '.join(_columns)}, data, synced_at) "
+                f"VALUES ({', '.join('?'*len(_columns))}, ?, ?)",
+                [
+                    [asset.get(column) for column in _columns] + [json_dumps(asset), now]
+                    for asset in assets
+                ],
+            )
+            newest = max([asset['modify_date'] for asset in assets] + [watermark or ''])
+            if newest:
+                self.db.execute("INSERT OR REPLACE INTO meta VALUES ('watermark', ?)", (newest,))
+        return dict(
+            pages=pages,
+            updated=len(assets),
+            total=self.count(),
+        )
+
+    def count(self):
+        return self.db.execute('SELECT COUNT(*) FROM assets').fetchone()[0]
+
+    def search(self, text=None, category=None, godot_version=None, author=None, limit=20):
+        """Listing fields of the mirrored assets matching all the criteria, newest first"""
+        conditions, values = [], []
+        if text:
+            conditions.append('title LIKE ?')
+            values.append(f'%{text}%')
+        if category is not None:
+            conditions.append('category_id = ?')
+            values.append(str(category))
+        if godot_version:
+            conditions.append('godot_version LIKE ?')
+            values.append(f'{godot_version}%')
+        if author:
+            conditions.append('author = ?')
+            values.append(author)
+        where = ('WHERE ' + ' AND '.join(conditions)) if conditions else ''
+        rows = self.db.execute(
+            f"SELECT {', '.join(_columns)} FROM assets {where} "
+            "ORDER BY modify_date DESC LIMIT ?",
+            values + [limit],
+        )
+        return [dict(row) for row in rows]
+
+    def show(self, asset_id):
+        """All the mirrored data of the asset or None"""
+        row = self.db.execute('SELECT data FROM assets WHERE asset_id=?', (str(asset_id),)).fetchone()
+        return json_loads(row['data']) if row else None
@@ -0,0 +1,89 @@
+import unittest
+import contextlib
+import io
+from .api import Api
+from .fakeserver import FakeLibraryServer
+from .mirror import Mirror
+from .testutils import temp_path
+
+class Mirror_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.enterContext(contextlib.redirect_stdout(io.StringIO()))
+        self.server = self.enterContext(FakeLibraryServer())
+        self.library = self.server.library
+        self.library.page_length = 3
+        self.api = self.enterContext(Api(self.server.base))
+        self.mirror = self.enterContext(Mirror(self.enterContext(temp_path())/'mirror.sqlite'))
+
+    def add_assets(self, n, start=1, day='01'):
+        for i in range(start, start+n):
+            self.library.add_asset(str(i),
+                title=f'Asset {i}',
+                modify_date=f'2025-01-{day} 00:00:{i:02}',
+                description=f'Description {i}',
+            )
+
+    def test_sync__full(self):
+        self.add_assets(7)
+        result = self.mirror.sync(self.api)
+        self.assertEqual(result, dict(pages=3, updated=7, total=7))
+        self.assertEqual(self.mirror.watermark, '2025-01-01 00:00:07')
+
+    def test_sync__details(self):
+        self.add_assets(2)
+        self.mirror.sync(self.api)
+        self.assertEqual(self.mirror.show('2')['description'], 'Description 2')
+
+    def test_sync__no_details(self):
+        self.add_assets(2)
+        self.mirror.sync(self.api, details=False)
+        self.assertNotIn('description', self.mirror.show('2'))
+        self.assertEqual(self.server.counts()['GET asset/{id}'], 0)
+
+    def test_sync__incremental(self):
+        self.add_assets(7)
+        self.mirror.sync(self.api)
+        self.server.reset_counts()
+        self.add_assets(2, start=8, day='02')
+        self.library.assets['3']['modify_date'] = '2025-01-02 00:00:00'
+        self.library.assets['3']['title'] = 'Renamed'
+        result = self.mirror.sync(self.api)
+        # Asset 7, at the watermark date, is fetched again
+        self.assertEqual(result, dict(pages=3, updated=4, total=9))
+        self.assertEqual(self.mirror.show('3')['title'], 'Renamed')
+        self.assertEqual(self.server.counts()['GET asset/{id}'], 4)
+
+    def test_sync__incremental_nothing_changed(self):
+        self.add_assets(7)
+        self.mirror.sync(self.api)
+        self.server.reset_counts()
+        result = self.mirror.sync(self.api)
+        # Just the asset at the watermark date
+        self.assertEqual(result['updated'], 1)
+        self.assertEqual(self.server.counts()['GET asset/{id}'], 1)
+        self.assertEqual(self.mirror.count(), 7)
+
+    def test_sync__full_refetches(self):
+        self.add_assets(4)
+        self.mirror.sync(self.api)
+        result = self.mirror.sync(self.api, full=True)
+        self.assertEqual(result['updated'], 4)
+
+    def test_search(self):
+        self.add_assets(3)
+        self.library.assets['2'].update(title='Shader pack', category_id='5')
+        self.mirror.sync(self.api)
+        self.assertEqual([a['asset_id'] for a in self.mirror.search()], ['3', '2', '1'])
+        self.assertEqual([a['asset_id'] for a in self.mirror.search('shader')], ['2'])
+        self.assertEqual([a['asset_id'] for a in self.mirror.search(category=5)], ['2'])
+        self.assertEqual([a['asset_id'] for a in self.mirror.search(limit=1)], ['3'])
+
+    def test_search__godot_version_prefix(self):
+        self.add_assets(2)
+        self.library.assets['1']['godot_version'] = '3.5'
+        self.mirror.sync(self.api)
+        self.assertEqual([a['asset_id'] for a in self.mirror.search(godot_version='4')], ['2'])
+
+    def test_show__missing(self):
+        self.assertEqual(self.mirror.show('1'), None)
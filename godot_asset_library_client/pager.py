@@ -0,0 +1,73 @@
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+class Pager:
+    """
+    Iterator over the items of a paginated library listing.
+
+    Pages are requested as the items are consumed,
+    prefetching the next `prefetch` pages (at least one) concurrently,
+    so stopping early, or closing it, saves the rest of the requests.
+
+    After the first page, total_items and pages hold the listing size,
+    and pages_fetched counts the pages actually requested.
+
+        with api.pager('asset/edit', asset=asset_id) as edits:
+            for edit in edits:
+                ...
+    """
+
+    def __init__(self, api, url, params=None, prefetch=1):
+        self.api = api
+        self.url = url
+        self.params = dict(params or {})
+        self.prefetch = prefetch
+        self.total_items = None
+        self.pages = None
+        self.pages_fetched = 0
+        self._lock = threading.Lock()
+        self._items = self._iterate()
+
+    def _fetch(self, page):
+        with self._lock:
+            self.pages_fetched += 1
+        return self.api.get(self.url, params=dict(self.params, page=page))
+
+    def _iterate(self):
+        first = self._fetch(0)
+        self.total_items = first.get('total_items')
+        self.pages = first.get('pages', 1)
+        executor = ThreadPoolExecutor(max_workers=max(1, self.prefetch))
+        pending = deque()
+        next_page = 1
+        try:
+            def request_more():
+                nonlocal next_page
+                while next_page < self.pages and len(pending) < max(1, self.prefetch):
+                    pending.append(executor.submit(self._fetch, next_page))
+                    next_page += 1
+            request_more()
+            yield from first.get('result', [])
+            while pending:
+                page = pending.popleft().result()
+                request_more()
+                yield from page.get('result', [])
+        finally:
+            # Requests in flight are let finish, but not the queued ones
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._items)
+
+    def close(self):
+        self._items.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
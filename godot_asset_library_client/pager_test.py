@@ -0,0 +1,64 @@
+import unittest
+import contextlib
+import io
+from unittest import mock
+from .api import Api
+from .fakeserver import FakeLibraryServer
+
+class Pager_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.enterContext(contextlib.redirect_stdout(io.StringIO()))
+        self.server = self.enterContext(FakeLibraryServer())
+        self.library = self.server.library
+        self.library.page_length = 3
+        self.library.add_asset('1')
+        self.api = self.enterContext(Api(self.server.base))
+
+    def add_edits(self, n, **fields):
+        return [self.library.add_edit('1', **fields) for i in range(n)]
+
+    def test_all_items(self):
+        edits = self.add_edits(8)
+        with self.api.pager('asset/edit', asset='1') as pager:
+            ids = [edit['edit_id'] for edit in pager]
+        self.assertEqual(ids, [edit['edit_id'] for edit in reversed(edits)])
+        self.assertEqual((pager.total_items, pager.pages, pager.pages_fetched), (8, 3, 3))
+
+    def test_empty(self):
+        with self.api.pager('asset/edit', asset='1') as pager:
+            self.assertEqual(list(pager), [])
+        self.assertEqual((pager.total_items, pager.pages_fetched), (0, 1))
+
+    def test_early_stop__no_further_pages(self):
+        self.add_edits(30)
+        with self.api.pager('asset/edit', asset='1', prefetch=2) as pager:
+            next(pager)
+        # The first page plus the prefetched ones
+        self.assertLessEqual(pager.pages_fetched, 3)
+        self.assertLessEqual(self.server.counts()['GET asset/edit'], 3)
+
+    def test_pending_version_edit__beyond_first_page(self):
+        [wanted] = self.add_edits(1, version_string='1.0')
+        self.add_edits(7, version_string='2.0')
+        self.assertEqual(self.api.pending_version_edit('1', '1.0'), wanted['edit_id'])
+
+    def test_pending_version_edit__newest(self):
+        self.add_edits(5, version_string='2.0')
+        newest = self.add_edits(1, version_string='1.0')[0]
+        self.assertEqual(self.api.pending_version_edit('1', '1.0'), newest['edit_id'])
+
+    def test_pending_version_edit__newest_listed_last(self):
+        older, newer = self.add_edits(2, version_string='1.0')
+        self.add_edits(5, version_string='2.0')
+        def oldest_first(params, body):
+            edits = sorted(self.library.edits.values(), key=lambda edit: int(edit['edit_id']))
+            return 200, self.library.page(edits, params)
+        with mock.patch.object(self.library, 'list_edits', oldest_first):
+            self.assertEqual(self.api.pending_version_edit('1', '1.0'), newer['edit_id'])
+        self.assertEqual(self.server.counts()['GET asset/edit'], 3)
+
+    def test_pending_version_edit__none(self):
+        self.add_edits(4, version_string='2.0')
+        self.assertEqual(self.api.pending_version_edit('1', '1.0'), None)
+        self.assertEqual(self.server.counts()['GET asset/edit'], 2)
@@ -0,0 +1,185 @@
+"""
+Pre-flight check of the media the payload links from the repository:
+the icon and the repoimage/repothumb previews must exist
+at the committed revision, and not be too large.
+"""
+import re
+import struct
+import subprocess
+from . import tracing
+from .git import read_blobs
+from .utils import table
+
+# Maximum bytes and pixels of the longest side for each use
+limits = dict(
+    icon=(1 * 2**20, 1024),
+    image=(5 * 2**20, 4096),
+    thumbnail=(1 * 2**20, 1024),
+)
+
+def _png(data):
+    if data[12:16] == b'IHDR':
+        return struct.unpack('>II', data[16:24])
+
+def _gif(data):
+    return struct.unpack('<HH', data[6:10])
+
+def _webp(data):
+    chunk = data[12:16]
+    if chunk == b'VP8 ':
+        width, height = struct.unpack('<HH', data[26:30])
+        return width & 0x3fff, height & 0x3fff
+    if chunk == b'VP8L':
+        bits, = struct.unpack('<I', data[21:25])
+        return 1 + (bits & 0x3fff), 1 + (bits >> 14 & 0x3fff)
+    if chunk == b'VP8X':
+        return (
+            1 + int.from_bytes(data[24:27], 'little'),
+            1 + int.from_bytes(data[27:30], 'little'),
+        )
+
+def _jpeg(data):
+    position = 2
+    while position + 9 < len(data):
+        if data[position] != 0xff:
+            return None
+        marker = data[position+1]
+        if marker == 0xff: # padding
+            position += 1
+            continue
+        length, = struct.unpack('>H', data[position+2:position+4])
+        if 0xc0 <= marker <= 0xcf and marker not in (0xc4, 0xc8, 0xcc):
+            height, width = struct.unpack('>HH', data[position+5:position+9])
+            return width, height
+        position += 2 + length
+
+_svg_tag_re = re.compile(rb'<svg\b[^>]*>', re.S)
+_svg_attribute_re = r'\b{}\s*=\s*["\']([^"\']*)["\']'
+
+def _svg_attribute(tag, name):
+    found = re.search(_svg_attribute_re.format(name).encode(), tag)
+    return found and found.group(1).decode()
+
+def _svg(data):
+    tag = _svg_tag_re.search(data)
+    if not tag:
+        return None
+    tag = tag.group(0)
+    try:
+        width = float(_svg_attribute(tag, 'width').removesuffix('px'))
+        height = float(_svg_attribute(tag, 'height').removesuffix('px'))
+        return round(width), round(height)
+    except (AttributeError, ValueError):
+        pass
+    view_box = _svg_attribute(tag, 'viewBox')
+    try:
+        x, y, width, height = map(float, view_box.replace(',', ' ').split())
+        return round(width), round(height)
+    except (AttributeError, ValueError):
+        return None
+
+def image_info(data):
+    """
+    Format and dimensions (width, height) of an image, from its header.
+    Dimensions are None if unknown, format too if unsupported.
+
+    >>> image_info(b'GIF89a\\x20\\x00\\x10\\x00')
+    ('gif', (32, 16))
+    >>> image_info(b'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 128 64">')
+    ('svg', (128, 64))
+    >>> image_info(b'plain text')
+    (None, None)
+    """
+    try:
+        if data.startswith(b'\x89PNG\r\n\x1a\n'):
+            return 'png', _png(data)
+        if data.startswith(b'\xff\xd8'):
+            return 'jpeg', _jpeg(data)
+        if data[:6] in (b'GIF87a', b'GIF89a'):
+            return 'gif', _gif(data)
+        if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+            return 'webp', _webp(data)
+        if _svg_tag_re.search(data[:4096]):
+            return 'svg', _svg(data)
+    except struct.error: # truncated header
+        pass
+    return None, None
+
+def repo_media(config, previews=None):
+    """
+    (use, path) of the repository files the payload links to,
+    paths relative to the repository root, as in repo_raw urls.
+    Previews, if not the config ones, may be given.
+    """
+    media = [('icon', 'icon.svg')]
+    for preview in config.previews if previews is None else previews:
+        if 'repoimage' in preview:
+            media.append(('image', preview['repoimage']))
+        if 'repothumb' in preview:
+            media.append(('thumbnail', preview['repothumb']))
+    return media
+
+def check(config, previews=None):
+    """
+    Media the payload links from the repository,
+    each a dict with its use, path, bytes, format, width, height
+    and a list of problems found.
+    """
+    media = repo_media(config, previews)
+    with tracing.span('preflight', 'previews', files=len(media)):
+        if not config.git_hash:
+            blobs, failure = {}, "no git revision"
+        else:
+            try:
+                blobs = read_blobs(config.root, config.git_hash, [path for use, path in media])
+                failure = f"missing at {config.git_hash[:8]}"
+            except (OSError, subprocess.CalledProcessError) as e:
+                blobs, failure = {}, f"unreadable: {e}"
+        return [
+            inspect(use, path, blobs.get(path), failure)
+            for use, path in media
+        ]
+
+def inspect(use, path, data, missing="missing"):
+    """
+    Describes one media file given its content, None if missing.
+
+    >>> inspect('thumbnail', 'thumb.gif', b'GIF89a\\x00\\x08\\x00\\x02')['problems']
+    ['2048x512 px, over 1024']
+    """
+    result = dict(use=use, path=path, bytes=None, format=None, width=None, height=None, problems=[])
+    if data is None:
+        result['problems'].append(missing)
+        return result
+    format, size = image_info(data)
+    width, height = size or (None, None)
+    result.update(bytes=len(data), format=format, width=width, height=height)
+    max_bytes, max_side = limits[use]
+    if format is None:
+        result['problems'].append("not a supported image")
+    if len(data) > max_bytes:
+        result['problems'].append(f"{len(data)} bytes, over {max_bytes}")
+    if size and max(size) > max_side:
+        result['problems'].append(f"{width}x{height} px, over {max_side}")
+    return result
+
+def problems(media):
+    """Lines describing the problems found"""
+    return [
+        f"{item['use']} {item['path']}: {problem}"
+        for item in media
+        for problem in item['problems']
+    ]
+
+def report(media):
+    return table([
+        [
+            item['use'],
+            item['path'],
+            item['format'] or '',
+            '' if item['bytes'] is None else item['bytes'],
+            f"{item['width']}x{item['height']}" if item['width'] else '',
+            '; '.join(item['problems']) or 'ok',
+        ]
+        for item in media
+    ], ['use', 'path', 'format', 'bytes', 'size', 'status'])
@@ -0,0 +1,147 @@
+import unittest
+from unittest import mock
+import struct
+from pathlib import Path
+from . import git_reader
+from . import preflight
+from .preflight import image_info, read_blobs, check, problems
+from .testutils import sandbox_dir, GitRepository
+
+def png(width, height, padding=0):
+    return (b'\x89PNG\r\n\x1a\n' + b'\x00\x00\x00\x0dIHDR'
+        + struct.pack('>II', width, height) + b'\x08\x06\x00\x00\x00' + b'\x00' * padding)
+
+def jpeg(width, height):
+    return (b'\xff\xd8'
+        + b'\xff\xe0' + struct.pack('>H', 16) + b'JFIF\x00' + b'\x00' * 9
+        + b'\xff\xc0' + struct.pack('>HBHH', 17, 8, height, width) + b'\x00' * 10)
+
+def webp(chunk, payload):
+    return b'RIFF\x00\x00\x00\x00WEBP' + chunk + payload
+
+class Config:
+    def __init__(self, previews=[], git_hash=None):
+        self.root = '.'
+        self.previews = previews
+        self.git_hash = git_hash
+
+class ImageInfo_Test(unittest.TestCase):
+
+    def test_png(self):
+        self.assertEqual(image_info(png(640, 480)), ('png', (640, 480)))
+
+    def test_jpeg__skips_segments_before_frame(self):
+        self.assertEqual(image_info(jpeg(800, 600)), ('jpeg', (800, 600)))
+
+    def test_webp__lossy(self):
+        data = webp(b'VP8 ', b'\x00' * 10 + struct.pack('<HH', 320, 200))
+        self.assertEqual(image_info(data), ('webp', (320, 200)))
+
+    def test_webp__lossless(self):
+        bits = (320 - 1) | (200 - 1) << 14
+        data = webp(b'VP8L', b'\x00' * 5 + struct.pack('<I', bits))
+        self.assertEqual(image_info(data), ('webp', (320, 200)))
+
+    def test_webp__extended(self):
+        data = webp(b'VP8X', b'\x00' * 8 + (320 - 1).to_bytes(3, 'little') + (200 - 1).to_bytes(3, 'little'))
+        self.assertEqual(image_info(data), ('webp', (320, 200)))
+
+    def test_svg__size_attributes(self):
+        data = b'<?xml version="1.0"?>\n<svg width="64px" height="32" viewBox="0 0 8 4">'
+        self.assertEqual(image_info(data), ('svg', (64, 32)))
+
+    def test_svg__relative_size__uses_view_box(self):
+        data = b'<svg width="100%" height="100%" viewBox="0,0,16,16">'
+        self.assertEqual(image_info(data), ('svg', (16, 16)))
+
+    def test_svg__no_size(self):
+        self.assertEqual(image_info(b'<svg>'), ('svg', None))
+
+    def test_truncated(self):
+        self.assertEqual(image_info(b'\x89PNG\r\n\x1a\n\x00\x00\x00\x0dIHDR\x00'), (None, None))
+
+class Preflight_Test(GitRepository, unittest.TestCase):
+
+    def setUp(self):
+        git_reader.clear_cache()
+        self.addCleanup(git_reader.clear_cache)
+        self.enterContext(sandbox_dir())
+        self.init_repo()
+
+    def test_read_blobs(self):
+        revision = self.commit({'a.png': b'A', 'my dir/b c.png': b'B\nB'})
+        self.assertEqual(read_blobs('.', revision, ['a.png', 'my dir/b c.png', 'missing.png']), {
+            'a.png': b'A',
+            'my dir/b c.png': b'B\nB',
+            'missing.png': None,
+        })
+
+    def test_read_blobs__directory_is_missing(self):
+        revision = self.commit({'dir/a.png': b'A'})
+        self.assertEqual(read_blobs('.', revision, ['dir']), {'dir': None})
+
+    def test_read_blobs__committed_content_not_working_tree(self):
+        revision = self.commit({'a.png': b'committed'})
+        Path('a.png').write_bytes(b'modified')
+        Path('new.png').write_bytes(b'uncommitted')
+        self.assertEqual(read_blobs('.', revision, ['a.png', 'new.png']), {
+            'a.png': b'committed',
+            'new.png': None,
+        })
+
+    def test_check__all_fine(self):
+        revision = self.commit({
+            'icon.svg': b'<svg width="128" height="128"/>',
+            'shots/one.png': png(1280, 720),
+            'shots/one-thumb.jpg': jpeg(320, 180),
+        })
+        media = check(Config(git_hash=revision, previews=[
+            dict(repoimage='shots/one.png', repothumb='shots/one-thumb.jpg'),
+            dict(youtube='AD8awHLpFxs'),
+        ]))
+        self.assertEqual([
+            (item['use'], item['path'], item['format'], item['width'], item['height'])
+            for item in media
+        ], [
+            ('icon', 'icon.svg', 'svg', 128, 128),
+            ('image', 'shots/one.png', 'png', 1280, 720),
+            ('thumbnail', 'shots/one-thumb.jpg', 'jpeg', 320, 180),
+        ])
+        self.assertEqual(problems(media), [])
+
+    def test_check__missing(self):
+        revision = self.commit({'icon.svg': b'<svg width="128" height="128"/>'})
+        media = check(Config(git_hash=revision, previews=[dict(repoimage='shot.png')]))
+        self.assertEqual(problems(media), [
+            f"image shot.png: missing at {revision[:8]}",
+        ])
+
+    def test_check__oversized(self):
+        self.enterContext(mock.patch.dict(preflight.limits, image=(100, 4096)))
+        revision = self.commit({
+            'icon.svg': b'<svg width="2048" height="2048"/>',
+            'big.png': png(8000, 10, padding=200),
+        })
+        media = check(Config(git_hash=revision, previews=[dict(repoimage='big.png')]))
+        self.assertEqual(problems(media), [
+            "icon icon.svg: 2048x2048 px, over 1024",
+            "image big.png: 229 bytes, over 100",
+            "image big.png: 8000x10 px, over 4096",
+        ])
+
+    def test_check__not_an_image(self):
+        revision = self.commit({'icon.svg': b'not an image'})
+        self.assertEqual(problems(check(Config(git_hash=revision))), [
+            "icon icon.svg: not a supported image",
+        ])
+
+    def test_check__no_revision(self):
+        self.assertEqual(problems(check(Config())), [
+            "icon icon.svg: no git revision",
+        ])
+
+    def test_check__unknown_revision(self):
+        self.commit({'icon.svg': b'<svg width="128" height="128"/>'})
+        self.assertEqual(problems(check(Config(git_hash='0'*40))), [
+            "icon icon.svg: missing at 00000000",
+        ])
@@ -1,14 +1,111 @@
+import re
+from functools import lru_cache
+from urllib.parse import urlsplit, parse_qsl, urlencode
+from . import tracing
+
 def previews_edit(previews, old_previews, config):
-    previews = [
-        enhance_preview(p, config)
+    with tracing.span('diff', 'previews', new=len(previews), old=len(old_previews)):
+        previews = [
+            enhance_preview(dict(p), config) # keeps the config ones as given
+            for p in previews
+        ]
+        return diff_previews(previews, old_previews)
+
+def diff_previews(previews, old_previews):
+    """
+    Edit actions to turn old_previews into previews.
+    Previews are matched by their canonical link in linear time,
+    and unchanged ones generate no action.
+    """
+    index = index_previews(old_previews)
+    actions = [
+        preview_action(p, index)
         for p in previews
     ]
-    previews = [
-        preview_action(p, old_previews)
-        for p in previews
-    ] 
-    previews += to_remove_previews(previews, old_previews)
-    return previews
+    return [
+        action for action in actions if action
+    ] + to_remove_previews(previews, old_previews)
+
+_youtube_id_re = re.compile(r'^/(?:embed|shorts|live|v)/([^/]+)')
+
+@lru_cache(maxsize=8192)
+def link_key(link):
+    """
+    Canonical form of a preview link, so that equivalent urls match.
+
+    YouTube urls are reduced to the video id:
+
+    >>> link_key('https://www.youtube.com/watch?v=AD8awHLpFxs&t=10s')
+    'youtube:AD8awHLpFxs'
+    >>> link_key('https://youtu.be/AD8awHLpFxs')
+    'youtube:AD8awHLpFxs'
+    >>> link_key('https://www.youtube.com/embed/AD8awHLpFxs')
+    'youtube:AD8awHLpFxs'
+
+    Raw files in the repository, to repo, branch and path:
+
+    >>> link_key('https://raw.githubusercontent.com/user/repo/refs/heads/main/shot.png')
+    'raw:github.com/user/repo/main/shot.png'
+    >>> link_key('https://raw.githubusercontent.com/user/repo/main/shot.png')
+    'raw:github.com/user/repo/main/shot.png'
+    >>> link_key('https://github.com/user/repo/blob/main/shot.png?raw=true')
+    'raw:github.com/user/repo/main/shot.png'
+    >>> link_key('https://gitea.com/user/repo/raw/main//shot.png')
+    'raw:gitea.com/user/repo/main/shot.png'
+
+    Otherwise scheme, host case, trailing slashes and query order are ignored:
+
+    >>> link_key('HTTP://Example.com/a/?b=2&a=1#top')
+    'example.com/a?a=1&b=2'
+    """
+    url = urlsplit(link.strip())
+    host = url.netloc.lower().removeprefix('www.').removeprefix('m.')
+    path = re.sub('/+', '/', url.path).rstrip('/')
+    query = parse_qsl(url.query)
+
+    if host in ('youtube.com', 'youtube-nocookie.com'):
+        video = dict(query).get('v')
+        found = _youtube_id_re.match(path)
+        if found:
+            video = found.group(1)
+        if video:
+            return f'youtube:{video}'
+    if host == 'youtu.be' and path:
+        return f'youtube:{path[1:]}'
+
+    if host == 'raw.githubusercontent.com':
+        user, repo, rest = (path[1:].split('/', 2) + ['', ''])[:3]
+        return f"raw:github.com/{user}/{repo}/{rest.removeprefix('refs/heads/')}"
+    parts = path[1:].split('/', 3)
+    if len(parts) == 4 and parts[2] in ('raw', 'blob'):
+        user, repo, kind, rest = parts
+        if kind == 'raw' or dict(query).get('raw') == 'true':
+            return f"raw:{host}/{user}/{repo}/{rest.removeprefix('refs/heads/')}"
+
+    query = urlencode(sorted(query))
+    return host + path + (f'?{query}' if query else '')
+
+def index_previews(old_previews):
+    """Maps the canonical link of the old previews to them"""
+    index = {}
+    for old in old_previews:
+        index.setdefault(link_key(old['link']), old)
+    return index
+
+# Fields that are action bookkeeping, not preview content
+_action_fields = 'operation', 'enabled', 'edit_preview_id'
+
+def is_unchanged(preview, old):
+    """Whether the fields defined in preview are the same in the old one"""
+    for name, value in preview.items():
+        if name in _action_fields:
+            continue
+        former = old.get(name)
+        if name in ('link', 'thumbnail') and value and former:
+            value, former = link_key(value), link_key(former)
+        if value != former:
+            return False
+    return True
 
 def enhance_preview(preview, context):
     """
@@ -48,14 +145,20 @@ def preview_action(preview, old_previews):
     """
     Turns a preview in metadata into an action to perform
     (insert, update) with existing previews in the library
-    based on matching link field.
+    based on matching canonical link.
+    Returns None if the matching preview is unchanged.
+    old_previews may be a list or an index_previews result.
     """
     if 'operation' in preview:
         return preview # alredy an op
 
-    for old in old_previews:
-        if old['link'] != preview['link']:
-            continue
+    if not isinstance(old_previews, dict):
+        old_previews = index_previews(old_previews)
+
+    old = old_previews.get(link_key(preview['link']))
+    if old is not None:
+        if is_unchanged(preview, old):
+            return None
         return dict(
             preview,
             edit_preview_id=old['preview_id'],
@@ -74,6 +177,11 @@ def to_remove_previews(previews, old_previews):
     Generates delete edition action to those existing
     previews not defined in the new metadata.
     """
+    links = {
+        link_key(preview['link'])
+        for preview in previews
+        if preview.get('link')
+    }
     return [
         dict(
             edit_preview_id=old['preview_id'],
@@ -81,9 +189,6 @@ def to_remove_previews(previews, old_previews):
             enabled=True,
         )
         for old in old_previews
-        if all(
-            old['link']!=preview['link']
-            for preview in previews
-        )
+        if link_key(old['link']) not in links
     ]
 
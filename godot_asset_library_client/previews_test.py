@@ -1,5 +1,5 @@
 import unittest
-from .previews import preview_action, to_remove_previews
+from .previews import preview_action, to_remove_previews, diff_previews
 from yamlns import ns
 
 class Previews_Test(unittest.TestCase):
@@ -87,3 +87,92 @@ class Previews_Test(unittest.TestCase):
               operation: delete
         """)
 
+
+    def test__preview_action__unchanged__noop(self):
+        result = preview_action(
+            preview = ns(
+                type='image',
+                link='A',
+            ),
+            old_previews=[
+                ns(
+                    preview_id=666,
+                    type='image',
+                    link='A',
+                    thumbnail='A-thumb',
+                ),
+            ],
+        )
+        self.assertEqual(result, None)
+
+    def test__preview_action__equivalent_link__noop(self):
+        result = preview_action(
+            preview = ns(
+                type='video',
+                link='https://www.youtube.com/watch?v=AD8awHLpFxs',
+            ),
+            old_previews=[
+                ns(
+                    preview_id=666,
+                    type='video',
+                    link='https://youtu.be/AD8awHLpFxs',
+                ),
+            ],
+        )
+        self.assertEqual(result, None)
+
+    def test__preview_action__equivalent_link_changed_thumbnail__update(self):
+        result = preview_action(
+            preview = ns(
+                link='https://raw.githubusercontent.com/user/repo/refs/heads/main/shot.png',
+                thumbnail='B',
+            ),
+            old_previews=[
+                ns(
+                    preview_id=666,
+                    link='https://raw.githubusercontent.com/user/repo/main/shot.png',
+                    thumbnail='A',
+                ),
+            ],
+        )
+        self.assertNsEqual(result, """
+            enabled: true
+            operation: update
+            edit_preview_id: 666
+            link: https://raw.githubusercontent.com/user/repo/refs/heads/main/shot.png
+            thumbnail: B
+        """)
+
+    def test__to_remove_previews__equivalent_link_kept(self):
+        result = to_remove_previews([
+            ns(link="https://github.com/user/repo/raw/main/A.png"),
+        ], [
+            ns(link="https://raw.githubusercontent.com/user/repo/main/A.png/", preview_id=666),
+        ])
+        self.assertEqual(result, [])
+
+    def test__diff_previews(self):
+        result = diff_previews([
+            ns(type='image', link="A"), # unchanged
+            ns(type='video', link="B"), # changed type
+            ns(type='image', link="C"), # new
+        ], [
+            ns(type='image', link="A", preview_id=1),
+            ns(type='image', link="B", preview_id=2),
+            ns(type='image', link="D", preview_id=3),
+        ])
+        self.assertNsEqual(ns(result=result), """
+            result:
+            - type: video
+              link: B
+              edit_preview_id: 2
+              operation: update
+              enabled: true
+            - type: image
+              link: C
+              operation: insert
+              enabled: true
+            - edit_preview_id: 3
+              operation: delete
+              enabled: true
+        """)
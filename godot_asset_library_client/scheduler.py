@@ -0,0 +1,188 @@
+"""
+Request scheduling for the Api: timeouts, a deadline,
+retries with backoff, and client side rate limiting.
+"""
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+import requests
+
+class DeadlineExceeded(Exception):
+    pass
+
+class TokenBucket:
+    """
+    Client side rate limit: up to `burst` requests at once,
+    refilled at `rate` requests per second.
+    Shared among threads, acquire blocks until a token is available.
+    """
+
+    def __init__(self, rate, burst=1, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Takes a token, returns the seconds waited for it"""
+        waited = 0.
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                wait = (1 - self.tokens) / self.rate
+            self._sleep(wait)
+            waited += wait
+
+class Deadline:
+    """Overall time limit, ie. for a command"""
+
+    def __init__(self, seconds, clock=time.monotonic):
+        self._clock = clock
+        self.end = clock() + seconds
+
+    def remaining(self):
+        return self.end - self._clock()
+
+def retry_after(response, now=time.time):
+    """
+    Seconds to wait requested by the Retry-After header, or None.
+
+    >>> class Response: headers = {'Retry-After': '3'}
+    >>> retry_after(Response)
+    3.0
+    >>> Response.headers = {'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'}
+    >>> retry_after(Response, now=lambda: 1445412478.)
+    2.0
+    >>> Response.headers = {}
+    >>> retry_after(Response) is None
+    True
+    """
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0., float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0., parsedate_to_datetime(value).timestamp() - now())
+    except (TypeError, ValueError):
+        return None
+
+class Scheduler:
+    """
+    Sends requests with timeouts, retrying transient failures.
+
+    - timeout: (connect, read) seconds for each attempt
+    - retries: further attempts after a transient failure
+    - backoff: base seconds for exponential backoff with full jitter
+    - max_backoff: maximum seconds between attempts
+    - max_retry_after: a longer Retry-After gives up instead of waiting
+    - bucket: an optional TokenBucket every attempt takes a token from
+    - deadline: an optional Deadline no attempt or wait can exceed
+
+    GETs are retried on connection errors, timeouts and retry_statuses.
+    POSTs, that could create an edit twice, are retried only when
+    the library did not process them: connect timeouts and 429.
+    """
+
+    retry_statuses = 429, 500, 502, 503, 504
+
+    def __init__(self,
+            timeout=(10, 60),
+            retries=4,
+            backoff=0.5,
+            max_backoff=30,
+            max_retry_after=120,
+            bucket=None,
+            deadline=None,
+            sleep=time.sleep,
+        ):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_retry_after = max_retry_after
+        self.bucket = bucket
+        self.deadline = deadline
+        self._sleep = sleep
+
+    def _retriable_status(self, method, status):
+        if method == 'POST':
+            return status == 429
+        return status in self.retry_statuses
+
+    def _retriable_error(self, method, error):
+        if method == 'POST':
+            return isinstance(error, requests.ConnectTimeout)
+        return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+    def _delay(self, attempt, response=None):
+        """Seconds to wait before the attempt, None to give up"""
+        requested = None if response is None else retry_after(response)
+        if requested is not None:
+            if requested > self.max_retry_after:
+                return None
+            return requested
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+
+    def _remaining(self):
+        if not self.deadline:
+            return None
+        remaining = self.deadline.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded("Deadline exceeded before the request")
+        return remaining
+
+    def _timeout(self):
+        connect, read = self.timeout
+        remaining = self._remaining()
+        if remaining is None:
+            return connect, read
+        return min(connect, remaining), min(read, remaining)
+
+    def send(self, method, attempt):
+        """
+        Calls attempt(timeout, number) until it returns a response
+        that needs no retry, or retries are exhausted,
+        returning the last response or raising the last error.
+        """
+        for number in range(self.retries + 1):
+            if self.bucket:
+                self.bucket.acquire()
+            try:
+                response = attempt(self._timeout(), number)
+            except requests.RequestException as error:
+                if not self._retriable_error(method, error):
+                    raise
+                if not self._wait(number, None):
+                    raise
+                continue
+            if not self._retriable_status(method, response.status_code):
+                return response
+            if not self._wait(number, response):
+                return response
+
+    def _wait(self, number, response):
+        """Waits before the next attempt, false if there should be none"""
+        if number >= self.retries:
+            return False
+        delay = self._delay(number, response)
+        if delay is None:
+            return False
+        if self.deadline and delay >= self.deadline.remaining():
+            return False
+        self._sleep(delay)
+        return True
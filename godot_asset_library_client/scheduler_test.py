@@ -0,0 +1,205 @@
+import unittest
+import contextlib
+import io
+import requests
+from .api import Api
+from .fakeserver import FakeLibraryServer
+from .scheduler import Scheduler, TokenBucket, Deadline, DeadlineExceeded
+from .testutils import FakeResponse
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TokenBucket_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def bucket(self, rate, burst=1):
+        return TokenBucket(rate, burst, clock=self.clock, sleep=self.clock.sleep)
+
+    def test_burst__no_wait(self):
+        bucket = self.bucket(rate=1, burst=3)
+        self.assertEqual([bucket.acquire() for i in range(3)], [0, 0, 0])
+
+    def test_over_burst__waits_for_refill(self):
+        bucket = self.bucket(rate=4, burst=2)
+        bucket.acquire()
+        bucket.acquire()
+        self.assertEqual(bucket.acquire(), 0.25)
+
+    def test_refills_with_time(self):
+        bucket = self.bucket(rate=2, burst=2)
+        bucket.acquire()
+        bucket.acquire()
+        self.clock.now += 1
+        self.assertEqual([bucket.acquire(), bucket.acquire()], [0, 0])
+
+
+class Scheduler_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.attempts = []
+
+    def scheduler(self, **kwds):
+        kwds.setdefault('backoff', 1)
+        return Scheduler(sleep=self.clock.sleep, **kwds)
+
+    def outcomes(self, *outcomes):
+        outcomes = list(outcomes)
+        def attempt(timeout, number):
+            self.attempts.append((timeout, number))
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+        return attempt
+
+    def test_success__single_attempt(self):
+        response = self.scheduler().send('GET', self.outcomes(FakeResponse('ok')))
+        self.assertEqual(response.json(), 'ok')
+        self.assertEqual(self.attempts, [((10, 60), 0)])
+
+    def test_get__retries_transient_status(self):
+        response = self.scheduler().send('GET', self.outcomes(
+            FakeResponse(status_code=502),
+            FakeResponse(status_code=503),
+            FakeResponse('ok'),
+        ))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.attempts), 3)
+
+    def test_backoff__exponential_with_jitter(self):
+        self.scheduler(retries=3).send('GET', self.outcomes(*[FakeResponse(status_code=503)]*4))
+        self.assertEqual(len(self.clock.sleeps), 3)
+        for attempt, sleep in enumerate(self.clock.sleeps):
+            self.assertLessEqual(0, sleep)
+            self.assertLessEqual(sleep, 2**attempt)
+
+    def test_retries_exhausted__last_response(self):
+        response = self.scheduler(retries=1).send('GET', self.outcomes(
+            FakeResponse(status_code=503),
+            FakeResponse(status_code=502),
+        ))
+        self.assertEqual(response.status_code, 502)
+
+    def test_client_error__not_retried(self):
+        response = self.scheduler().send('GET', self.outcomes(FakeResponse(status_code=404)))
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(len(self.attempts), 1)
+
+    def test_get__retries_connection_errors(self):
+        response = self.scheduler().send('GET', self.outcomes(
+            requests.ConnectionError('reset'),
+            requests.ReadTimeout('stalled'),
+            FakeResponse('ok'),
+        ))
+        self.assertEqual(response.status_code, 200)
+
+    def test_get__errors_exhausted__raised(self):
+        with self.assertRaises(requests.ConnectionError):
+            self.scheduler(retries=1).send('GET', self.outcomes(
+                requests.ConnectionError('reset'),
+                requests.ConnectionError('reset'),
+            ))
+
+    def test_post__not_retried_if_possibly_processed(self):
+        response = self.scheduler().send('POST', self.outcomes(FakeResponse(status_code=502)))
+        self.assertEqual(response.status_code, 502)
+        with self.assertRaises(requests.ReadTimeout):
+            self.scheduler().send('POST', self.outcomes(requests.ReadTimeout('stalled')))
+
+    def test_post__retried_if_not_processed(self):
+        response = self.scheduler().send('POST', self.outcomes(
+            requests.ConnectTimeout('unreachable'),
+            FakeResponse(status_code=429),
+            FakeResponse('ok'),
+        ))
+        self.assertEqual(response.status_code, 200)
+
+    def test_retry_after__honoured(self):
+        self.scheduler().send('GET', self.outcomes(
+            FakeResponse(status_code=429, headers={'Retry-After': '7'}),
+            FakeResponse('ok'),
+        ))
+        self.assertEqual(self.clock.sleeps, [7])
+
+    def test_retry_after__too_long_gives_up(self):
+        response = self.scheduler(max_retry_after=60).send('GET', self.outcomes(
+            FakeResponse(status_code=429, headers={'Retry-After': '3600'}),
+        ))
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_deadline__limits_timeouts(self):
+        scheduler = self.scheduler(deadline=Deadline(5, clock=self.clock))
+        scheduler.send('GET', self.outcomes(FakeResponse('ok')))
+        self.assertEqual(self.attempts, [((5, 5), 0)])
+
+    def test_deadline__no_wait_beyond(self):
+        scheduler = self.scheduler(deadline=Deadline(5, clock=self.clock))
+        response = scheduler.send('GET', self.outcomes(
+            FakeResponse(status_code=429, headers={'Retry-After': '10'}),
+        ))
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_deadline__exceeded(self):
+        scheduler = self.scheduler(deadline=Deadline(5, clock=self.clock))
+        self.clock.now = 6
+        with self.assertRaises(DeadlineExceeded):
+            scheduler.send('GET', self.outcomes(FakeResponse('ok')))
+
+    def test_bucket__taken_for_every_attempt(self):
+        bucket = TokenBucket(rate=1, burst=1, clock=self.clock, sleep=self.clock.sleep)
+        scheduler = self.scheduler(bucket=bucket, backoff=0)
+        scheduler.send('GET', self.outcomes(FakeResponse(status_code=503), FakeResponse('ok')))
+        self.assertEqual(self.clock.sleeps, [0, 1])
+
+
+class ApiScheduler_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.enterContext(contextlib.redirect_stdout(io.StringIO()))
+        self.server = self.enterContext(FakeLibraryServer())
+        self.server.library.add_asset('1', title='My Asset')
+        self.api = self.enterContext(Api(self.server.base,
+            scheduler=Scheduler(backoff=0.01)))
+
+    def test_get__transient_failures_retried(self):
+        self.server.fail('asset/1', status=502, times=2)
+        self.assertEqual(self.api.asset('1')['title'], 'My Asset')
+        self.assertEqual(self.server.counts()['GET asset/{id}'], 3)
+
+    def test_get__read_timeout_retried(self):
+        self.api.scheduler.timeout = (1, 0.05)
+        self.server.latency = 0.2
+        with self.assertRaises(requests.ReadTimeout):
+            self.api.asset('1')
+        self.assertEqual(self.server.counts()['GET asset/{id}'], 5)
+
+    def test_post__rate_limited_retried(self):
+        self.api.login('user', 'password')
+        self.server.fail('asset/1', status=429, headers={'Retry-After': '0'})
+        result = self.api.post('asset/1', json=dict(title='New'))
+        self.assertEqual(result['url'], f"asset/edit/{result['id']}")
+        self.assertEqual(len(self.server.library.edits), 1)
+
+    def test_post__server_error_not_retried(self):
+        self.api.login('user', 'password')
+        self.server.fail('asset/1', status=500)
+        with self.assertRaises(requests.HTTPError):
+            self.api.post('asset/1', json=dict(title='New'))
+        self.assertEqual(self.server.counts()['POST asset/{id}'], 1)
@@ -0,0 +1,77 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from . import tracing
+
+class Stages:
+    """
+    Dependency graph of stages run concurrently on a thread pool.
+    Each stage starts as soon as the stages it depends on are done,
+    and receives their results as keyword arguments.
+
+    >>> stages = Stages()
+    >>> stages.add('a', lambda: 1)
+    >>> stages.add('b', lambda: 2)
+    >>> stages.add('sum', lambda a, b: a+b, after=['a', 'b'])
+    >>> stages.run()['sum']
+    3
+    """
+
+    def __init__(self):
+        self._stages = {}
+        self.timings = {}
+
+    def add(self, name, function, after=()):
+        if name in self._stages:
+            raise ValueError(f"Stage '{name}' already defined")
+        for dependency in after:
+            if dependency not in self._stages:
+                raise ValueError(f"Stage '{name}' depends on undefined stage '{dependency}'")
+        self._stages[name] = function, tuple(after)
+
+    def _run_stage(self, name, function, dependencies):
+        kwds = {
+            dependency: future.result()
+            for dependency, future in dependencies.items()
+        }
+        start = time.perf_counter()
+        try:
+            with tracing.span(name, 'stage'):
+                return function(**kwds)
+        finally:
+            self.timings[name] = start - self._start, time.perf_counter() - self._start
+
+    def run(self):
+        """
+        Runs all the stages and returns a dict with their results.
+        If any stage fails, the first failed one (in definition order)
+        raises once the non-dependent stages are done.
+        """
+        self._start = time.perf_counter()
+        futures = {}
+        # One worker per stage: waiting on dependencies never starves the pool
+        with ThreadPoolExecutor(max_workers=len(self._stages) or 1) as executor:
+            for name, (function, after) in self._stages.items():
+                futures[name] = executor.submit(self._run_stage, name, function, {
+                    dependency: futures[dependency]
+                    for dependency in after
+                })
+        return {
+            name: future.result()
+            for name, future in futures.items()
+        }
+
+    def report(self, width=40):
+        """Text chart of the stage timings, showing their overlap"""
+        if not self.timings:
+            return ''
+        total = max(end for start, end in self.timings.values()) or 1
+        lines = []
+        for name in self._stages:
+            if name not in self.timings: continue
+            start, end = self.timings[name]
+            first = int(start / total * width)
+            last = max(first+1, int(end / total * width))
+            bar = ' '*first + '#'*(last-first) + ' '*(width-last)
+            lines.append(f"{name:<16} {start*1000:8.1f} {end*1000:8.1f} ms |{bar}|")
+        lines.append(f"{'total':<16} {'':>8} {total*1000:8.1f} ms")
+        return '\n'.join(lines)
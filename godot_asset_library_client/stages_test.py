@@ -0,0 +1,65 @@
+import unittest
+import time
+from .stages import Stages
+
+class Stages_Test(unittest.TestCase):
+
+    def sleeper(self, seconds, result=None):
+        def stage(**kwds):
+            time.sleep(seconds)
+            return result
+        return stage
+
+    def test_dependencies_receive_results(self):
+        stages = Stages()
+        stages.add('a', lambda: 'A')
+        stages.add('b', lambda a: a+'B', after=['a'])
+        stages.add('c', lambda a, b: a+b+'C', after=['a', 'b'])
+        self.assertEqual(stages.run(), dict(a='A', b='AB', c='AABC'))
+
+    def test_independent_stages_overlap(self):
+        stages = Stages()
+        stages.add('a', self.sleeper(.1))
+        stages.add('b', self.sleeper(.1))
+        stages.add('c', self.sleeper(.1))
+        start = time.perf_counter()
+        stages.run()
+        self.assertLess(time.perf_counter() - start, .25)
+
+    def test_dependent_stages_wait(self):
+        stages = Stages()
+        stages.add('a', self.sleeper(.05))
+        stages.add('b', self.sleeper(0), after=['a'])
+        stages.run()
+        a_start, a_end = stages.timings['a']
+        b_start, b_end = stages.timings['b']
+        self.assertGreaterEqual(b_start, a_end)
+
+    def test_undefined_dependency(self):
+        stages = Stages()
+        with self.assertRaises(ValueError) as ctx:
+            stages.add('b', lambda a: a, after=['a'])
+        self.assertEqual(str(ctx.exception),
+            "Stage 'b' depends on undefined stage 'a'")
+
+    def test_failure_propagates(self):
+        def fail():
+            raise RuntimeError("boom")
+        stages = Stages()
+        stages.add('a', fail)
+        stages.add('b', lambda a: a, after=['a'])
+        stages.add('independent', lambda: 'done')
+        with self.assertRaises(RuntimeError):
+            stages.run()
+        self.assertIn('independent', stages.timings)
+
+    def test_report(self):
+        stages = Stages()
+        stages.add('a', self.sleeper(.01))
+        stages.add('b', self.sleeper(.01), after=['a'])
+        stages.run()
+        lines = stages.report(width=10).splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[0].startswith('a '))
+        self.assertTrue(lines[0].split('|')[1].startswith('#'))
+        self.assertTrue(lines[1].split('|')[1].endswith('#'))
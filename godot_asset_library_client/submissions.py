@@ -0,0 +1,110 @@
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+from .utils import cache_dir, read_json, write_json_atomic
+
+# Payload fields compared against the ones of the live asset or edit.
+# download_hash is deprecated and previews are edit actions, not state.
+compared_fields = [
+    'title',
+    'description',
+    'category_id',
+    'godot_version',
+    'version_string',
+    'cost',
+    'download_provider',
+    'download_commit',
+    'browse_url',
+    'issues_url',
+    'icon_url',
+]
+
+def payload_digest(payload):
+    """
+    Digest of the payload independent of the key order.
+
+    >>> payload_digest(dict(a=1, b='ñ')) == payload_digest(dict(b='ñ', a=1))
+    True
+    >>> payload_digest(dict(a=1)) == payload_digest(dict(a='1'))
+    False
+    """
+    canonical = json.dumps(payload,
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(',', ':'),
+    )
+    return hashlib.sha256(canonical.encode('utf8')).hexdigest()
+
+def _normalize(value):
+    """The library returns ids and numbers as strings, and empty values as null"""
+    if value is None:
+        return ''
+    return str(value).strip()
+
+def live_state(asset, edit=None):
+    """
+    The asset as it will be once the pending edit, if any, is accepted.
+    Edits have null on the fields they do not change.
+    """
+    state = dict(asset or {})
+    for key, value in (edit or {}).items():
+        if value is not None:
+            state[key] = value
+    return state
+
+def changed_fields(payload, live):
+    """
+    Names of the payload fields that would change the live asset.
+    Any preview action is a change.
+
+    >>> changed_fields(dict(title='A', category_id=5, previews=[]), dict(title='A', category_id='5'))
+    []
+    >>> changed_fields(dict(title='B', issues_url=''), dict(title='A', issues_url=None))
+    ['title']
+    >>> changed_fields(dict(title='A', previews=[dict(operation='insert')]), dict(title='A'))
+    ['previews']
+    """
+    changed = [
+        field for field in compared_fields
+        if field in payload
+        and _normalize(payload[field]) != _normalize(live.get(field))
+    ]
+    if payload.get('previews'):
+        changed.append('previews')
+    return changed
+
+
+class SubmissionLog:
+    """
+    Records the last successful submission for each asset version,
+    keyed by library url, so unchanged payloads are not sent again.
+    """
+
+    def __init__(self, path=None):
+        self.path = Path(path or cache_dir()/'submissions.json')
+        self._lock = threading.Lock() # concurrent uploads record too
+
+    def _key(self, base, asset_id, version):
+        return f'{base} {asset_id} {version}'
+
+    def _load(self):
+        return read_json(self.path, {})
+
+    def _save(self, submissions):
+        write_json_atomic(self.path, submissions)
+
+    def last(self, base, asset_id, version):
+        """The last submission entry (digest, url, submitted_at) or None"""
+        return self._load().get(self._key(base, asset_id, version))
+
+    def record(self, base, asset_id, version, digest, url=None):
+        with self._lock:
+            submissions = self._load()
+            submissions[self._key(base, asset_id, version)] = dict(
+                digest=digest,
+                url=url,
+                submitted_at=time.time(),
+            )
+            self._save(submissions)
@@ -0,0 +1,47 @@
+import unittest
+from .submissions import SubmissionLog, live_state, changed_fields
+from .testutils import temp_path
+
+base = 'https://library/api/'
+
+class LiveState_Test(unittest.TestCase):
+
+    def test_without_edit(self):
+        self.assertEqual(live_state(dict(title='A')), dict(title='A'))
+
+    def test_edit_overrides_non_null_fields(self):
+        self.assertEqual(
+            live_state(dict(title='A', cost='MIT'), dict(title='B', cost=None)),
+            dict(title='B', cost='MIT'),
+        )
+
+    def test_changed_fields__edit_applied(self):
+        live = live_state(dict(title='A', version_string='1.0'), dict(title='B'))
+        self.assertEqual(changed_fields(dict(title='B', version_string='1.0'), live), [])
+
+
+class SubmissionLog_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = self.enterContext(temp_path())
+        self.log = SubmissionLog(self.directory/'sub'/'submissions.json')
+
+    def test_last__missing(self):
+        self.assertEqual(self.log.last(base, '1', '1.0'), None)
+
+    def test_record_and_last(self):
+        self.log.record(base, '1', '1.0', 'DIGEST', 'asset/edit/3')
+        last = self.log.last(base, '1', '1.0')
+        self.assertEqual(last['digest'], 'DIGEST')
+        self.assertEqual(last['url'], 'asset/edit/3')
+
+    def test_keyed_by_base_asset_and_version(self):
+        self.log.record(base, '1', '1.0', 'DIGEST')
+        self.assertEqual(self.log.last(base, '1', '1.1'), None)
+        self.assertEqual(self.log.last(base, '2', '1.0'), None)
+        self.assertEqual(self.log.last('https://staging/api/', '1', '1.0'), None)
+
+    def test_record__replaces_previous(self):
+        self.log.record(base, '1', '1.0', 'OLD')
+        self.log.record(base, '1', '1.0', 'NEW')
+        self.assertEqual(self.log.last(base, '1', '1.0')['digest'], 'NEW')
@@ -3,6 +3,7 @@
 from __future__ import unicode_literals
 from contextlib import contextmanager, ExitStack
 import os
+import subprocess
 from pathlib import Path
 
 # Polyfill for Python<3.11
@@ -134,5 +135,123 @@ def sandbox_dir():
         with working_dir(path):
             yield path
 
+class GitRepository:
+    """
+    TestCase mixin to build git repositories,
+    running git with a configured committer identity.
+    """
+
+    def git(self, *args):
+        """Runs git and returns its stripped output"""
+        return subprocess.check_output(['git',
+            '-c', 'user.name=Tester', '-c', 'user.email=tester@example.com',
+            *args]).decode().strip()
+
+    def init_repo(self, path='.', branch='main', origin=None):
+        self.git('init', '-q', '-b', branch, str(path))
+        if origin:
+            self.git('-C', str(path), 'remote', 'add', 'origin', origin)
+
+    def commit(self, files={}, message='files'):
+        """
+        Writes and commits files, a dict of name to str or bytes content,
+        and returns the new revision hash.
+        """
+        for name, content in files.items():
+            path = Path(name)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if isinstance(content, bytes):
+                path.write_bytes(content)
+            else:
+                path.write_text(content)
+            self.git('add', name)
+        self.git('commit', '-q', '--allow-empty', '-m', message)
+        return self.git('rev-parse', 'HEAD')
+
+class LibraryProject(GitRepository):
+    """
+    TestCase mixin setting up, in a sandbox, a committed project
+    for asset 1 and a fake library to upload it to.
+    """
+
+    category = 1
+
+    def setUp(self):
+        from . import git_reader
+        from .fakeserver import FakeLibraryServer
+        git_reader.clear_cache()
+        self.addCleanup(git_reader.clear_cache)
+        self.sandbox = self.enterContext(sandbox_dir())
+        self.server = self.enterContext(FakeLibraryServer())
+        self.server.library.add_asset('1', title='Old title')
+        Path('project.godot').write_text(
+            '[application]\n'
+            'config/name="My Asset"\n'
+            'config/version="1.1"\n'
+            'config/features=PackedStringArray("4.3")\n'
+        )
+        Path('asset-metadata.yaml').write_text(
+            'asset_id: 1\n'
+            f'category: {self.category}\n'
+            'project_license: MIT\n'
+        )
+        self.init_repo(origin='https://github.com/me/asset.git')
+        self.commit({
+            'icon.svg': '<svg xmlns="http://www.w3.org/2000/svg" width="128" height="128"/>',
+        }, message='init')
+
+    def cli(self, *args, cache='cache'):
+        """Runs the command line against the fake library"""
+        from typer.testing import CliRunner
+        from .cli import app
+        return CliRunner().invoke(app, args, env=dict(
+            GODOT_ASSET_LIB_URL=self.server.base,
+            GODOT_ASSET_LIB_USER='user',
+            GODOT_ASSET_LIB_PASSWORD='password',
+            XDG_CACHE_HOME=str(self.sandbox/cache),
+        ))
+
+class FakeResponse:
+    """Minimal stand-in for a requests json Response"""
+
+    def __init__(self, body=None, status_code=200, headers={}):
+        import json
+        self.status_code = status_code
+        self.headers = headers
+        self.text = json.dumps(body)
+        self.content = self.text.encode('utf8')
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            import requests
+            raise requests.HTTPError(f"{self.status_code} Error", response=self)
+
+    def json(self):
+        import json
+        return json.loads(self.text)
+
+class FakeSession:
+    """
+    Stand-in for a requests Session answering the queued responses
+    in order, and recording the requests as (method, url, kwds)
+    """
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def _request(self, method, url, **kwds):
+        self.requests.append((method, url, kwds))
+        return self.responses.pop(0)
+
+    def get(self, url, **kwds):
+        return self._request('GET', url, **kwds)
+
+    def post(self, url, **kwds):
+        return self._request('POST', url, **kwds)
+
+    def close(self):
+        pass
+
 
 # vim: ts=4 sw=4 et
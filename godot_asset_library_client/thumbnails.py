@@ -0,0 +1,145 @@
+"""
+Thumbnails for the repository image previews lacking one,
+generated locally, so the library pages do not load
+full size screenshots as thumbnails.
+
+Needs Pillow: pip install godot-asset-library-client[thumbnails]
+"""
+import hashlib
+import importlib.util
+import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from . import git_reader
+from . import tracing
+from .preflight import image_info
+from .utils import cache_dir
+
+def thumbnail_key(data, size):
+    """Content address of the thumbnail of an image"""
+    return hashlib.sha256(f'{size}:'.encode() + data).hexdigest()
+
+def thumbnail_path(directory, repoimage, key, format):
+    """
+    Repository path of the thumbnail. Different content gets a different name,
+    so an existing file is up to date, and cached urls are never stale.
+
+    >>> thumbnail_path('thumbs', 'shots/menu.png', 'abcdef0123456789ff', 'png')
+    'thumbs/menu-abcdef0123456789.png'
+    """
+    return f"{directory}/{Path(repoimage).stem}-{key[:16]}.{format}"
+
+def thumbnail_format(data):
+    """Photos as jpeg, anything else as png to keep transparency"""
+    format, size = image_info(data)
+    return 'jpg' if format == 'jpeg' else 'png'
+
+def make_thumbnail(data, size, format):
+    """Image data scaled down to fit size x size. Run in worker processes."""
+    from PIL import Image
+    image = Image.open(io.BytesIO(data))
+    image.thumbnail((size, size))
+    if format == 'jpg' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    output = io.BytesIO()
+    image.save(output, 'JPEG' if format == 'jpg' else 'PNG', optimize=True)
+    return output.getvalue()
+
+class Thumbnails:
+    """
+    Generates the thumbnails into `directory` of the repository at root.
+    Generated files are also kept in a cache by content address,
+    so unchanged images are never processed again,
+    even if the repository copies are removed.
+    """
+
+    def __init__(self, root, directory, size=480, jobs=None, cache=None):
+        self.root = Path(root)
+        self.directory = directory.strip('/')
+        self.size = size
+        self.jobs = jobs
+        self.cache = Path(cache) if cache else cache_dir()/'thumbnails'
+        self.generated = 0
+
+    def _reuse(self, key, format, target):
+        """Whether an already generated thumbnail is placed at target"""
+        if target.exists():
+            return True
+        cached = self.cache/f'{key}.{format}'
+        if not cached.exists():
+            return False
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(cached.read_bytes())
+        return True
+
+    def _store(self, key, format, target, thumbnail):
+        self.cache.mkdir(parents=True, exist_ok=True)
+        (self.cache/f'{key}.{format}').write_bytes(thumbnail)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(thumbnail)
+
+    def paths(self, repoimages):
+        """
+        Maps each of the repository images to the path of its thumbnail,
+        generating, in a process pool, those not done yet.
+        Missing images get no thumbnail.
+        """
+        result = {}
+        pending = {}
+        for repoimage in dict.fromkeys(repoimages):
+            source = self.root/repoimage
+            if not source.is_file():
+                continue
+            data = source.read_bytes()
+            key = thumbnail_key(data, self.size)
+            format = thumbnail_format(data)
+            path = thumbnail_path(self.directory, repoimage, key, format)
+            result[repoimage] = path
+            if not self._reuse(key, format, self.root/path):
+                pending.setdefault(path, (key, format, data))
+        if not pending:
+            return result
+
+        if not importlib.util.find_spec('PIL'):
+            raise ImportError(
+                "Generating thumbnails needs Pillow: "
+                "pip install godot-asset-library-client[thumbnails]")
+        with tracing.span('thumbnails', 'previews', images=len(pending)):
+            items = list(pending.items())
+            with ProcessPoolExecutor(max_workers=self.jobs,
+                    mp_context=multiprocessing.get_context('spawn')) as executor:
+                thumbnails = executor.map(make_thumbnail,
+                    [data for path, (key, format, data) in items],
+                    [self.size] * len(items),
+                    [format for path, (key, format, data) in items],
+                )
+                for (path, (key, format, data)), thumbnail in zip(items, thumbnails):
+                    self._store(key, format, self.root/path, thumbnail)
+                    self.generated += 1
+        return result
+
+def lacks_thumbnail(preview):
+    return 'repoimage' in preview and 'repothumb' not in preview and 'thumbnail' not in preview
+
+def fill_thumbnails(previews, config, jobs=None):
+    """
+    Previews with repothumb set to a generated thumbnail
+    for those having repoimage but no thumbnail.
+    Does nothing unless config.thumbnails_dir is set,
+    nor for configs read at a revision, since the working tree may differ.
+    """
+    directory = getattr(config, 'thumbnails_dir', None)
+    if not directory or getattr(config, 'revision', None):
+        return previews
+    lacking = [preview['repoimage'] for preview in previews if lacks_thumbnail(preview)]
+    if not lacking:
+        return previews
+    root = git_reader.find_root(config.root) or config.root
+    paths = Thumbnails(root, directory, size=config.thumbnail_size, jobs=jobs).paths(lacking)
+    return [
+        dict(preview, repothumb=paths[preview['repoimage']])
+        if lacks_thumbnail(preview) and preview['repoimage'] in paths
+        else preview
+        for preview in previews
+    ]
@@ -0,0 +1,114 @@
+import importlib.util
+import io
+import os
+import unittest
+from unittest import mock
+from pathlib import Path
+from .preflight import image_info
+from .previews import previews_edit
+from .thumbnails import Thumbnails, fill_thumbnails
+from .testutils import sandbox_dir
+
+def image(width, height, format='PNG', color='red'):
+    from PIL import Image
+    output = io.BytesIO()
+    Image.new('RGB', (width, height), color).save(output, format)
+    return output.getvalue()
+
+class Config:
+    root = '.'
+    repo_raw = 'https://raw.example.com/repo/main'
+    thumbnails_dir = 'thumbs'
+    thumbnail_size = 100
+
+@unittest.skipUnless(importlib.util.find_spec('PIL'), "Pillow not installed")
+class Thumbnails_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.sandbox = self.enterContext(sandbox_dir())
+        Path('.git').mkdir()
+        Path('shots').mkdir()
+        self.enterContext(mock.patch.dict(os.environ, XDG_CACHE_HOME=str(self.sandbox/'cache')))
+
+    def thumbnails(self):
+        return Thumbnails('.', 'thumbs', size=100, jobs=2, cache=self.sandbox/'cache')
+
+    def test_paths__generated_scaled_down(self):
+        Path('shots/wide.png').write_bytes(image(1000, 500))
+        thumbnails = self.thumbnails()
+        [path] = thumbnails.paths(['shots/wide.png']).values()
+        self.assertRegex(path, r'^thumbs/wide-[0-9a-f]{16}\.png$')
+        self.assertEqual(image_info(Path(path).read_bytes()), ('png', (100, 50)))
+        self.assertEqual(thumbnails.generated, 1)
+
+    def test_paths__jpeg_kept_as_jpeg(self):
+        Path('shots/photo.jpg').write_bytes(image(400, 400, 'JPEG'))
+        [path] = self.thumbnails().paths(['shots/photo.jpg']).values()
+        self.assertTrue(path.endswith('.jpg'))
+        self.assertEqual(image_info(Path(path).read_bytes()), ('jpeg', (100, 100)))
+
+    def test_paths__unchanged_not_reprocessed(self):
+        Path('shots/a.png').write_bytes(image(300, 300))
+        first = self.thumbnails().paths(['shots/a.png'])
+        thumbnails = self.thumbnails()
+        self.assertEqual(thumbnails.paths(['shots/a.png']), first)
+        self.assertEqual(thumbnails.generated, 0)
+
+    def test_paths__removed_copy_restored_from_cache(self):
+        Path('shots/a.png').write_bytes(image(300, 300))
+        [path] = self.thumbnails().paths(['shots/a.png']).values()
+        Path(path).unlink()
+        thumbnails = self.thumbnails()
+        thumbnails.paths(['shots/a.png'])
+        self.assertEqual(thumbnails.generated, 0)
+        self.assertTrue(Path(path).exists())
+
+    def test_paths__changed_image_new_name(self):
+        Path('shots/a.png').write_bytes(image(300, 300))
+        [first] = self.thumbnails().paths(['shots/a.png']).values()
+        Path('shots/a.png').write_bytes(image(300, 300, color='blue'))
+        [second] = self.thumbnails().paths(['shots/a.png']).values()
+        self.assertNotEqual(first, second)
+
+    def test_paths__several_in_parallel(self):
+        names = [f'shots/{i}.png' for i in range(4)]
+        for i, name in enumerate(names):
+            Path(name).write_bytes(image(200 + i, 200))
+        thumbnails = self.thumbnails()
+        paths = thumbnails.paths(names)
+        self.assertEqual(list(paths), names)
+        self.assertEqual(thumbnails.generated, 4)
+
+    def test_paths__missing_image_skipped(self):
+        self.assertEqual(self.thumbnails().paths(['shots/missing.png']), {})
+
+    def test_fill__sets_repothumb(self):
+        Path('shots/a.png').write_bytes(image(300, 300))
+        previews = [dict(repoimage='shots/a.png')]
+        [preview] = fill_thumbnails(previews, Config)
+        self.assertRegex(preview['repothumb'], r'^thumbs/a-[0-9a-f]{16}\.png$')
+        self.assertEqual(previews, [dict(repoimage='shots/a.png')])
+
+    def test_fill__explicit_thumbnails_kept(self):
+        Path('shots/a.png').write_bytes(image(300, 300))
+        previews = [
+            dict(repoimage='shots/a.png', repothumb='shots/a-small.png'),
+            dict(repoimage='shots/a.png', thumbnail='https://example.com/a.png'),
+            dict(youtube='AD8awHLpFxs'),
+        ]
+        self.assertEqual(fill_thumbnails(previews, Config), previews)
+        self.assertFalse(Path('thumbs').exists())
+
+    def test_fill__no_directory_configured(self):
+        Path('shots/a.png').write_bytes(image(300, 300))
+        class config(Config):
+            thumbnails_dir = None
+        previews = [dict(repoimage='shots/a.png')]
+        self.assertEqual(fill_thumbnails(previews, config), previews)
+
+    def test_previews_edit__links_generated_thumbnail(self):
+        Path('shots/a.png').write_bytes(image(300, 300))
+        previews = fill_thumbnails([dict(repoimage='shots/a.png')], Config)
+        [action] = previews_edit(previews, [], Config)
+        self.assertEqual(action['link'], 'https://raw.example.com/repo/main/shots/a.png')
+        self.assertRegex(action['thumbnail'], r'^https://raw.example.com/repo/main/thumbs/a-[0-9a-f]{16}\.png$')
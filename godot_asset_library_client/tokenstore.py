@@ -0,0 +1,45 @@
+import time
+from pathlib import Path
+from .utils import cache_dir, read_json, write_json_atomic
+
+class TokenStore:
+    """
+    Keeps login tokens between runs, keyed by library url and user name,
+    in a file only readable by the user.
+    Tokens older than ttl seconds are not reused.
+    """
+
+    def __init__(self, path=None, ttl=12*60*60):
+        self.path = Path(path or cache_dir()/'tokens.json')
+        self.ttl = ttl
+
+    def _key(self, base, username):
+        return f'{username}@{base}'
+
+    def _load(self):
+        return read_json(self.path, {})
+
+    def _save(self, tokens):
+        write_json_atomic(self.path, tokens, mode=0o600)
+
+    def get(self, base, username):
+        """The stored token, or None if missing or expired"""
+        entry = self._load().get(self._key(base, username))
+        if not entry:
+            return None
+        if time.time() - entry['issued_at'] >= self.ttl:
+            return None
+        return entry['token']
+
+    def put(self, base, username, token):
+        tokens = self._load()
+        tokens[self._key(base, username)] = dict(
+            token=token,
+            issued_at=time.time(),
+        )
+        self._save(tokens)
+
+    def forget(self, base, username):
+        tokens = self._load()
+        if tokens.pop(self._key(base, username), None):
+            self._save(tokens)
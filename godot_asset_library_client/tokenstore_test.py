@@ -0,0 +1,121 @@
+import unittest
+import contextlib
+import io
+import json
+import stat
+import time
+from .api import Api
+from .tokenstore import TokenStore
+from .testutils import temp_path, FakeResponse, FakeSession
+
+base = 'https://library/api/'
+
+class TokenStore_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = self.enterContext(temp_path())
+        self.store = TokenStore(self.directory/'sub'/'tokens.json')
+
+    def test_get__missing(self):
+        self.assertEqual(self.store.get(base, 'alice'), None)
+
+    def test_put_and_get(self):
+        self.store.put(base, 'alice', 'TOKEN')
+        self.assertEqual(self.store.get(base, 'alice'), 'TOKEN')
+
+    def test_keyed_by_user_and_base(self):
+        self.store.put(base, 'alice', 'TOKEN')
+        self.assertEqual(self.store.get(base, 'bob'), None)
+        self.assertEqual(self.store.get('https://staging/api/', 'alice'), None)
+
+    def test_get__expired(self):
+        self.store.put(base, 'alice', 'TOKEN')
+        tokens = json.loads(self.store.path.read_text())
+        for entry in tokens.values():
+            entry['issued_at'] = time.time() - self.store.ttl - 1
+        self.store.path.write_text(json.dumps(tokens))
+        self.assertEqual(self.store.get(base, 'alice'), None)
+
+    def test_forget(self):
+        self.store.put(base, 'alice', 'TOKEN')
+        self.store.forget(base, 'alice')
+        self.assertEqual(self.store.get(base, 'alice'), None)
+
+    def test_file_only_readable_by_user(self):
+        self.store.put(base, 'alice', 'TOKEN')
+        self.assertEqual(stat.S_IMODE(self.store.path.stat().st_mode), 0o600)
+        self.assertEqual(stat.S_IMODE(self.store.path.parent.stat().st_mode), 0o700)
+
+
+class ApiTokenStore_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = self.enterContext(temp_path())
+        self.enterContext(contextlib.redirect_stdout(io.StringIO()))
+        self.store = TokenStore(self.directory/'tokens.json')
+
+    def api(self, *responses):
+        self.session = FakeSession(*responses)
+        return Api(base, session=self.session, token_store=self.store)
+
+    def posted(self):
+        return [
+            (url.removeprefix(base), kwds['json'])
+            for method, url, kwds in self.session.requests
+        ]
+
+    def test_login__stores_token(self):
+        api = self.api(FakeResponse(dict(token='NEW')))
+        api.login('alice', 'secret')
+        self.assertEqual(api.token, 'NEW')
+        self.assertEqual(self.store.get(base, 'alice'), 'NEW')
+
+    def test_login__reuses_stored_token(self):
+        self.store.put(base, 'alice', 'STORED')
+        api = self.api()
+        api.login('alice', 'secret')
+        self.assertEqual(api.token, 'STORED')
+        self.assertEqual(self.session.requests, [])
+
+    def test_rejected_token__login_and_retry_once(self):
+        self.store.put(base, 'alice', 'STORED')
+        api = self.api(
+            FakeResponse(dict(error='Invalid token'), status_code=403),
+            FakeResponse(dict(token='NEW')),
+            FakeResponse(dict(url='asset/edit/5')),
+        )
+        api.login('alice', 'secret')
+        result = api.post('asset/1', json=dict(title='A'))
+        self.assertEqual(result, dict(url='asset/edit/5'))
+        self.assertEqual(self.posted(), [
+            ('asset/1', dict(title='A', token='STORED')),
+            ('/login', dict(username='alice', password='secret')),
+            ('asset/1', dict(title='A', token='NEW')),
+        ])
+        self.assertEqual(self.store.get(base, 'alice'), 'NEW')
+
+    def test_reused_token_accepted_then_rejected__no_retry(self):
+        self.store.put(base, 'alice', 'STORED')
+        api = self.api(
+            FakeResponse(dict(url='asset/edit/5')),
+            FakeResponse(dict(error='Forbidden'), status_code=403),
+        )
+        api.login('alice', 'secret')
+        api.post('asset/1', json=dict(title='A'))
+        with self.assertRaises(Exception):
+            api.post('asset/2', json=dict(title='B'))
+        self.assertEqual(self.posted(), [
+            ('asset/1', dict(title='A', token='STORED')),
+            ('asset/2', dict(title='B', token='STORED')),
+        ])
+        self.assertEqual(self.store.get(base, 'alice'), 'STORED')
+
+    def test_fresh_token_rejected__no_retry(self):
+        api = self.api(
+            FakeResponse(dict(token='NEW')),
+            FakeResponse(dict(error='Forbidden'), status_code=403),
+        )
+        api.login('alice', 'secret')
+        with self.assertRaises(Exception):
+            api.post('asset/1', json=dict(title='A'))
+        self.assertEqual(len(self.session.requests), 2)
@@ -0,0 +1,167 @@
+"""
+Lightweight instrumentation of where the time goes.
+
+Spans are only recorded while tracing is enabled,
+otherwise `span` costs a flag check.
+
+>>> enable()
+>>> with span('sleep', category='demo', seconds=0):
+...     pass
+>>> [(e['name'], e['category'], e['args']) for e in events()]
+[('sleep', 'demo', {'seconds': 0})]
+>>> disable()
+"""
+import contextlib
+import functools
+import json
+import os
+import re
+import threading
+import time
+
+_enabled = False
+_events = []
+_origin = time.perf_counter()
+
+def enable(reset=True):
+    global _enabled, _origin
+    if reset:
+        _events.clear()
+        _origin = time.perf_counter()
+    _enabled = True
+
+def disable():
+    global _enabled
+    _enabled = False
+
+def is_enabled():
+    return _enabled
+
+def events():
+    return list(_events)
+
+class Span:
+    """Open span, whose args can be completed before it ends"""
+
+    def __init__(self, name, category, args):
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def set(self, **args):
+        self.args.update(args)
+
+class _NoSpan:
+    def set(self, **args):
+        pass
+
+_no_span = _NoSpan()
+
+@contextlib.contextmanager
+def _recorded_span(name, category, args):
+    current = Span(name, category, args)
+    start = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        current.set(error=type(e).__name__)
+        raise
+    finally:
+        end = time.perf_counter()
+        _events.append(dict(
+            name=name,
+            category=category,
+            start=start - _origin,
+            duration=end - start,
+            thread=threading.get_native_id(),
+            args=current.args,
+        ))
+
+def span(name, category='', **args):
+    """
+    Context manager timing its block as a span.
+    It yields an object whose `set(**args)` adds args,
+    ie. the ones only known at the end, like an http status.
+    """
+    if not _enabled:
+        return contextlib.nullcontext(_no_span)
+    return _recorded_span(name, category, args)
+
+def traced(name=None, category=''):
+    """Decorator turning each call to the function into a span"""
+    def decorator(function):
+        span_name = name or function.__qualname__
+        @functools.wraps(function)
+        def wrapper(*args, **kwds):
+            with span(span_name, category):
+                return function(*args, **kwds)
+        return wrapper
+    return decorator
+
+_id_re = re.compile(r'(?<=/)\d+(?=/|$)')
+
+def url_template(url):
+    """
+    Url with numeric ids replaced, so requests can be grouped.
+
+    >>> url_template('asset/edit/123')
+    'asset/edit/{id}'
+    >>> url_template('asset/12/')
+    'asset/{id}/'
+    >>> url_template('asset')
+    'asset'
+    """
+    return _id_re.sub('{id}', url)
+
+def summary(events=None):
+    """
+    Table of the spans grouped by category and name,
+    with the number of calls, their total and the longest one.
+    Spans in different threads overlap, so totals may add more than the run.
+    """
+    if events is None:
+        events = _events
+    groups = {}
+    for event in events:
+        key = event['category'], event['name']
+        count, total, longest = groups.get(key, (0, 0., 0.))
+        groups[key] = count+1, total+event['duration'], max(longest, event['duration'])
+    width = max([len(f"{c} {n}") for c, n in groups] + [4])
+    lines = [f"{'span':<{width}} {'calls':>5} {'total ms':>10} {'max ms':>10}"]
+    for (category, name), (count, total, longest) in sorted(
+            groups.items(), key=lambda item: -item[1][1]):
+        label = f"{category} {name}".strip()
+        lines.append(f"{label:<{width}} {count:>5} {total*1000:>10.1f} {longest*1000:>10.1f}")
+    return '\n'.join(lines)
+
+def chrome_event(event):
+    """Event in Chrome trace format (microseconds, complete event)"""
+    return dict(
+        name=event['name'],
+        cat=event['category'],
+        ph='X',
+        ts=round(event['start']*1e6, 1),
+        dur=round(event['duration']*1e6, 1),
+        pid=os.getpid(),
+        tid=event['thread'],
+        args=event['args'],
+    )
+
+def write_trace(path, events=None):
+    """
+    Writes the spans to path.
+    A '.jsonl' file gets a json object per line,
+    any other, a Chrome trace to open in chrome://tracing or Perfetto.
+    """
+    if events is None:
+        events = _events
+    path = str(path)
+    with open(path, 'w') as f:
+        if path.endswith('.jsonl'):
+            for event in events:
+                f.write(json.dumps(event, default=str) + '\n')
+            return
+        json.dump(dict(
+            traceEvents=[chrome_event(event) for event in events],
+            displayTimeUnit='ms',
+        ), f, default=str)
@@ -0,0 +1,91 @@
+import unittest
+import contextlib
+import io
+import json
+from . import tracing
+from .api import Api
+from .testutils import temp_path, FakeResponse, FakeSession
+
+class Tracing_Test(unittest.TestCase):
+
+    def setUp(self):
+        tracing.enable()
+        self.addCleanup(tracing.disable)
+
+    def names(self):
+        return [(e['category'], e['name']) for e in tracing.events()]
+
+    def test_span__recorded(self):
+        with tracing.span('load', 'config', file='a.yaml') as span:
+            span.set(bytes=3)
+        [event] = tracing.events()
+        self.assertEqual(event['name'], 'load')
+        self.assertEqual(event['category'], 'config')
+        self.assertEqual(event['args'], dict(file='a.yaml', bytes=3))
+        self.assertGreaterEqual(event['duration'], 0)
+
+    def test_span__disabled(self):
+        tracing.disable()
+        with tracing.span('load') as span:
+            span.set(bytes=3)
+        self.assertEqual(tracing.events(), [])
+
+    def test_span__error(self):
+        with self.assertRaises(ValueError):
+            with tracing.span('load'):
+                raise ValueError()
+        self.assertEqual(tracing.events()[0]['args'], dict(error='ValueError'))
+
+    def test_enable__resets(self):
+        with tracing.span('load'): pass
+        tracing.enable()
+        self.assertEqual(tracing.events(), [])
+
+    def test_traced(self):
+        @tracing.traced(category='test')
+        def function(a):
+            return a
+        self.assertEqual(function(3), 3)
+        self.assertEqual(self.names(), [('test', 'Tracing_Test.test_traced.<locals>.function')])
+
+    def test_summary(self):
+        events = [
+            dict(category='http', name='GET asset/{id}', duration=.1),
+            dict(category='git', name='rev-parse HEAD', duration=.001),
+            dict(category='http', name='GET asset/{id}', duration=.3),
+        ]
+        self.assertEqual(tracing.summary(events).splitlines(), [
+            "span                calls   total ms     max ms",
+            "http GET asset/{id}     2      400.0      300.0",
+            "git rev-parse HEAD      1        1.0        1.0",
+        ])
+
+    def test_write_trace__chrome(self):
+        with tracing.span('load', 'config'): pass
+        path = self.enterContext(temp_path())/'trace.json'
+        tracing.write_trace(path)
+        [event] = json.loads(path.read_text())['traceEvents']
+        self.assertEqual(event['name'], 'load')
+        self.assertEqual(event['cat'], 'config')
+        self.assertEqual(event['ph'], 'X')
+
+    def test_write_trace__jsonl(self):
+        with tracing.span('a'): pass
+        with tracing.span('b'): pass
+        path = self.enterContext(temp_path())/'trace.jsonl'
+        tracing.write_trace(path)
+        lines = path.read_text().splitlines()
+        self.assertEqual([json.loads(line)['name'] for line in lines], ['a', 'b'])
+
+    def test_api_requests(self):
+        self.enterContext(contextlib.redirect_stdout(io.StringIO()))
+        session = FakeSession(FakeResponse(dict(title='A')), FakeResponse(None, status_code=404))
+        api = Api('https://library/api/', session=session)
+        api.get('asset/12')
+        with self.assertRaises(Exception):
+            api.get('asset/edit/3')
+        http = [e for e in tracing.events() if e['category'] == 'http']
+        self.assertEqual([(e['name'], e['args']['status'], e['args']['bytes']) for e in http], [
+            ('GET asset/{id}', 200, 14),
+            ('GET asset/edit/{id}', 404, 4),
+        ])
@@ -0,0 +1,349 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from .catalogue import InvalidMetadata, checked_config
+from .config import Config
+from .previews import previews_edit
+from .stages import Stages
+from .thumbnails import fill_thumbnails
+from . import archive
+from . import preflight
+from . import tracing
+from .utils import table, parse_size
+from .submissions import payload_digest, live_state, changed_fields
+
+def build_payload(config, previews, send_previews=False, description=None):
+    """Edit request for the config, description can be given if already computed"""
+    payload = {
+        "title": config.project_name,
+        "description": config.description if description is None else description,
+        "category_id": config.category,
+        "godot_version": config.godot_version,
+        "version_string": config.project_version,
+        "cost": config.project_license,
+        "download_provider": config.repo_hosting,
+        "download_commit": config.git_hash,
+        "download_hash": "", # deprecated
+        "browse_url": config.repo_url,
+        "issues_url": config.issues_url,
+        "icon_url": f"{config.repo_raw}/icon.svg",
+        "previews": previews,
+    }
+
+    # TODO: previews not working yet
+    if not send_previews:
+        payload['previews'] = []
+    return payload
+
+class Upload:
+    """
+    Publication of an asset described by a metadata file,
+    whose project is at root.
+    """
+
+    def __init__(self, api, metadata_file, root='.', send_previews=False, submissions=None,
+            config_cache=None, catalogue=None, overrides=None):
+        self.api = api
+        self.metadata_file = metadata_file
+        self.overrides = overrides
+        self.root = root
+        self.send_previews = send_previews
+        self.submissions = submissions
+        self.config_cache = config_cache
+        self.catalogue = catalogue
+        self.warnings = []
+        self.stages = Stages()
+
+    def _config(self, metadata):
+        if self.config_cache:
+            return self.config_cache.config(metadata)
+        return Config(**metadata)
+
+    def prepare(self, login=None):
+        """
+        Gathers the local and remote state and computes the payload.
+        Independent stages run concurrently, so the critical path
+        is about the slowest chain of requests, not their sum.
+        If given, login is run as one more stage.
+        Overrides, ie. the ones of a target, replace metadata keys.
+        With a catalogue, category names are turned into ids,
+        and wrong metadata raises InvalidMetadata before any request,
+        or, if only doubtful, is listed in warnings.
+        """
+        api = self.api
+        metadata = Config.load_yaml(self.metadata_file)
+        metadata.setdefault('root', str(self.root))
+        metadata.update(self.overrides or {})
+
+        config, self.warnings = checked_config(metadata, self._config, self.catalogue)
+
+        stages = self.stages
+        if login:
+            stages.add('login', login)
+        stages.add('config', lambda: config)
+        stages.add('asset', lambda: api.asset(metadata['asset_id']))
+        stages.add('pending_edit', lambda config: api.pending_version_edit(
+            asset_id = config.asset_id,
+            version_string = config.project_version,
+        ), after=['config'])
+        stages.add('edit', lambda pending_edit:
+            api.asset_edit(pending_edit) if pending_edit else None,
+            after=['pending_edit'])
+        stages.add('thumbnails', lambda config:
+            fill_thumbnails(config.previews, config),
+            after=['config'])
+        stages.add('previews', lambda config, asset, thumbnails:
+            previews_edit(thumbnails, asset.get('previews', []), config),
+            after=['config', 'asset', 'thumbnails'])
+        stages.add('preflight', lambda config, thumbnails:
+            preflight.check(config, thumbnails),
+            after=['config', 'thumbnails'])
+        stages.add('archive', lambda config:
+            archive.analyze(config.root, config.git_hash) if config.archive_budget else None,
+            after=['config'])
+        results = stages.run()
+
+        self.config = config = results['config']
+        self.media = results['preflight']
+        self.archive = results['archive']
+        config.edit_id = results['pending_edit']
+        edit = results['edit']
+        self.edited_previews = edit.get('previews', []) if edit else None
+        self.live = live_state(results['asset'], edit)
+        self.resource = f'asset/{config.asset_id}'
+        if config.edit_id:
+            self.resource = f'asset/edit/{config.edit_id}'
+        self.payload = build_payload(config, results['previews'], self.send_previews)
+        self.digest = payload_digest(self.payload)
+
+    def unchanged(self):
+        """
+        Explains why submitting the payload would be a no-op, or None.
+        That is, when the live asset, with the pending edit applied,
+        already has those values, or when the very same payload
+        was the last one successfully submitted for that version,
+        as the edit still pending. Once that edit is accepted or
+        rejected, only the live asset tells.
+        """
+        if not changed_fields(self.payload, self.live):
+            if self.config.edit_id:
+                return f"Pending edit {self.config.edit_id} already has the same content"
+            return "The asset in the library already has the same content"
+        if not self.submissions:
+            return None
+        if not self.config.edit_id:
+            return None
+        last = self.submissions.last(self.api.base, self.config.asset_id, self.config.project_version)
+        if not last or last['url'] != f'asset/edit/{self.config.edit_id}':
+            return None
+        if last['digest'] == self.digest:
+            return f"The same content was already submitted as {last['url']}"
+        return None
+
+    def problems(self):
+        """Problems with the linked repository media and the archive size"""
+        problems = preflight.problems(self.media)
+        if self.archive:
+            budget = archive.over_budget(self.archive, parse_size(self.config.archive_budget))
+            if budget:
+                problems.append(budget)
+        return problems
+
+    def submit(self):
+        result = self.api.post(self.resource, json=self.payload)
+        if self.submissions:
+            self.submissions.record(self.api.base,
+                self.config.asset_id,
+                self.config.project_version,
+                self.digest,
+                result.get('url'),
+            )
+        return result
+
+
+def project_root(metadata_file):
+    """Closest directory containing the metadata file and a project.godot"""
+    directory = Path(metadata_file).resolve().parent
+    for candidate in (directory, *directory.parents):
+        if (candidate/'project.godot').exists():
+            return candidate
+    return directory
+
+def discover(paths, pattern='asset-metadata.yaml'):
+    """
+    Metadata files given explicitly or found under the given directories,
+    skipping hidden ones.
+    """
+    found = []
+    for path in map(Path, paths):
+        if not path.is_dir():
+            found.append(path)
+            continue
+        for directory, subdirs, files in os.walk(path):
+            subdirs[:] = sorted(d for d in subdirs if not d.startswith('.'))
+            if pattern in files:
+                found.append(Path(directory)/pattern)
+    return found
+
+def target_overrides(target):
+    """
+    Metadata keys of a target: its branch, to be read from the git objects
+    without checking it out, and the keys it overrides.
+
+    >>> target_overrides('godot3')
+    {'branch': 'godot3', 'revision': 'godot3', 'targets': []}
+    >>> target_overrides(dict(branch='godot3', asset_id='1234'))['asset_id']
+    '1234'
+    """
+    if isinstance(target, str):
+        target = dict(branch=target)
+    if not target.get('branch'):
+        raise ValueError(f"Target without a branch: {target}")
+    return dict(target, revision=target['branch'], targets=[])
+
+def expand_targets(metadata_files, only=None):
+    """
+    (metadata file, overrides) of each upload:
+    one for each of the `targets` of a metadata file,
+    or the file as is (no overrides) if it has none.
+    If given, only those branches are uploaded,
+    also the ones not listed as targets.
+    A branch is uploaded once, and uploads of the same asset
+    raise InvalidMetadata, since they would compete as edits of it.
+    """
+    uploads = []
+    uploaded = {}
+    for metadata_file in metadata_files:
+        try:
+            metadata = Config.load_yaml(metadata_file)
+        except Exception:
+            metadata = {} # its upload reports the failure
+        targets = [target_overrides(target) for target in metadata.get('targets') or []]
+        if only:
+            listed = {target['branch']: target for target in targets}
+            targets = [listed.get(branch) or target_overrides(branch) for branch in only]
+        branches = {}
+        for target in targets:
+            branches.setdefault(target['branch'], target)
+        targets = list(branches.values())
+        for overrides in targets or [None]:
+            asset_id = (overrides or {}).get('asset_id', metadata.get('asset_id'))
+            label = _label(metadata_file, overrides)
+            if asset_id is not None and str(asset_id) in uploaded:
+                raise InvalidMetadata(f"{uploaded[str(asset_id)]} and {label} both upload asset {asset_id}, "
+                    "give each target its own asset_id")
+            if asset_id is not None:
+                uploaded[str(asset_id)] = label
+            uploads.append((metadata_file, overrides))
+    return uploads
+
+def _label(metadata_file, overrides):
+    if not overrides:
+        return str(metadata_file)
+    return f"{metadata_file}@{overrides['branch']}"
+
+def upload_one(api, metadata_file, do=False, send_previews=False, submissions=None, force=False,
+        preflight_checks=True, config_cache=None, catalogue=None, overrides=None):
+    """
+    Uploads a metadata file returning a status dict instead of raising.
+    Unchanged assets are not submitted unless forced.
+    Unless preflight_checks is false, broken or oversized linked media,
+    or an archive over budget, fail it.
+    Overrides, ie. the ones of a target, replace metadata keys.
+    Once prepared, the status also has the resource, payload, problems
+    and metadata warnings, and once submitted, the result.
+    """
+    status = dict(
+        metadata=_label(metadata_file, overrides),
+        asset_id=None,
+        version=None,
+        status='failed',
+        detail='',
+    )
+    with tracing.span(status['metadata'], 'upload'):
+        try:
+            upload = Upload(api, metadata_file,
+                root=project_root(metadata_file),
+                send_previews=send_previews,
+                submissions=submissions,
+                config_cache=config_cache,
+                catalogue=catalogue,
+                overrides=overrides,
+            )
+            upload.prepare()
+            status.update(
+                asset_id=upload.config.asset_id,
+                version=upload.config.project_version,
+                resource=upload.resource,
+                payload=upload.payload,
+                problems=upload.problems(),
+                warnings=upload.warnings,
+            )
+            problems = status['problems'] if preflight_checks else []
+            if problems:
+                status.update(detail='; '.join(problems))
+                return status
+            unchanged = None if force else upload.unchanged()
+            if unchanged:
+                status.update(status='unchanged', detail=unchanged)
+                return status
+            if not do:
+                status.update(status='dry-run', detail=f"would post {upload.resource}")
+                return status
+            result = upload.submit()
+            status.update(status='submitted', detail=result.get('url', ''), result=result)
+        except Exception as e:
+            status.update(detail=f"{type(e).__name__}: {e}")
+    return status
+
+def upload_many(api, metadata_files, jobs=4, fail_fast=False, targets=None, **options):
+    """
+    Uploads several assets through a bounded pool of workers
+    sharing the api (its connection pool and login).
+    Metadata files with targets upload each of them,
+    or just the target branches, if given (see expand_targets).
+    With fail_fast, pending uploads are skipped after the first failure.
+    Returns the status of each upload, in the given order.
+    """
+    return upload_expanded(api, expand_targets(metadata_files, targets),
+        jobs=jobs, fail_fast=fail_fast, **options)
+
+def upload_expanded(api, uploads, jobs=4, fail_fast=False, **options):
+    """As upload_many, for the (metadata file, overrides) of expand_targets"""
+    statuses = {}
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = {
+            executor.submit(upload_one, api, metadata_file, overrides=overrides, **options): i
+            for i, (metadata_file, overrides) in enumerate(uploads)
+        }
+        for future in as_completed(futures):
+            if future.cancelled():
+                continue
+            status = future.result()
+            statuses[futures[future]] = status
+            if fail_fast and status['status'] == 'failed':
+                for pending in futures:
+                    pending.cancel()
+    return [
+        statuses.get(i) or dict(
+            metadata=_label(metadata_file, overrides),
+            asset_id=None,
+            version=None,
+            status='skipped',
+            detail='previous failure',
+        )
+        for i, (metadata_file, overrides) in enumerate(uploads)
+    ]
+
+def summary_table(statuses):
+    """
+    >>> print(summary_table([dict(metadata='a.yaml', asset_id='1', version='1.0', status='dry-run', detail='')]))
+    metadata  asset  version  status   detail
+    a.yaml    1      1.0      dry-run
+    """
+    columns = ['metadata', 'asset_id', 'version', 'status', 'detail']
+    headers = ['metadata', 'asset', 'version', 'status', 'detail']
+    return table([
+        [status[column] for column in columns]
+        for status in statuses
+    ], headers)
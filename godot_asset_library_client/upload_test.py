@@ -0,0 +1,289 @@
+import unittest
+from pathlib import Path
+from . import git_reader
+from .upload import discover, expand_targets, project_root, upload_many, Upload
+from .submissions import SubmissionLog
+from .catalogue import Catalogue, InvalidMetadata
+from .testutils import sandbox_dir, temp_path, GitRepository
+
+project_godot = """\
+[application]
+
+config/name="Addon {name}"
+config/version="1.0.{name}"
+config/features=PackedStringArray("4.3")
+"""
+
+metadata_yaml = """\
+asset_id: '{name}'
+category: 1
+project_license: MIT
+"""
+
+class StubApi:
+    """
+    Answers as a library without previews, nor pending edits
+    unless the posted ones are kept pending.
+    """
+    base = 'https://library/api/'
+
+    def __init__(self, asset={}, keep_pending=False):
+        self.posted = []
+        self._asset = asset
+        self._keep_pending = keep_pending
+
+    def asset(self, asset_id):
+        return dict(self._asset)
+
+    def pending_version_edit(self, asset_id, version_string):
+        if self._keep_pending and self.posted:
+            return str(len(self.posted))
+        return None
+
+    def asset_edit(self, edit_id):
+        return {}
+
+    def post(self, url, json):
+        self.posted.append((url, json['title']))
+        return dict(url=f'asset/edit/{len(self.posted)}')
+
+class Upload_Test(GitRepository, unittest.TestCase):
+
+    def setUp(self):
+        git_reader.clear_cache()
+        self.addCleanup(git_reader.clear_cache)
+        self.sandbox = self.enterContext(sandbox_dir())
+        self.init_repo(origin='https://github.com/studio/mono.git')
+        self.commit({
+            'icon.svg': '<svg xmlns="http://www.w3.org/2000/svg" width="128" height="128"/>',
+        }, message='init')
+
+    def addon(self, name, metadata_dir=''):
+        root = Path('addons')/name
+        (root/metadata_dir).mkdir(parents=True, exist_ok=True)
+        (root/'project.godot').write_text(project_godot.format(name=name))
+        (root/metadata_dir/'asset-metadata.yaml').write_text(metadata_yaml.format(name=name))
+        return root/metadata_dir/'asset-metadata.yaml'
+
+    def test_project_root__same_dir(self):
+        metadata = self.addon('a')
+        self.assertEqual(project_root(metadata), Path('addons/a').resolve())
+
+    def test_project_root__ancestor(self):
+        metadata = self.addon('a', 'meta')
+        self.assertEqual(project_root(metadata), Path('addons/a').resolve())
+
+    def test_discover(self):
+        a = self.addon('a')
+        b = self.addon('b', 'meta')
+        Path('.hidden').mkdir()
+        Path('.hidden/asset-metadata.yaml').write_text('')
+        self.assertEqual(discover(['.']), [a, b])
+
+    def test_discover__explicit_files(self):
+        a = self.addon('a')
+        self.assertEqual(discover([str(a)]), [a])
+
+    def test_prepare__relative_to_root(self):
+        metadata = self.addon('a')
+        upload = Upload(StubApi(), metadata, root=project_root(metadata))
+        upload.prepare()
+        self.assertEqual(upload.payload['title'], 'Addon a')
+        self.assertEqual(upload.payload['version_string'], '1.0.a')
+        self.assertEqual(upload.payload['browse_url'], 'https://github.com/studio/mono')
+        self.assertEqual(upload.resource, 'asset/a')
+
+    def test_prepare__category_by_name(self):
+        metadata = self.addon('a')
+        metadata.write_text(metadata_yaml.format(name='a').replace('category: 1', 'category: 2D Tools'))
+        catalogue = Catalogue(dict(categories=[dict(id='1', name='2D Tools')]))
+        upload = Upload(StubApi(), metadata, root=project_root(metadata), catalogue=catalogue)
+        upload.prepare()
+        self.assertEqual(upload.payload['category_id'], '1')
+
+    def test_prepare__invalid_metadata_before_requests(self):
+        metadata = self.addon('a')
+        metadata.write_text(metadata_yaml.format(name='a').replace('MIT', 'GPL-3'))
+        catalogue = Catalogue(dict(categories=[dict(id='1', name='2D Tools')], licenses=['MIT', 'GPLv3']))
+        class NoRequests:
+            def __getattr__(self, name):
+                raise AssertionError(f"{name} requested")
+        upload = Upload(NoRequests(), metadata, root=project_root(metadata), catalogue=catalogue)
+        with self.assertRaises(InvalidMetadata) as context:
+            upload.prepare()
+        self.assertIn("'GPL-3' (did you mean 'GPLv3'?)", str(context.exception))
+
+    def test_prepare__doubtful_metadata_warned(self):
+        metadata = self.addon('a')
+        metadata.write_text(metadata_yaml.format(name='a').replace('MIT', 'GPL-3'))
+        catalogue = Catalogue(dict(categories=[dict(id='1', name='2D Tools')]))
+        upload = Upload(StubApi(), metadata, root=project_root(metadata), catalogue=catalogue)
+        upload.prepare()
+        [warning] = upload.warnings
+        self.assertIn("'GPL-3' (did you mean 'GPLv3'?)", warning)
+        self.assertEqual(upload.payload['cost'], 'GPL-3')
+
+    def statuses(self, statuses):
+        return [(status['asset_id'], status['status']) for status in statuses]
+
+    def test_upload_many__dry_run(self):
+        api = StubApi()
+        statuses = upload_many(api, [self.addon('a'), self.addon('b')])
+        self.assertEqual(self.statuses(statuses), [('a', 'dry-run'), ('b', 'dry-run')])
+        self.assertEqual(api.posted, [])
+
+    def test_upload_many__do(self):
+        api = StubApi()
+        statuses = upload_many(api, [self.addon('a'), self.addon('b')], do=True)
+        self.assertEqual(self.statuses(statuses), [('a', 'submitted'), ('b', 'submitted')])
+        self.assertEqual(sorted(api.posted), [('asset/a', 'Addon a'), ('asset/b', 'Addon b')])
+
+    def test_upload_many__keep_going(self):
+        files = [self.addon('a'), Path('missing.yaml'), self.addon('b')]
+        statuses = upload_many(StubApi(), files, jobs=1)
+        self.assertEqual(self.statuses(statuses), [('a', 'dry-run'), (None, 'failed'), ('b', 'dry-run')])
+
+    def test_upload_many__fail_fast(self):
+        files = [Path('missing.yaml'), self.addon('a'), self.addon('b')]
+        statuses = upload_many(StubApi(), files, jobs=1, fail_fast=True)
+        self.assertEqual([status['status'] for status in statuses][0], 'failed')
+        self.assertIn('skipped', [status['status'] for status in statuses])
+
+    def test_upload_many__unchanged_live_asset(self):
+        metadata = self.addon('a')
+        upload = Upload(StubApi(), metadata, root=project_root(metadata))
+        upload.prepare()
+        api = StubApi(asset=upload.payload)
+        statuses = upload_many(api, [metadata], do=True)
+        self.assertEqual(self.statuses(statuses), [('a', 'unchanged')])
+        self.assertEqual(api.posted, [])
+
+    def test_upload_many__force(self):
+        metadata = self.addon('a')
+        upload = Upload(StubApi(), metadata, root=project_root(metadata))
+        upload.prepare()
+        api = StubApi(asset=upload.payload)
+        statuses = upload_many(api, [metadata], do=True, force=True)
+        self.assertEqual(self.statuses(statuses), [('a', 'submitted')])
+
+    def test_upload_many__already_submitted(self):
+        submissions = SubmissionLog(self.enterContext(temp_path())/'submissions.json')
+        api = StubApi(keep_pending=True)
+        metadata = self.addon('a')
+        first = upload_many(api, [metadata], do=True, submissions=submissions)
+        second = upload_many(api, [metadata], do=True, submissions=submissions)
+        self.assertEqual(self.statuses(first + second), [('a', 'submitted'), ('a', 'unchanged')])
+        self.assertEqual(second[0]['detail'], "The same content was already submitted as asset/edit/1")
+        self.assertEqual(len(api.posted), 1)
+
+    def test_upload_many__submitted_edit_no_longer_pending(self):
+        submissions = SubmissionLog(self.enterContext(temp_path())/'submissions.json')
+        api = StubApi()
+        metadata = self.addon('a')
+        upload_many(api, [metadata], do=True, submissions=submissions)
+        statuses = upload_many(api, [metadata], do=True, submissions=submissions)
+        self.assertEqual(self.statuses(statuses), [('a', 'submitted')])
+        self.assertEqual(len(api.posted), 2)
+
+    def test_upload_many__submitted_other_content(self):
+        submissions = SubmissionLog(self.enterContext(temp_path())/'submissions.json')
+        api = StubApi(keep_pending=True)
+        metadata = self.addon('a')
+        upload_many(api, [metadata], do=True, submissions=submissions)
+        metadata.write_text(metadata_yaml.format(name='a').replace('category: 1', 'category: 2'))
+        statuses = upload_many(api, [metadata], do=True, submissions=submissions)
+        self.assertEqual(self.statuses(statuses), [('a', 'submitted')])
+
+    def test_upload_many__broken_media(self):
+        metadata = self.addon('a')
+        metadata.write_text(metadata_yaml.format(name='a') + "previews:\n- repoimage: shot.png\n")
+        api = StubApi()
+        statuses = upload_many(api, [metadata], do=True)
+        self.assertEqual(self.statuses(statuses), [('a', 'failed')])
+        self.assertRegex(statuses[0]['detail'], r"^image shot.png: missing at [0-9a-f]{8}$")
+        self.assertEqual(api.posted, [])
+
+    def test_upload_many__broken_media_unchecked(self):
+        metadata = self.addon('a')
+        metadata.write_text(metadata_yaml.format(name='a') + "previews:\n- repoimage: shot.png\n")
+        statuses = upload_many(StubApi(), [metadata], do=True, preflight_checks=False)
+        self.assertEqual(self.statuses(statuses), [('a', 'submitted')])
+
+    def test_upload_many__archive_over_budget(self):
+        metadata = self.addon('a')
+        metadata.write_text(metadata_yaml.format(name='a') + "archive_budget: 100\n")
+        api = StubApi()
+        statuses = upload_many(api, [metadata], do=True)
+        self.assertEqual(self.statuses(statuses), [('a', 'failed')])
+        self.assertRegex(statuses[0]['detail'], r"^archive at [0-9a-f]{8} is .* over the 100 B budget$")
+        self.assertEqual(api.posted, [])
+
+    def test_upload_many__archive_within_budget(self):
+        metadata = self.addon('a')
+        metadata.write_text(metadata_yaml.format(name='a') + "archive_budget: 1MB\n")
+        statuses = upload_many(StubApi(), [metadata], do=True)
+        self.assertEqual(self.statuses(statuses), [('a', 'submitted')])
+
+    def godot3_branch(self, metadata):
+        """Commits the addon, and a godot3 branch releasing it for Godot 3, back to main"""
+        self.git('add', '.')
+        self.git('commit', '-q', '-m', 'addon')
+        self.git('checkout', '-q', '-b', 'godot3')
+        (metadata.parent/'project.godot').write_text(
+            project_godot.format(name='a').replace('1.0.a', '0.9').replace('4.3', '3.6'))
+        self.git('commit', '-q', '-am', 'godot 3')
+        self.git('checkout', '-q', 'main')
+        git_reader.clear_cache() # memoised within the process
+
+    def versions(self, statuses):
+        return [(status['metadata'], status['asset_id'], status['version']) for status in statuses]
+
+    def test_upload_many__targets(self):
+        metadata = self.addon('a')
+        metadata.write_text(metadata_yaml.format(name='a') +
+            "targets:\n- main\n- branch: godot3\n  asset_id: a3\n")
+        self.godot3_branch(metadata)
+        api = StubApi()
+        statuses = upload_many(api, [metadata], do=True)
+        self.assertEqual(self.versions(statuses), [
+            (f'{metadata}@main', 'a', '1.0.a'),
+            (f'{metadata}@godot3', 'a3', '0.9'),
+        ])
+        self.assertEqual(self.statuses(statuses), [('a', 'submitted'), ('a3', 'submitted')])
+        self.assertEqual(self.git('branch', '--show-current'), 'main')
+
+    def test_upload_many__only_given_targets(self):
+        metadata = self.addon('a')
+        self.godot3_branch(metadata)
+        statuses = upload_many(StubApi(), [metadata], targets=['godot3'])
+        self.assertEqual(self.versions(statuses), [(f'{metadata}@godot3', 'a', '0.9')])
+
+    def test_expand_targets(self):
+        metadata = self.addon('a')
+        metadata.write_text(metadata_yaml.format(name='a') +
+            "targets:\n- main\n- branch: godot3\n  asset_id: a3\n")
+        plain = self.addon('b')
+        self.assertEqual([(path, overrides and overrides['branch']) for path, overrides in expand_targets([metadata, plain])], [
+            (metadata, 'main'),
+            (metadata, 'godot3'),
+            (plain, None),
+        ])
+        [(path, overrides)] = expand_targets([metadata], only=['godot3'])
+        self.assertEqual(overrides['asset_id'], 'a3')
+
+    def test_expand_targets__branch_once(self):
+        metadata = self.addon('a')
+        metadata.write_text(metadata_yaml.format(name='a') +
+            "targets:\n- branch: godot3\n  asset_id: a3\n- godot3\n")
+        [(path, overrides)] = expand_targets([metadata])
+        self.assertEqual(overrides['asset_id'], 'a3')
+        [(path, overrides)] = expand_targets([metadata], only=['main', 'main'])
+        self.assertEqual(overrides['branch'], 'main')
+
+    def test_expand_targets__same_asset(self):
+        metadata = self.addon('a')
+        metadata.write_text(metadata_yaml.format(name='a') +
+            "targets:\n- main\n- godot3\n")
+        with self.assertRaises(InvalidMetadata) as context:
+            expand_targets([metadata])
+        self.assertIn(f"{metadata}@main and {metadata}@godot3 both upload asset a", str(context.exception))
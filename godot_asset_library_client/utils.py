@@ -1,11 +1,149 @@
-import yaml
-from pygments import highlight
-from pygments.lexers import YamlLexer
-from pygments.formatters import TerminalFormatter
+import hashlib
+import json
+import os
+import sys
+import threading
+from pathlib import Path
 
+try:
+    import orjson # optional, faster
+except ImportError:
+    orjson = None
 
-def pretty(data):
+def pretty(data, color=None):
+    """
+    Data as yaml, highlighted if color, by default when stdout is a terminal.
+
+    >>> print(pretty(dict(title='My Asset'), color=False))
+    title: My Asset
+    <BLANKLINE>
+    """
+    import yaml
     code = yaml.dump(data)
+    if color is None:
+        color = sys.stdout.isatty()
+    if not color:
+        return code
+    from pygments import highlight
+    from pygments.lexers import YamlLexer
+    from pygments.formatters import TerminalFormatter
     return highlight(code, YamlLexer(), TerminalFormatter())
 
+def json_loads(data):
+    """
+    Parses json text or bytes, with orjson if installed.
+
+    >>> json_loads(b'{"id": "1"}')
+    {'id': '1'}
+    """
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def json_dumps(data):
+    """
+    Compact json text, with orjson if installed.
+    Values json does not know are turned into strings.
+
+    >>> json_dumps(dict(id='1', path=Path('a.yaml')))
+    '{"id":"1","path":"a.yaml"}'
+    """
+    if orjson:
+        return orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(data, default=str, ensure_ascii=False, separators=(',', ':'))
+
+def table(rows, headers):
+    """
+    Text table with left aligned columns
+
+    >>> print(table([['a', 1], ['bbb', None]], ['name', 'value']))
+    name  value
+    a     1
+    bbb
+    """
+    rows = [headers] + [
+        ['' if cell is None else str(cell) for cell in row]
+        for row in rows
+    ]
+    widths = [max(len(row[i]) for row in rows) for i in range(len(headers))]
+    return '\n'.join(
+        '  '.join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip()
+        for row in rows
+    )
+
+_units = ['B', 'KB', 'MB', 'GB']
+
+def human_size(size):
+    """
+    >>> human_size(512), human_size(1536), human_size(5 * 2**20)
+    ('512 B', '1.5 KB', '5.0 MB')
+    """
+    for unit in _units[:-1]:
+        if size < 1024:
+            break
+        size /= 1024
+    else:
+        unit = _units[-1]
+    return f"{size} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+
+def parse_size(text):
+    """
+    Bytes for a size given as a number or with a unit.
+
+    >>> parse_size(1000), parse_size('2KB'), parse_size('1.5 mb')
+    (1000, 2048, 1572864)
+    """
+    if isinstance(text, (int, float)):
+        return int(text)
+    value = text.strip().upper()
+    for power, unit in reversed(list(enumerate(_units))):
+        if value.endswith(unit):
+            return int(float(value[:-len(unit)]) * 1024**power)
+    return int(value)
+
+def cache_dir():
+    """User cache directory for this tool"""
+    base = os.environ.get('XDG_CACHE_HOME') or Path.home()/'.cache'
+    return Path(base)/'godot-asset-library-client'
+
+def cache_file(prefix, base, suffix):
+    """
+    A file in the cache directory for each library url
+
+    >>> cache_file('mirror', 'https://godotengine.org/asset-library/api/', '.sqlite').name
+    'mirror-f9a5812e539d.sqlite'
+    """
+    digest = hashlib.sha1(base.encode('utf8')).hexdigest()[:12]
+    return cache_dir()/f'{prefix}-{digest}{suffix}'
+
+def read_json(path, default=None):
+    """Contents of a json file, or default if missing or unreadable"""
+    try:
+        return json.loads(Path(path).read_text())
+    except (OSError, ValueError):
+        return default
+
+def write_json_atomic(path, data, mode=None):
+    """
+    Writes data as a json file replaced at once,
+    so concurrent readers never see it half written.
+    With mode, ie. 0o600, the file gets it,
+    and missing directories are made only accessible by the user.
+    """
+    path = Path(path)
+    path.parent.mkdir(mode=0o777 if mode is None else 0o700, parents=True, exist_ok=True)
+    temporary = path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+    fd = os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666 if mode is None else mode)
+    with os.fdopen(fd, 'w') as f:
+        json.dump(data, f)
+    if mode is not None:
+        os.chmod(temporary, mode) # in case it already existed
+    os.replace(temporary, path)
 
+def file_signature(path):
+    """Modification time and size of a file, None if missing, to notice changes"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
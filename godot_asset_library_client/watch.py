@@ -0,0 +1,235 @@
+"""
+Warm watch mode: keeps the upload payload computed
+and updates just the parts affected by each changed file.
+"""
+import difflib
+import time
+from dataclasses import fields
+from pathlib import Path
+from . import git_reader
+from . import tracing
+from .catalogue import checked_config
+from .config import Config
+from .previews import previews_edit
+from .thumbnails import fill_thumbnails
+from .upload import build_payload
+from .utils import file_signature
+
+# Config fields inferred from each source
+_source_fields = {
+    source: [
+        f.name for f in fields(Config)
+        if f.metadata.get('source') == source
+    ]
+    for source in ('git', 'project')
+}
+
+# Payload parts and the sources they depend on
+_parts = dict(
+    fields={'metadata', 'project', 'git'},
+    description={'metadata', 'project', 'description'},
+    previews={'metadata', 'git', 'remote'},
+)
+
+def payload_diff(old, new):
+    """
+    Lines describing the changes from the old payload to the new one.
+    Multiline texts are shown as unified diffs.
+
+    >>> print('\\n'.join(payload_diff(dict(a='1', b='x'), dict(a='2', b='x'))))
+    - a: '1'
+    + a: '2'
+    >>> print('\\n'.join(payload_diff(dict(d='l1\\nl2'), dict(d='l1\\nl3'))))
+    ~ d:
+      @@ -1,2 +1,2 @@
+       l1
+      -l2
+      +l3
+    """
+    lines = []
+    for key in new:
+        before, after = old.get(key), new[key]
+        if before == after:
+            continue
+        if isinstance(before, str) and isinstance(after, str) and '\n' in before + after:
+            lines.append(f"~ {key}:")
+            lines += [
+                '  ' + line.rstrip('\n')
+                for line in difflib.unified_diff(
+                    before.splitlines(), after.splitlines(), lineterm='', n=1)
+            ][2:] # skip file headers
+            continue
+        lines.append(f"- {key}: {before!r}")
+        lines.append(f"+ {key}: {after!r}")
+    return lines
+
+
+class Watcher:
+    """
+    Keeps the payload for a metadata file updated.
+
+    Local files are polled by modification time and size.
+    Each change recomputes only the config fields and payload parts
+    depending on the changed source, and the library state
+    (asset, pending edit and previews) is reused until `refresh` seconds old,
+    or the version changes.
+    With a catalogue, the metadata is checked as for an upload.
+    """
+
+    def __init__(self, api, metadata_file, root='.', send_previews=False,
+            refresh=60, clock=time.monotonic, catalogue=None):
+        self.api = api
+        self.catalogue = catalogue
+        self.warnings = []
+        self.metadata_file = Path(metadata_file)
+        self.root = root
+        self.send_previews = send_previews
+        self.refresh = refresh
+        self._clock = clock
+        self._signatures = {}
+        self.config = None
+        self.payload = {}
+        self._parts = {}
+        self._failed = set()
+        self.remote = None
+
+    def _watched(self):
+        """Watched files with the source they belong to"""
+        root = Path(self.root)
+        watched = {self.metadata_file: 'metadata', root/'project.godot': 'project'}
+        for filename in (self.config.description_files if self.config else []):
+            watched[root/filename] = 'description'
+        for path in git_reader.metadata_files(root):
+            watched[path] = 'git'
+        return watched
+
+    def changed_sources(self):
+        """Sources with files changed since the last call"""
+        changed = set()
+        watched = self._watched()
+        for path, source in watched.items():
+            signature = file_signature(path)
+            if self._signatures.get(path, 'unseen') != signature:
+                self._signatures[path] = signature
+                changed.add(source)
+        for path in set(self._signatures) - set(watched):
+            del self._signatures[path]
+        return changed
+
+    def _load_config(self, changed):
+        metadata = Config.load_yaml(self.metadata_file)
+        metadata.setdefault('root', str(self.root))
+        if self.config and 'metadata' not in changed:
+            # Keep the inferred values whose source did not change
+            resolved = self.config.resolved()
+            for source, names in _source_fields.items():
+                if source in changed: continue
+                for name in names:
+                    if name in resolved:
+                        metadata.setdefault(name, resolved[name])
+        if 'git' in changed:
+            git_reader.clear_cache()
+        config, self.warnings = checked_config(metadata, lambda metadata: Config(**metadata), self.catalogue)
+        return config
+
+    def _fetch_remote(self):
+        with tracing.span('remote', 'watch'):
+            config = self.config
+            asset = self.api.asset(config.asset_id)
+            edit_id = self.api.pending_version_edit(config.asset_id, config.project_version)
+        self.remote = dict(
+            asset=asset,
+            edit_id=edit_id,
+            version=config.project_version,
+            fetched_at=self._clock(),
+        )
+
+    def _remote_outdated(self):
+        return (
+            self.remote is None
+            or self.remote['version'] != self.config.project_version
+            or self._clock() - self.remote['fetched_at'] >= self.refresh
+        )
+
+    def _compute(self, part):
+        config = self.config
+        if part == 'description':
+            return dict(description=config.description)
+        if part == 'previews':
+            return dict(previews=previews_edit(fill_thumbnails(config.previews, config),
+                self.remote['asset'].get('previews', []), config))
+        payload = build_payload(config, [], self.send_previews, description='')
+        del payload['description'], payload['previews']
+        return payload
+
+    @property
+    def resource(self):
+        if self.remote and self.remote['edit_id']:
+            return f"asset/edit/{self.remote['edit_id']}"
+        return f'asset/{self.config.asset_id}'
+
+    def update(self, changed, force_remote=False):
+        """
+        Recomputes what depends on the changed sources,
+        refreshing the library state if outdated.
+        Returns the payload diff lines.
+        """
+        with tracing.span('update', 'watch', changed=sorted(changed)):
+            if changed & {'metadata', 'project', 'git'} or not self.config:
+                self.config = self._load_config(changed)
+                # Files just added to the watch, ie. description files,
+                # are read now, their changes count from here
+                for path in self._watched():
+                    self._signatures.setdefault(path, file_signature(path))
+            if force_remote or self._remote_outdated():
+                self._fetch_remote()
+                changed = changed | {'remote'}
+            for part, sources in _parts.items():
+                if part not in self._parts or changed & sources:
+                    self._parts[part] = self._compute(part)
+            old = self.payload
+            payload = {}
+            for part in _parts:
+                payload.update(self._parts[part])
+            if not self.send_previews:
+                payload['previews'] = []
+            self.payload = payload
+        return payload_diff(old, payload)
+
+    def step(self):
+        """
+        Polls once, returns (changed sources, payload diff lines).
+        Changes whose update failed, ie. while a file was half written,
+        are updated again along with the next change.
+        """
+        changed = self.changed_sources()
+        if not changed and not (self.config and self._remote_outdated()):
+            return changed, []
+        changed |= self._failed
+        try:
+            diff = self.update(changed)
+        except Exception:
+            self._failed = changed
+            raise
+        self._failed = set()
+        return changed, diff
+
+    def run(self, interval=0.2, report=print, sleep=time.sleep):
+        """Polls for changes reporting them, until interrupted"""
+        while True:
+            start = time.perf_counter()
+            try:
+                changed, diff = self.step()
+            except Exception as e:
+                # Files being edited may be momentarily wrong
+                report(f"ERROR: {type(e).__name__}: {e}")
+                changed, diff = set(), []
+            if diff:
+                elapsed = (time.perf_counter() - start) * 1000
+                report(f"[{time.strftime('%H:%M:%S')}] "
+                    f"{', '.join(sorted(changed)) or 'refresh'} changed, "
+                    f"payload for {self.resource} updated in {elapsed:.1f} ms")
+                report('\n'.join(diff))
+                for warning in self.warnings:
+                    report(f"WARNING: {warning}")
+            sleep(interval)
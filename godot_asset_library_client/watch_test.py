@@ -0,0 +1,138 @@
+import unittest
+import os
+from pathlib import Path
+from . import git_reader
+from .catalogue import Catalogue, InvalidMetadata
+from .watch import Watcher
+from .testutils import sandbox_dir, GitRepository
+
+class StubApi:
+    """Library without pending edits, counting the asset requests"""
+
+    def __init__(self):
+        self.fetched = 0
+
+    def asset(self, asset_id):
+        self.fetched += 1
+        return dict(previews=[])
+
+    def pending_version_edit(self, asset_id, version_string):
+        return None
+
+class Clock:
+    now = 0.
+    def __call__(self):
+        return self.now
+
+def project(version):
+    return (
+        '[application]\n'
+        'config/name="My Asset"\n'
+        f'config/version="{version}"\n'
+        'config/features=PackedStringArray("4.3")\n'
+    )
+
+class Watcher_Test(GitRepository, unittest.TestCase):
+
+    def setUp(self):
+        git_reader.clear_cache()
+        self.addCleanup(git_reader.clear_cache)
+        self.sandbox = self.enterContext(sandbox_dir())
+        Path('project.godot').write_text(project('1.0'))
+        Path('README.md').write_text('Line 1\nLine 2\n')
+        self.write_metadata()
+        self.init_repo(origin='https://github.com/me/asset.git')
+        self.commit(message='init')
+        self.api = StubApi()
+        self.clock = Clock()
+        self.watcher = Watcher(self.api, 'asset-metadata.yaml', refresh=60, clock=self.clock)
+        self.watcher.step()
+
+    def write(self, filename, content):
+        path = Path(filename)
+        path.write_text(content)
+        # Ensure a different mtime even in coarse grained filesystems
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    def write_metadata(self, category=1):
+        self.write('asset-metadata.yaml',
+            'asset_id: 1\n'
+            f'category: {category}\n'
+            'project_license: MIT\n'
+            'description_files: [README.md]\n'
+        )
+
+    def test_initial_payload(self):
+        payload = self.watcher.payload
+        self.assertEqual(payload['title'], 'My Asset')
+        self.assertEqual(payload['version_string'], '1.0')
+        self.assertEqual(payload['description'], 'Line 1\nLine 2')
+        self.assertEqual(self.api.fetched, 1)
+
+    def test_unchanged__nothing_done(self):
+        config = self.watcher.config
+        self.assertEqual(self.watcher.step(), (set(), []))
+        self.assertIs(self.watcher.config, config)
+        self.assertEqual(self.api.fetched, 1)
+
+    def test_description_changed__just_description(self):
+        config = self.watcher.config
+        self.write('README.md', 'Line 1\nLine 3\n')
+        changed, diff = self.watcher.step()
+        self.assertEqual(changed, {'description'})
+        self.assertEqual(diff, [
+            '~ description:',
+            '  @@ -1,2 +1,2 @@',
+            '   Line 1',
+            '  -Line 2',
+            '  +Line 3',
+        ])
+        self.assertIs(self.watcher.config, config)
+        self.assertEqual(self.api.fetched, 1)
+
+    def test_metadata_changed(self):
+        self.write_metadata(category=2)
+        changed, diff = self.watcher.step()
+        self.assertEqual(changed, {'metadata'})
+        self.assertEqual(diff, ['- category_id: 1', '+ category_id: 2'])
+
+    def test_version_changed__remote_refetched(self):
+        self.write('project.godot', project('1.1'))
+        changed, diff = self.watcher.step()
+        self.assertEqual(diff, ["- version_string: '1.0'", "+ version_string: '1.1'"])
+        self.assertEqual(self.api.fetched, 2)
+
+    def test_head_changed(self):
+        old_hash = self.watcher.payload['download_commit']
+        self.git('commit', '-q', '--allow-empty', '-m', 'second')
+        changed, diff = self.watcher.step()
+        self.assertEqual(changed, {'git'})
+        new_hash = self.watcher.payload['download_commit']
+        self.assertNotEqual(new_hash, old_hash)
+        self.assertEqual(diff, [f"- download_commit: '{old_hash}'", f"+ download_commit: '{new_hash}'"])
+
+    def test_refresh__remote_refetched(self):
+        self.clock.now += 60
+        changed, diff = self.watcher.step()
+        self.assertEqual(self.api.fetched, 2)
+        self.assertEqual(diff, [])
+
+    def test_broken_file__retried_on_next_change(self):
+        self.write('asset-metadata.yaml', 'asset_id: [\n')
+        with self.assertRaises(Exception):
+            self.watcher.step()
+        self.assertEqual(self.watcher.step(), (set(), []))
+        self.write_metadata(category=3)
+        changed, diff = self.watcher.step()
+        self.assertEqual(diff, ['- category_id: 1', '+ category_id: 3'])
+
+    def test_catalogue__category_name_resolved(self):
+        catalogue = Catalogue(dict(categories=[dict(id='1', name='2D Tools'), dict(id='3', name='Tools')]))
+        self.write_metadata(category='2D Tools')
+        watcher = Watcher(self.api, 'asset-metadata.yaml', clock=self.clock, catalogue=catalogue)
+        watcher.step()
+        self.assertEqual(watcher.payload['category_id'], '1')
+        self.write_metadata(category='Toolz')
+        with self.assertRaises(InvalidMetadata):
+            watcher.step()